@@ -1,11 +1,23 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .api_views import *
+from .async_api_views import AsyncLoginView, AsyncTaskListView, AsyncTaskDetailView, AsyncTaskReportView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('task/list', TaskListView.as_view(), name='task-list'),
+    path('task/sync', TaskSyncView.as_view(), name='task-sync'),
+    path('task/bulk', TaskBulkCreateView.as_view(), name='task-bulk-create'),
+    path('task/bulk-status', TaskBulkStatusView.as_view(), name='task-bulk-status'),
     path('task/<int:task_id>/update/', TaskDetailView.as_view(), name='task-detail'),
     path('task/<int:task_id>/report/', TaskReportView.as_view(), name='task-report'),
+    path('task/report-summary', TaskReportSummaryView.as_view(), name='task-report-summary'),
+    path('task/analytics', TaskAnalyticsView.as_view(), name='task-analytics'),
+    path('task/search', TaskSearchView.as_view(), name='task-search'),
+    path('jobs/<int:job_id>', JobDetailView.as_view(), name='job-detail'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('async/task/list', AsyncTaskListView.as_view(), name='async-task-list'),
+    path('async/task/<int:task_id>/update/', AsyncTaskDetailView.as_view(), name='async-task-detail'),
+    path('async/task/<int:task_id>/report/', AsyncTaskReportView.as_view(), name='async-task-report'),
 ]
\ No newline at end of file
@@ -1,14 +1,46 @@
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import ApiRefreshToken
+from .login import login_throttled, record_login_failure, clear_login_failures, client_ip
+from django.core.paginator import Paginator, InvalidPage
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login
-from .models import User, Task
-from .serializers import UserSerializer, TaskSerializer, TaskCompletionSerializer, LoginSerializer
+from .models import User, Task, TaskTombstone, Job
+from .serializers import (
+    UserSerializer, TaskSerializer, TaskCompletionSerializer, LoginSerializer, TaskReadPlan,
+    TaskBulkCreateItemSerializer, TaskBulkStatusItemSerializer, JobSerializer,
+)
+from .stats import bulk_bump_task_stats
+from .cache import TASKS, bump_version
+from .permissions import can_manage_task, manageable_user_ids, scoped_tasks
+from .pagination import KeysetPaginator, InvalidCursor
+from .search import search_terms
+from .filters import TaskFilterSet
+from .reports import completed_task_report, completed_task_analytics
+from .rollups import WATERMARK_OVERLAP
+from .jobs import enqueue
+from .conditional import task_list_validators, task_validators, not_modified, set_validators
+
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+BULK_MAX_ITEMS = 5000
+# Larger batches are created by a background job (see core.job_handlers).
+BULK_SYNC_MAX_ITEMS = 500
+BULK_BATCH_SIZE = 500
+BULK_STATUS_FIELDS = ['status', 'started_at', 'completed_at', 'worked_hours', 'completion_report', 'updated_at']
 
 
 
@@ -16,27 +48,89 @@ class LoginView(APIView):
     permission_classes = (permissions.AllowAny,)
     
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
-            
-            return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-                'user': UserSerializer(user).data
-            })
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data, status_code = login_payload(request.data, client_ip(request))
+        return Response(data, status=status_code)
     
 
 
 class TaskListView(APIView):
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
     
     def get(self, request):
-        tasks = Task.objects.filter(assigned_to=request.user)
-        serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        tasks, plan, error = task_list_query(Task.objects.filter(assigned_to_id=request.user.id), params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        tombstones = TaskTombstone.objects.filter(assigned_to_id=request.user.id)
+        etag, last_modified = task_list_validators(request, tasks, tombstones)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        if 'cursor' not in params and 'page_size' not in params:
+            response = Response(plan.serialize(plan.values(tasks)))
+            return set_validators(response, etag, last_modified)
+
+        paginator = task_list_paginator(tasks, plan, params)
+        try:
+            page = paginator.page(params.get('cursor'))
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        response = Response({
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+            'results': plan.serialize(page),
+        })
+        return set_validators(response, etag, last_modified)
+    
+
+
+class TaskSyncView(APIView):
+    """Tasks changed and task ids removed since a client watermark.
+
+    Clients store the returned ``watermark`` and send it back as ``since`` on
+    the next poll; without ``since`` the full list is returned. The watermark
+    lags the read by WATERMARK_OVERLAP, so a row committed late with an older
+    updated_at is still picked up by the next poll; the overlap repeats some
+    rows, which clients dedupe by id. A ``since`` older than the tombstone
+    retention is refused with 410, as removals may have been purged.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since_param = request.query_params.get('since')
+        since = None
+        if since_param:
+            try:
+                since = parse_datetime(since_param)
+            except ValueError:
+                since = None
+            if since is None:
+                return Response({"error": "since must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        watermark = timezone.now() - WATERMARK_OVERLAP
+        if since is not None and since < watermark - timedelta(seconds=settings.TASK_TOMBSTONE_RETENTION):
+            return Response({"error": "since is too old; sync again without it."}, status=status.HTTP_410_GONE)
+        tasks = Task.objects.filter(assigned_to_id=request.user.id).with_assignee()
+        tombstones = TaskTombstone.objects.filter(assigned_to_id=request.user.id)
+        if since is not None:
+            tasks = tasks.filter(updated_at__gte=since)
+            tombstones = tombstones.filter(deleted_at__gte=since)
+        else:
+            tombstones = tombstones.none()
+
+        changed = TaskSerializer(tasks, many=True).data
+        changed_ids = {task['id'] for task in changed}
+        deleted = sorted(set(tombstones.values_list('task_id', flat=True)) - changed_ids)
+        return Response({
+            'watermark': watermark.isoformat(),
+            'changed': changed,
+            'deleted': deleted,
+        })
     
 
 
@@ -44,33 +138,20 @@ class TaskDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get_object(self, task_id, user):
-        return get_object_or_404(Task, id=task_id, assigned_to=user)
+        return get_object_or_404(Task.objects.with_assignee(), id=task_id, assigned_to_id=user.id)
+
+    def get(self, request, task_id):
+        task = self.get_object(task_id, request.user)
+        etag, last_modified = task_validators(request, task)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(Response(TaskSerializer(task).data), etag, last_modified)
     
     def put(self, request, task_id):
         task = self.get_object(task_id, request.user)
-        
-        if request.data.get('status') == 'completed':
-            completion_serializer = TaskCompletionSerializer(task, data=request.data, partial=True)
-            if completion_serializer.is_valid():
-                completion_serializer.save(
-                    status='completed',
-                    completed_at=timezone.now()
-                )
-                serializer = TaskSerializer(task, data=request.data, partial=True)
-                if serializer.is_valid():
-                    serializer.save()
-                    return Response(serializer.data)
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            return Response(completion_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            serializer = TaskSerializer(task, data=request.data, partial=True)
-            if serializer.is_valid():
-                if serializer.validated_data.get('status') == 'in_progress' and not task.started_at:
-                    serializer.save(started_at=timezone.now())
-                else:
-                    serializer.save()
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data, status_code = update_task(task, request.data)
+        return Response(data, status=status_code)
         
 
 
@@ -85,24 +166,347 @@ class TaskReportView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        task = get_object_or_404(Task, id=task_id)
+        plan = TaskReadPlan.for_fields()
+        task = plan.values(Task.objects.filter(id=task_id)).first()
+        if task is None:
+            raise Http404
         
-        if task.status != 'completed':
+        if task['status'] != 'completed':
             return Response(
                 {"error": "Task is not completed yet."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         if request.user.is_admin and not request.user.is_superadmin:
-            if task.assigned_to.assigned_admin != request.user and task.created_by != request.user:
+            if task['assigned_to'] not in manageable_user_ids(request.user) and task['created_by'] != request.user.id:
                 return Response(
                     {"error": "You can only view reports for tasks assigned to your users."},
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        serializer = TaskSerializer(task)
         return Response({
-            'completion_report': task.completion_report,
-            'worked_hours': task.worked_hours,
-            'task_details': serializer.data
+            'completion_report': task['completion_report'],
+            'worked_hours': task['worked_hours'],
+            'task_details': plan.row(task)
+        })
+    
+
+
+class TaskReportSummaryView(APIView):
+    """Completed-task totals, per-user breakdown and per-day series.
+
+    Accepts the same ``user``, ``date_from`` and ``date_to`` filters as the
+    reports page; admins only see tasks of the users they manage.
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    def get(self, request):
+        if not (request.user.is_admin or request.user.is_superadmin):
+            return Response(
+                {"error": "Only admin users can view reports."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        report, errors = completed_task_report(request.user, request.query_params)
+        if errors:
+            return Response({"error": errors[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+    
+
+
+class TaskAnalyticsView(APIView):
+    """Completed tasks per due day and assignee, for BI tooling.
+
+    Full days are read from the daily rollups (``manage.py rollup_tasks``),
+    today from the task table. Filters as for the report summary.
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    def get(self, request):
+        if not (request.user.is_admin or request.user.is_superadmin):
+            return Response(
+                {"error": "Only admin users can view analytics."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        series, errors = completed_task_analytics(request.user, request.query_params)
+        if errors:
+            return Response({"error": errors[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'days': series})
+    
+
+
+class TaskSearchView(APIView):
+    """Ranked full-text search over the tasks the user may see.
+
+    ``q`` is required; the task list filters and ``fields`` apply as well.
+    Results are paged by number (``page``, ``page_size``) since a ranking
+    has no stable cursor, and carry a ``score`` where higher is better.
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '')
+        if not search_terms(query):
+            return Response({"error": "q must contain at least one word."}, status=status.HTTP_400_BAD_REQUEST)
+        tasks, plan, error = task_list_query(scoped_tasks(request.user), params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = plan.values(tasks.search(query), 'search_rank').order_by('search_rank', '-created_at', '-id')
+        paginator = Paginator(rows, api_page_size(params))
+        try:
+            page = paginator.page(params.get('page', 1))
+        except InvalidPage:
+            return Response({"error": "Invalid page."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = plan.serialize(page)
+        for result, row in zip(results, page):
+            result['score'] = round(-row['search_rank'], 4)
+        return Response({
+            'count': paginator.count,
+            'next': page.next_page_number() if page.has_next() else None,
+            'previous': page.previous_page_number() if page.has_previous() else None,
+            'results': results,
         })
+
+
+
+class TaskBulkCreateView(APIView):
+    """Create a batch of tasks in one transaction.
+
+    Body: ``{"tasks": [{"title", "description", "assigned_to", "due_date", "status"}, ...]}``.
+    Either every task is created or, when any item is invalid, none is and
+    the errors are reported per item index. Batches over BULK_SYNC_MAX_ITEMS
+    are handed to a background job and answered with 202 and the job id;
+    the job result holds the same payload.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not (request.user.is_admin or request.user.is_superadmin):
+            return Response(
+                {"error": "Only admin users can create tasks."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        items = request.data.get('tasks') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "tasks must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({"error": f"At most {BULK_MAX_ITEMS} tasks per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(items) > BULK_SYNC_MAX_ITEMS:
+            job = enqueue('bulk_create_tasks', {'tasks': items}, user=request.user)
+            return Response(
+                {"job": job.pk, "status": job.status, "status_url": reverse('job-detail', args=[job.pk])},
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        data, status_code = bulk_create_tasks(request.user, items)
+        return Response(data, status=status_code)
+    
+
+
+class TaskBulkStatusView(APIView):
+    """Change the status of a batch of tasks in one transaction.
+
+    Body: ``{"updates": [{"id", "status", "worked_hours", "completion_report"}, ...]}``.
+    Assignees may update their own tasks; superadmins and the assignee's admin
+    may update any task they manage. Invalid items are reported per index
+    and nothing is written.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request):
+        items = request.data.get('updates') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "updates must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({"error": f"At most {BULK_MAX_ITEMS} updates per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = TaskBulkStatusItemSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response({"errors": _item_errors(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+        updates = serializer.validated_data
+
+        ids = [data['id'] for data in updates]
+        tasks = Task.objects.only(
+            'id', 'status', 'started_at', 'completed_at', 'worked_hours', 'completion_report', 'assigned_to_id',
+        ).in_bulk(ids)
+
+        errors = []
+        seen = set()
+        for index, data in enumerate(updates):
+            task = tasks.get(data['id'])
+            if data['id'] in seen:
+                errors.append({"index": index, "errors": {"id": ["Task appears more than once."]}})
+            elif task is None or not _can_update_status(request.user, task):
+                errors.append({"index": index, "errors": {"id": ["Task not found."]}})
+            seen.add(data['id'])
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        deltas = Counter()
+        changed = []
+        for data in updates:
+            task = tasks[data['id']]
+            if task.status != data['status']:
+                deltas[(task.assigned_to_id, task.status)] -= 1
+                deltas[(task.assigned_to_id, data['status'])] += 1
+            task.status = data['status']
+            if data.get('worked_hours'):
+                task.worked_hours = data['worked_hours']
+            if data.get('completion_report'):
+                task.completion_report = data['completion_report']
+            _stamp_status(task, data['status'], now)
+            task.updated_at = now
+            changed.append(task)
+
+        with transaction.atomic():
+            Task.objects.bulk_update(changed, BULK_STATUS_FIELDS, batch_size=BULK_BATCH_SIZE)
+            bulk_bump_task_stats(deltas)
+            bump_version(TASKS)
+
+        return Response({"updated": len(changed), "ids": ids})
+
+
+class JobDetailView(APIView):
+    """Status and result of a background job, for clients to poll."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, id=job_id)
+        if job.created_by_id != request.user.id and not request.user.is_superadmin:
+            raise Http404
+        return Response(JobSerializer(job).data)
+
+
+def bulk_create_tasks(user, items):
+    """Validate and create a batch of tasks for ``user``; returns ``(payload, status_code)``."""
+    assignable = set(User.objects.assignable_by(user).values_list('id', flat=True))
+    serializer = TaskBulkCreateItemSerializer(data=items, many=True, context={'assignable_user_ids': assignable})
+    if not serializer.is_valid():
+        return {"errors": _item_errors(serializer.errors)}, status.HTTP_400_BAD_REQUEST
+
+    now = timezone.now()
+    tasks = []
+    for data in serializer.validated_data:
+        task = Task(
+            title=data['title'],
+            description=data['description'],
+            assigned_to_id=data['assigned_to'],
+            created_by_id=user.id,
+            due_date=data['due_date'],
+            status=data['status'],
+        )
+        _stamp_status(task, data['status'], now)
+        tasks.append(task)
+
+    with transaction.atomic():
+        tasks = Task.objects.bulk_create(tasks, batch_size=BULK_BATCH_SIZE)
+        bulk_bump_task_stats(Counter((task.assigned_to_id, task.status) for task in tasks))
+        bump_version(TASKS)
+
+    return {"created": len(tasks), "ids": [task.pk for task in tasks]}, status.HTTP_201_CREATED
+
+
+def login_payload(data, ip=None):
+    """Check credentials and issue a token pair; returns ``(payload, status_code)``."""
+    username = data.get('username')
+    if login_throttled(username, ip):
+        return {"error": "Too many failed login attempts. Try again later."}, status.HTTP_429_TOO_MANY_REQUESTS
+    serializer = LoginSerializer(data=data)
+    if serializer.is_valid():
+        clear_login_failures(username, ip)
+        return token_payload(serializer.validated_data['user']), status.HTTP_200_OK
+    if username and data.get('password'):
+        record_login_failure(username, ip)
+    return serializer.errors, status.HTTP_400_BAD_REQUEST
+
+
+def token_payload(user):
+    refresh = ApiRefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user': UserSerializer(user).data
+    }
+
+
+def task_list_query(tasks, params):
+    """Apply the task list query string to ``tasks``.
+
+    Returns ``(tasks, plan, error)``; ``error`` is a message for a 400 when a
+    parameter is invalid. Shared by the sync and async list views.
+    """
+    task_filter = TaskFilterSet(params)
+    tasks = task_filter.filter(tasks)
+    if task_filter.errors:
+        return tasks, None, task_filter.errors[0]
+
+    fields = None
+    if params.get('fields'):
+        fields = [name.strip() for name in params['fields'].split(',') if name.strip()]
+        unknown = set(fields) - set(TaskSerializer.field_names())
+        if unknown:
+            return tasks, None, f"Unknown fields: {', '.join(sorted(unknown))}."
+    return tasks, TaskReadPlan.for_fields(fields), None
+
+
+def api_page_size(params):
+    try:
+        page_size = min(int(params.get('page_size', API_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = API_PAGE_SIZE
+    return max(page_size, 1)
+
+
+def task_list_paginator(tasks, plan, params):
+    return KeysetPaginator(plan.values(tasks, 'created_at', 'id'), ('-created_at', '-id'), api_page_size(params))
+
+
+def update_task(task, data):
+    """Apply a task update from the API; returns ``(payload, status_code)``."""
+    if data.get('status') == 'completed':
+        completion_serializer = TaskCompletionSerializer(task, data=data, partial=True)
+        if completion_serializer.is_valid():
+            completion_serializer.save(
+                status='completed',
+                completed_at=timezone.now()
+            )
+            serializer = TaskSerializer(task, data=data, partial=True)
+            if serializer.is_valid():
+                serializer.save()
+                return serializer.data, status.HTTP_200_OK
+            return serializer.errors, status.HTTP_400_BAD_REQUEST
+        return completion_serializer.errors, status.HTTP_400_BAD_REQUEST
+    else:
+        serializer = TaskSerializer(task, data=data, partial=True)
+        if serializer.is_valid():
+            if serializer.validated_data.get('status') == 'in_progress' and not task.started_at:
+                serializer.save(started_at=timezone.now())
+            else:
+                serializer.save()
+            return serializer.data, status.HTTP_200_OK
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+
+
+def _stamp_status(task, new_status, now):
+    if new_status == 'in_progress' and not task.started_at:
+        task.started_at = now
+    elif new_status == 'completed' and not task.completed_at:
+        task.completed_at = now
+
+
+def _can_update_status(user, task):
+    return task.assigned_to_id == user.id or can_manage_task(user, task)
+
+
+def _item_errors(errors):
+    return [{"index": index, "errors": item} for index, item in enumerate(errors) if item]
@@ -0,0 +1,198 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import Task, TaskTombstone
+from .authentication import StatelessJWTAuthentication
+from .serializers import TaskSerializer, TaskReadPlan
+from .pagination import InvalidCursor
+from .permissions import amanageable_user_ids
+from .conditional import atask_list_validators, task_validators, not_modified, set_validators
+from .api_views import token_payload, task_list_query, task_list_paginator, update_task
+from .login import aauthenticate, alogin_throttled, arecord_login_failure, aclear_login_failures, client_ip
+
+
+async def authenticate_jwt(request):
+    """Resolve the bearer token to a user without leaving the event loop.
+
+    Decoding and verifying the token is pure CPU; the user comes from its
+    claims plus the cached active check (see StatelessJWTAuthentication).
+    Returns ``(user, error)``.
+    """
+    auth = StatelessJWTAuthentication()
+    try:
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None, {"detail": "Authentication credentials were not provided."}
+        user = await auth.aget_user(auth.get_validated_token(raw_token))
+    except KeyError:
+        return None, {"detail": "Token contained no recognizable user identification"}
+    except AuthenticationFailed as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {"detail": str(exc.detail)}
+        return None, detail
+    return user, None
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _not_found():
+    return JsonResponse({"detail": "No Task matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncAPIView(View):
+    """Base for the ASGI-native API views.
+
+    Same payloads and error bodies as the DRF views in api_views, but every
+    handler is a coroutine so uvicorn/daphne run them on the event loop
+    instead of a worker thread. Bodies are JSON only.
+    """
+    authentication_required = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authentication_required:
+            user, error = await authenticate_jwt(request)
+            if error:
+                return JsonResponse(
+                    error,
+                    status=status.HTTP_401_UNAUTHORIZED,
+                    headers={'WWW-Authenticate': f'{jwt_settings.AUTH_HEADER_TYPES[0]} realm="api"'},
+                )
+            request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncLoginView(AsyncAPIView):
+    authentication_required = False
+
+    async def post(self, request):
+        data = _json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Request body must be a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+        username, password = data.get('username'), data.get('password')
+        if not (isinstance(username, str) and username and isinstance(password, str) and password):
+            return JsonResponse({"non_field_errors": ["Must include username and password."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        ip = client_ip(request)
+        if await alogin_throttled(username, ip):
+            return JsonResponse({"error": "Too many failed login attempts. Try again later."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        user = await aauthenticate(username, password)
+        if user is None:
+            await arecord_login_failure(username, ip)
+            return JsonResponse({"non_field_errors": ["Unable to log in with provided credentials."]}, status=status.HTTP_400_BAD_REQUEST)
+        await aclear_login_failures(username, ip)
+        return JsonResponse(token_payload(user))
+
+
+class AsyncTaskListView(AsyncAPIView):
+    read_from_replica = True
+
+    async def get(self, request):
+        params = request.GET
+        tasks, plan, error = task_list_query(Task.objects.filter(assigned_to_id=request.user.id), params)
+        if error:
+            return JsonResponse({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        tombstones = TaskTombstone.objects.filter(assigned_to_id=request.user.id)
+        etag, last_modified = await atask_list_validators(request, tasks, tombstones)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        if 'cursor' not in params and 'page_size' not in params:
+            rows = [row async for row in plan.values(tasks)]
+            response = JsonResponse(plan.serialize(rows), safe=False)
+            return set_validators(response, etag, last_modified)
+
+        paginator = task_list_paginator(tasks, plan, params)
+        try:
+            page = await paginator.apage(params.get('cursor'))
+        except InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        response = JsonResponse({
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+            'results': plan.serialize(page),
+        })
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncTaskDetailView(AsyncAPIView):
+
+    async def get_object(self, task_id, user):
+        return await Task.objects.with_assignee().aget(id=task_id, assigned_to_id=user.id)
+
+    async def get(self, request, task_id):
+        try:
+            task = await self.get_object(task_id, request.user)
+        except Task.DoesNotExist:
+            return _not_found()
+        etag, last_modified = task_validators(request, task)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(JsonResponse(TaskSerializer(task).data), etag, last_modified)
+
+    async def put(self, request, task_id):
+        try:
+            task = await self.get_object(task_id, request.user)
+        except Task.DoesNotExist:
+            return _not_found()
+        data = _json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Request body must be a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+        # Serializer validation and save() are sync-only DRF code; run them in one hop.
+        payload, status_code = await sync_to_async(update_task)(task, data)
+        return JsonResponse(payload, status=status_code)
+
+
+class AsyncTaskReportView(AsyncAPIView):
+
+    async def get(self, request, task_id):
+        if not (request.user.is_admin or request.user.is_superadmin):
+            return JsonResponse(
+                {"error": "Only admin users can view task reports."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        plan = TaskReadPlan.for_fields()
+        task = await plan.values(Task.objects.filter(id=task_id)).afirst()
+        if task is None:
+            return _not_found()
+
+        if task['status'] != 'completed':
+            return JsonResponse(
+                {"error": "Task is not completed yet."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.user.is_admin and not request.user.is_superadmin:
+            if task['assigned_to'] not in await amanageable_user_ids(request.user) and task['created_by'] != request.user.id:
+                return JsonResponse(
+                    {"error": "You can only view reports for tasks assigned to your users."},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        worked_hours = task['worked_hours']
+        return JsonResponse({
+            'completion_report': task['completion_report'],
+            # DRF's renderer emits Decimals as numbers; match the sync view.
+            'worked_hours': float(worked_hours) if worked_hours is not None else None,
+            'task_details': plan.row(task),
+        })
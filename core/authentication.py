@@ -0,0 +1,140 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+
+AUTH_STATE_TTL = 30
+
+ROLE_CLAIM = 'role'
+ADMIN_CLAIM = 'assigned_admin_id'
+
+
+class ApiUser:
+    """The requesting user as described by token claims.
+
+    Carries only what the API views look at, so authenticating a request does
+    not need the user row. Use ``id``/``*_id`` lookups with it rather than
+    passing it where a User instance is expected.
+    """
+
+    __slots__ = ('id', 'role', 'assigned_admin_id', '_manageable_user_ids')
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, role, assigned_admin_id):
+        self.id = id
+        self.role = role
+        self.assigned_admin_id = assigned_admin_id
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_user(self):
+        return self.role == 'user'
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_superadmin(self):
+        return self.role == 'superadmin'
+
+    def __str__(self):
+        return f'ApiUser {self.id}'
+
+
+class ApiRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the claims ApiUser needs."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[ADMIN_CLAIM] = user.assigned_admin_id
+        return token
+
+
+def _state_key(user_id):
+    return f'auth:state:{user_id}'
+
+
+def _state(row):
+    return tuple(row) if row else (False, None, None)
+
+
+def auth_state(user_id):
+    """``(is_active, role, assigned_admin_id)`` for a user, cached for AUTH_STATE_TTL seconds.
+
+    Always read from the primary so a deactivation is not masked by replica lag.
+    """
+    state = cache.get(_state_key(user_id))
+    if state is None:
+        row = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).values_list('is_active', 'role', 'assigned_admin_id').first()
+        state = _state(row)
+        cache.set(_state_key(user_id), state, AUTH_STATE_TTL)
+    return state
+
+
+async def aauth_state(user_id):
+    state = await cache.aget(_state_key(user_id))
+    if state is None:
+        row = await User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).values_list('is_active', 'role', 'assigned_admin_id').afirst()
+        state = _state(row)
+        await cache.aset(_state_key(user_id), state, AUTH_STATE_TTL)
+    return state
+
+
+def invalidate_auth_state(user_id):
+    cache.delete(_state_key(user_id))
+
+
+def _user_from_claims(validated_token, state):
+    user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    is_active, role, assigned_admin_id = state
+    if not is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    if (role, assigned_admin_id) != (validated_token[ROLE_CLAIM], validated_token[ADMIN_CLAIM]):
+        # Role or admin changed since the token was issued; make the client log in again.
+        raise AuthenticationFailed('Token is out of date, please log in again.', code='token_stale')
+    return ApiUser(user_id, role, assigned_admin_id)
+
+
+def _has_claims(validated_token):
+    return all(claim in validated_token for claim in (jwt_settings.USER_ID_CLAIM, ROLE_CLAIM, ADMIN_CLAIM))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that builds request.user from token claims.
+
+    The only per-request lookup is a short-lived cached check that the user
+    is still active and unchanged, so deactivating a user (which clears that
+    cache entry) locks them out straight away in this process and within
+    AUTH_STATE_TTL seconds elsewhere. Tokens issued before the claims
+    existed fall back to loading the user row.
+    """
+
+    def get_user(self, validated_token):
+        if not _has_claims(validated_token):
+            return super().get_user(validated_token)
+        return _user_from_claims(validated_token, auth_state(validated_token[jwt_settings.USER_ID_CLAIM]))
+
+    async def aget_user(self, validated_token):
+        if _has_claims(validated_token):
+            return _user_from_claims(validated_token, await aauth_state(validated_token[jwt_settings.USER_ID_CLAIM]))
+        try:
+            user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: validated_token[jwt_settings.USER_ID_CLAIM]})
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -0,0 +1,261 @@
+"""Replay a weighted mix of HTML and API requests and measure the stack.
+
+Used by ``manage.py bench_requests``. A mix is a JSONL file, one request
+per line::
+
+    {"name": "task_list", "path": "/tasks/", "role": "admin", "auth": "session", "weight": 5}
+
+``method`` defaults to GET, ``auth`` is ``session``, ``token`` or
+``none``, ``query`` is a dict of query-string parameters and ``body`` a
+JSON body. ``{task_id}``, ``{user_id}``, ``{username}`` and
+``{password}`` in the path, query or body are filled from the bench data
+set (see ``manage.py seed_bench``).
+"""
+import io
+import json
+import random
+import re
+import resource
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+
+from .authentication import ApiRefreshToken
+from .models import User, Task
+
+
+DEFAULT_MIX = [
+    {'name': 'superadmin_dashboard', 'path': '/superadmin/dashboard/', 'role': 'superadmin', 'weight': 2},
+    {'name': 'admin_dashboard', 'path': '/admin-dashboard/', 'role': 'admin', 'weight': 4},
+    {'name': 'user_dashboard', 'path': '/user/dashboard', 'role': 'user', 'weight': 6},
+    {'name': 'task_list', 'path': '/tasks/', 'role': 'admin', 'weight': 8},
+    {'name': 'task_list filtered', 'path': '/tasks/', 'role': 'admin', 'weight': 4,
+     'query': {'status': 'completed', 'user': '{user_id}'}},
+    {'name': 'reports', 'path': '/reports/', 'role': 'admin', 'weight': 3},
+    {'name': 'user_list', 'path': '/users/', 'role': 'superadmin', 'weight': 2},
+    {'name': 'api task-list', 'path': '/api/v1/task/list', 'role': 'user', 'auth': 'token', 'weight': 12,
+     'query': {'page_size': 50}},
+    {'name': 'api task-sync', 'path': '/api/v1/task/sync', 'role': 'user', 'auth': 'token', 'weight': 6},
+    {'name': 'api task-detail', 'path': '/api/v1/task/{task_id}/update/', 'role': 'user', 'auth': 'token', 'weight': 6},
+    {'name': 'api report-summary', 'path': '/api/v1/task/report-summary', 'role': 'admin', 'auth': 'token', 'weight': 2},
+    {'name': 'api analytics', 'path': '/api/v1/task/analytics', 'role': 'admin', 'auth': 'token', 'weight': 1},
+    {'name': 'api login', 'method': 'POST', 'path': '/api/v1/login/', 'role': 'user', 'auth': 'none', 'weight': 1,
+     'body': {'username': '{username}', 'password': '{password}'}},
+]
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def load_mix(path=None):
+    if path is None:
+        return DEFAULT_MIX
+    with open(path) as lines:
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+def _fill(value, values):
+    if isinstance(value, str):
+        return value.format(**values)
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    return value
+
+
+class Identity:
+    """A user of one role with a session cookie, a bearer token and sample ids."""
+
+    def __init__(self, user, password):
+        client = Client()
+        client.force_login(user)
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        self.token = str(ApiRefreshToken.for_user(user).access_token)
+        tasks = Task.objects.visible_to(user)
+        own_task = Task.objects.filter(assigned_to=user).values_list('id', flat=True).first()
+        self.values = {
+            'username': user.username,
+            'password': password,
+            'task_id': own_task or tasks.values_list('id', flat=True).first() or 0,
+            'user_id': tasks.values_list('assigned_to_id', flat=True).first() or user.pk,
+        }
+
+
+def identities(prefix, password):
+    """One Identity per role, preferring the bench data set's accounts."""
+    found = {}
+    for role in ('superadmin', 'admin', 'user'):
+        users = User.objects.filter(role=role, is_active=True)
+        user = users.filter(username__startswith=f'{prefix}-').first() or users.first()
+        if role == 'admin' and user is not None:
+            # An admin with users, so their pages are not trivially empty.
+            user = users.filter(username__startswith=f'{prefix}-', managed_users__isnull=False).first() or user
+        if role == 'user' and user is not None:
+            user = users.filter(username__startswith=f'{prefix}-', assigned_tasks__isnull=False).first() or user
+        if user is not None:
+            found[role] = Identity(user, password)
+    return found
+
+
+class PreparedRequest:
+
+    def __init__(self, spec, identity):
+        self.name = spec['name']
+        self.method = spec.get('method', 'GET')
+        self.path = _fill(spec['path'], identity.values)
+        self.query = urlencode(_fill(spec.get('query', {}), identity.values))
+        body = spec.get('body')
+        self.body = json.dumps(_fill(body, identity.values)).encode() if body is not None else b''
+        self.headers = {}
+        if self.body:
+            self.headers['Content-Type'] = 'application/json'
+        auth = spec.get('auth', 'session')
+        if auth == 'session':
+            self.headers['Cookie'] = identity.cookie
+        elif auth == 'token':
+            self.headers['Authorization'] = f'Bearer {identity.token}'
+
+
+def schedule(mix, found, total, seed):
+    """``total`` prepared requests drawn from the mix by weight, reproducibly."""
+    specs = [spec for spec in mix if spec.get('role', 'user') in found]
+    prepared = [PreparedRequest(spec, found[spec.get('role', 'user')]) for spec in specs]
+    weights = [spec.get('weight', 1) for spec in specs]
+    return random.Random(seed).choices(prepared, weights, k=total)
+
+
+def _queries(server_timing):
+    match = _QUERIES.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+def run_in_process(requests, concurrency):
+    """Call the WSGI handler directly from a thread pool; no sockets involved."""
+    application = get_wsgi_application()
+
+    def send(request):
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'PATH_INFO': request.path,
+            'QUERY_STRING': request.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(request.body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(request.body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            'HTTP_HOST': 'localhost',
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace('-', '_')
+            environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+
+        start = time.perf_counter()
+        result = application(environ, start_response)
+        try:
+            b''.join(result)
+        finally:
+            result.close()
+        elapsed = time.perf_counter() - start
+        return request.name, elapsed, response['status'], _queries(response['headers'].get('Server-Timing'))
+
+    return _drive(send, requests, concurrency)
+
+
+class _QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_over_server(requests, concurrency):
+    """Serve the project on a local threaded WSGI server and hit it over HTTP."""
+    server = ThreadedWSGIServer(('127.0.0.1', 0), _QuietHandler, allow_reuse_address=True)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    def send(request):
+        url = base + request.path + (f'?{request.query}' if request.query else '')
+        http_request = urllib.request.Request(url, data=request.body or None, method=request.method, headers=request.headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except urllib.error.HTTPError as error:
+            error.read()
+            status, headers = error.code, error.headers
+        elapsed = time.perf_counter() - start
+        return request.name, elapsed, status, _queries(headers.get('Server-Timing'))
+
+    try:
+        return _drive(send, requests, concurrency)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _drive(send, requests, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, requests))
+    return results, time.perf_counter() - started
+
+
+def _percentile(timings, fraction):
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def summarize(label, results, elapsed=None):
+    timings = sorted(elapsed_time for _, elapsed_time, _, _ in results)
+    queries = [count for _, _, _, count in results if count is not None]
+    summary = {
+        'request': label,
+        'requests': len(results),
+        'errors': sum(1 for _, _, status, _ in results if status >= 400),
+        'p50_ms': round(statistics.median(timings) * 1000, 2),
+        'p95_ms': round(_percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(timings, 0.99) * 1000, 2),
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+    }
+    if elapsed is not None:
+        summary['requests_per_sec'] = round(len(results) / elapsed, 1)
+    return summary
+
+
+def report(mode, results, elapsed):
+    """Overall figures for one run followed by one row per request name."""
+    by_name = {}
+    for result in results:
+        by_name.setdefault(result[0], []).append(result)
+    overall = dict(summarize('ALL', results, elapsed), peak_rss_mb=peak_rss_mb())
+    rows = [overall] + [summarize(name, rows) for name, rows in sorted(by_name.items())]
+    return [dict(row, mode=mode) for row in rows]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS; it only ever grows, so
+    # a later mode reports the peak of the whole run so far.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
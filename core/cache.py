@@ -0,0 +1,115 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .constants import ROLE_CHOICES
+from .models import User, Task
+
+
+USERS = 'users'
+TASKS = 'tasks'
+
+DEFAULT_TIMEOUT = 300
+
+
+def _version_key(namespace):
+    return f'core:version:{namespace}'
+
+
+def get_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(namespace):
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def bump_version(namespace):
+    """Invalidate every cached entry in the namespace.
+
+    Bumped immediately and again on commit, so a reader that cached
+    not-yet-committed state in between cannot keep serving it.
+    """
+    _bump(namespace)
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def cached(namespace, key, compute, timeout=DEFAULT_TIMEOUT):
+    """Return compute() through the cache under a versioned key.
+
+    ``namespace`` may be a tuple when the value reads several namespaces;
+    bumping any of them invalidates it.
+    """
+    namespaces = (namespace,) if isinstance(namespace, str) else namespace
+    versions = ':'.join(f'{name}:{get_version(name)}' for name in namespaces)
+    cache_key = f'core:{versions}:{key}'
+    value = cache.get(cache_key)
+    if value is None:
+        value = compute()
+        cache.set(cache_key, value, timeout)
+    return value
+
+
+def report_users(user):
+    """Users offered in the reports filter for this requester."""
+    if user.is_superadmin:
+        queryset = User.objects.filter(role='user')
+    else:
+        queryset = User.objects.managed_by(user)
+    return cached(USERS, f'report-users:{user.role}:{user.pk}',
+                  lambda: list(queryset.only('id', 'username')))
+
+
+def assignable_user_choices(user):
+    """(id, username) choices for TaskForm.assigned_to."""
+    return cached(USERS, f'assignable:{user.role}:{user.pk}',
+                  lambda: list(User.objects.assignable_by(user).values_list('id', 'username')))
+
+
+# Cached user lists are plain rows, so no password hash ends up in the cache.
+USER_PREVIEW_FIELDS = ('id', 'username', 'first_name', 'last_name', 'role', 'is_active', 'date_joined')
+
+_ROLE_NAMES = dict(ROLE_CHOICES)
+
+
+def _user_rows(users):
+    rows = []
+    for row in users.values(*USER_PREVIEW_FIELDS):
+        row['full_name'] = f"{row['first_name']} {row['last_name']}".strip()
+        row['role_display'] = _ROLE_NAMES.get(row['role'], row['role'])
+        rows.append(row)
+    return rows
+
+
+def managed_users_preview(admin, limit=5):
+    return cached(USERS, f'managed-preview:{admin.pk}:{limit}',
+                  lambda: _user_rows(User.objects.managed_by(admin)[:limit]))
+
+
+def recent_users(limit=5):
+    return cached(USERS, f'recent-users:{limit}',
+                  lambda: _user_rows(User.objects.order_by('-date_joined')[:limit]))
+
+
+def recent_tasks(user, limit=5):
+    """Newest tasks visible to the user, as shown on the dashboards.
+
+    Also versioned by USERS: the rows carry assignee usernames, and an
+    admin's tasks change when users are reassigned.
+    """
+    tasks = Task.objects.visible_to(user).with_assignee().only(
+        'id', 'title', 'description', 'status', 'due_date', 'created_at', 'assigned_to__id', 'assigned_to__username',
+    )
+    return cached((TASKS, USERS), f'recent-tasks:{user.role}:{user.pk}:{limit}',
+                  lambda: list(tasks.order_by('-created_at')[:limit]))
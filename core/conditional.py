@@ -0,0 +1,52 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def _etag(*parts):
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def task_list_validators(request, tasks, tombstones):
+    """Strong ETag and Last-Modified for a task listing.
+
+    The ETag covers the query string, the row count and the newest
+    updated_at/deleted_at, so any insert, update, delete or reassignment
+    changes it.
+    """
+    summary = tasks.order_by().aggregate(count=Count('id'), last_updated=Max('updated_at'))
+    last_deleted = tombstones.order_by().aggregate(last_deleted=Max('deleted_at'))['last_deleted']
+    return _list_validators(request, summary, last_deleted)
+
+
+async def atask_list_validators(request, tasks, tombstones):
+    summary = await tasks.order_by().aaggregate(count=Count('id'), last_updated=Max('updated_at'))
+    last_deleted = (await tombstones.order_by().aaggregate(last_deleted=Max('deleted_at')))['last_deleted']
+    return _list_validators(request, summary, last_deleted)
+
+
+def _list_validators(request, summary, last_deleted):
+    stamps = [stamp for stamp in (summary['last_updated'], last_deleted) if stamp]
+    last_modified = max(stamps) if stamps else None
+    etag = _etag(request.get_full_path(), summary['count'], summary['last_updated'], last_deleted)
+    return etag, last_modified
+
+
+def task_validators(request, task):
+    return _etag(request.get_full_path(), task.pk, task.updated_at), task.updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when the client's validators still match, else None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -11,3 +11,16 @@ STATUS_CHOICES = [
         ('in_progress', 'In Progress'),
         ('completed', 'Completed'),
     ]
+
+STATS_SCOPE_CHOICES = [
+        ('user', 'User'),
+        ('admin', 'Admin'),
+        ('global', 'Global'),
+    ]
+
+JOB_STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
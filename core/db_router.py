@@ -0,0 +1,155 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+
+PIN_COOKIE = 'db_primary_pin'
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+def _pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def _resolved_user(request):
+    """request.user if it is already loaded, without triggering the lookup."""
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class _ReplicaState:
+    """Routing for one request; ``replica`` is set once a replica-enabled view is chosen."""
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = None
+        self.alias = None
+
+    def read_alias(self):
+        if self.alias is not None:
+            return self.alias
+        if PIN_COOKIE in self.request.COOKIES:
+            self.alias = DEFAULT_DB_ALIAS
+            return self.alias
+        user = _resolved_user(self.request)
+        if user is None:
+            # Still authenticating; those reads go to the primary and the
+            # choice is made on the first read after.
+            return DEFAULT_DB_ALIAS
+        pinned = user.is_authenticated and cache.get(_pin_key(user.pk))
+        self.alias = DEFAULT_DB_ALIAS if pinned else self.replica
+        return self.alias
+
+
+class ReplicaRouter:
+    """Route reads of replica-enabled views to a read replica.
+
+    Only views marked ``read_from_replica`` (see utils.read_replica) are
+    routed; every other read and every write goes to ``default``. A client
+    that has just written is pinned to ``default`` for REPLICA_PIN_SECONDS
+    (by cookie, and by user id for token clients) so it reads its own
+    writes, e.g. task_list right after update_task_status.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state.replica is None:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return db == DEFAULT_DB_ALIAS
+
+
+def _wants_replica(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'read_from_replica', False) or getattr(view_class, 'read_from_replica', False)
+
+
+class ReplicaRoutingMiddleware:
+    """Sets up the request's routing state for ReplicaRouter and pins writers.
+
+    The state is set and reset around the rest of the stack, in the
+    coroutine itself when running under ASGI. process_view only marks the
+    existing state, so it still applies when Django runs process_view on a
+    worker thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replicas = replica_aliases()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_state.set(_ReplicaState(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if self.needs_pin(request, response):
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = _request_state.set(_ReplicaState(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if self.needs_pin(request, response):
+            await self.apin(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _request_state.get()
+        if state is not None and self.replicas and _wants_replica(view_func):
+            state.replica = random.choice(self.replicas)
+
+    def needs_pin(self, request, response):
+        return self.replicas and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400
+
+    def pin(self, request, response):
+        user = self._pin_cookie(request, response)
+        if user is not None:
+            cache.set(_pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+    async def apin(self, request, response):
+        user = self._pin_cookie(request, response)
+        if user is not None:
+            await cache.aset(_pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+    def _pin_cookie(self, request, response):
+        """Set the pin cookie; the user to pin by id as well, if known."""
+        response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        user = _resolved_user(request)
+        return user if user is not None and user.is_authenticated else None
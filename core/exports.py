@@ -0,0 +1,122 @@
+import csv
+import json
+import zlib
+
+from django.utils import timezone
+
+
+EXPORT_FIELDS = (
+    'id',
+    'title',
+    'assigned_to__username',
+    'due_date',
+    'completed_at',
+    'worked_hours',
+    'completion_report',
+)
+
+EXPORT_HEADERS = (
+    'id',
+    'title',
+    'assigned_to',
+    'due_date',
+    'completed_at',
+    'worked_hours',
+    'completion_report',
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that hands back whatever is written to it, so
+    csv.writer can be used to format single rows for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def export_rows(tasks, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield plain tuples for every task without building model instances."""
+    return tasks.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in rows:
+        yield writer.writerow([_format_value(value) for value in row])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_HEADERS, (_format_value(value) for value in row)))
+        yield json.dumps(record) + '\n'
+
+
+def gzip_stream(lines, min_chunk=64 * 1024):
+    """Compress a stream of text lines into gzip chunks of roughly min_chunk bytes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= min_chunk:
+            chunk = compressor.compress(b''.join(buffer))
+            buffer = []
+            size = 0
+            if chunk:
+                yield chunk
+    if buffer:
+        chunk = compressor.compress(b''.join(buffer))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def export_filename(name, export_format, compress=False):
+    filename = f"{name}-{timezone.now():%Y%m%d}.{export_format}"
+    return filename + '.gz' if compress else filename
+
+
+def export_content_type(export_format, compress=False):
+    return 'application/gzip' if compress else EXPORT_FORMATS[export_format]
+
+
+def write_tasks_export(tasks, export_format, path, compress=False):
+    """Write every task in the queryset to ``path``; returns the row count.
+
+    export_format is one of EXPORT_FORMATS; with compress=True the file is
+    gzip-compressed. Rows are streamed from the database in chunks, so
+    memory stays flat however large the export is.
+    """
+    written = 0
+
+    def counted(rows):
+        nonlocal written
+        for row in rows:
+            written += 1
+            yield row
+
+    rows = counted(export_rows(tasks.order_by('-due_date', '-id')))
+    lines = jsonl_lines(rows) if export_format == 'jsonl' else csv_lines(rows)
+    chunks = gzip_stream(lines) if compress else (line.encode('utf-8') for line in lines)
+    with open(path, 'wb') as output:
+        for chunk in chunks:
+            output.write(chunk)
+    return written
@@ -0,0 +1,138 @@
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .constants import STATUS_CHOICES
+
+
+def start_of_day(day):
+    """Aware datetime for midnight at the start of ``day`` in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_range(first_day, last_day=None):
+    """Half-open ``[start, end)`` covering first_day..last_day inclusive.
+
+    Filtering ``due_date__gte=start, due_date__lt=end`` compares the column
+    itself, so an index on due_date can serve it; ``due_date__date`` wraps
+    the column in a cast and forces a scan. ``end`` is None when last_day is
+    the last representable day, as the day after it would overflow.
+    """
+    last_day = last_day or first_day
+    if last_day == date.max:
+        return start_of_day(first_day), None
+    return start_of_day(first_day), start_of_day(last_day + timedelta(days=1))
+
+
+def _parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class TaskFilterSet:
+    """Task query-string filters shared by task_list, reports and the API.
+
+    ``errors`` collects a message per invalid parameter. The HTML views
+    ignore them (an invalid filter is simply not applied) while the API
+    answers 400 with the first one.
+    """
+
+    fields = ('status', 'assigned_to', 'user', 'due_date', 'date_from', 'date_to', 'updated_since')
+
+    def __init__(self, params):
+        self.params = params
+        self.errors = []
+
+    def filter(self, tasks):
+        for name in self.fields:
+            value = self.params.get(name)
+            if value:
+                tasks = getattr(self, f'filter_{name}')(tasks, value)
+        return tasks
+
+    def filter_status(self, tasks, value):
+        if value not in dict(STATUS_CHOICES):
+            self.errors.append(f"Unknown status '{value}'.")
+        return tasks.filter(status=value)
+
+    def filter_assigned_to(self, tasks, value):
+        try:
+            return tasks.filter(assigned_to_id=int(value))
+        except ValueError:
+            self.errors.append("assigned_to must be a user id.")
+            return tasks
+
+    # reports calls the assignee filter "user"
+    filter_user = filter_assigned_to
+
+    def filter_due_date(self, tasks, value):
+        try:
+            start, end = day_range(_parse_day(value))
+        except ValueError:
+            self.errors.append("due_date must be YYYY-MM-DD.")
+            return tasks
+        tasks = tasks.filter(due_date__gte=start)
+        return tasks if end is None else tasks.filter(due_date__lt=end)
+
+    def filter_date_from(self, tasks, value):
+        try:
+            return tasks.filter(due_date__gte=start_of_day(_parse_day(value)))
+        except ValueError:
+            self.errors.append("date_from must be YYYY-MM-DD.")
+            return tasks
+
+    def filter_date_to(self, tasks, value):
+        try:
+            end = day_range(_parse_day(value))[1]
+        except ValueError:
+            self.errors.append("date_to must be YYYY-MM-DD.")
+            return tasks
+        return tasks if end is None else tasks.filter(due_date__lt=end)
+
+    def filter_updated_since(self, tasks, value):
+        try:
+            updated_since = parse_datetime(value)
+        except ValueError:
+            updated_since = None
+        if updated_since is None:
+            self.errors.append("updated_since must be an ISO 8601 datetime.")
+            return tasks
+        if timezone.is_naive(updated_since):
+            updated_since = timezone.make_aware(updated_since)
+        return tasks.filter(updated_at__gte=updated_since)
+
+
+class RollupFilterSet(TaskFilterSet):
+    """The assignee and day filters of TaskFilterSet, applied to TaskDailyRollup rows."""
+
+    fields = ('status', 'assigned_to', 'user', 'due_date', 'date_from', 'date_to')
+
+    @classmethod
+    def covers(cls, params):
+        """Whether every filter in ``params`` applies to rollups; updated_since,
+        for one, needs the task rows."""
+        return not any(params.get(name) for name in TaskFilterSet.fields if name not in cls.fields)
+
+    def filter_status(self, rollups, value):
+        if value not in dict(STATUS_CHOICES):
+            self.errors.append(f"Unknown status '{value}'.")
+        # Rollups only count completed tasks.
+        return rollups if value == 'completed' else rollups.none()
+
+    def _day(self, value, name):
+        try:
+            return _parse_day(value)
+        except ValueError:
+            self.errors.append(f"{name} must be YYYY-MM-DD.")
+
+    def filter_due_date(self, rollups, value):
+        day = self._day(value, 'due_date')
+        return rollups if day is None else rollups.filter(day=day)
+
+    def filter_date_from(self, rollups, value):
+        day = self._day(value, 'date_from')
+        return rollups if day is None else rollups.filter(day__gte=day)
+
+    def filter_date_to(self, rollups, value):
+        day = self._day(value, 'date_to')
+        return rollups if day is None else rollups.filter(day__lte=day)
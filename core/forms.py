@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import User, Task
+from .cache import assignable_user_choices
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 
 
@@ -74,9 +75,6 @@ class TaskForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         if self.user:
-            if self.user.is_superadmin:
-                self.fields['assigned_to'].queryset = User.objects.filter(role='user',is_superuser=False)
-            elif self.user.is_admin:
-                self.fields['assigned_to'].queryset = User.objects.filter(assigned_admin=self.user, role='user')
-            else:
-                self.fields['assigned_to'].queryset = User.objects.none()
\ No newline at end of file
+            self.fields['assigned_to'].queryset = User.objects.assignable_by(self.user)
+            # Render the options from the cache; the queryset still validates submissions.
+            self.fields['assigned_to'].choices = [('', self.fields['assigned_to'].empty_label)] + assignable_user_choices(self.user)
\ No newline at end of file
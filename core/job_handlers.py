@@ -0,0 +1,128 @@
+import os
+import time
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .api_views import bulk_create_tasks
+from .exports import export_content_type, export_filename, write_tasks_export
+from .jobs import PermanentJobError, enqueue, job
+from .models import User, TaskTombstone, Job
+from .reports import completed_tasks
+from .rollups import rollup_tasks
+from .stats import rebuild_task_stats
+
+
+def job_file_path(name):
+    return os.path.join(settings.JOB_FILES_DIR, name)
+
+
+def purge_job_files(max_age=None):
+    """Delete job output files older than ``max_age`` seconds
+    (JOB_FILES_RETENTION by default); returns how many were removed."""
+    max_age = settings.JOB_FILES_RETENTION if max_age is None else max_age
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = os.scandir(settings.JOB_FILES_DIR)
+    except FileNotFoundError:
+        return 0
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Another worker's purge got there first.
+                pass
+    return removed
+
+
+def purge_task_tombstones(max_age=None):
+    """Delete task tombstones older than ``max_age`` seconds
+    (TASK_TOMBSTONE_RETENTION by default); returns how many were removed."""
+    max_age = settings.TASK_TOMBSTONE_RETENTION if max_age is None else max_age
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    removed, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return removed
+
+
+@job('export_report')
+def export_report(job):
+    """Write the completed-task export requested from the reports page."""
+    if job.created_by is None:
+        # The requester was deleted after queueing; there is nobody to scope
+        # the report to or to download it.
+        raise PermanentJobError('The user who requested this export no longer exists.')
+    export_format, compress = job.payload['format'], job.payload.get('compress', False)
+    tasks = completed_tasks(job.created_by, job.payload.get('params', {}))
+    name = f'job-{job.pk}.{export_format}' + ('.gz' if compress else '')
+    os.makedirs(settings.JOB_FILES_DIR, exist_ok=True)
+    # Each attempt writes its own file and renames it into place, so a
+    # reclaimed attempt still running elsewhere cannot interleave with it.
+    partial = job_file_path(f'{name}.{job.attempts}.part')
+    try:
+        rows = write_tasks_export(tasks, export_format, partial, compress=compress)
+        os.replace(partial, job_file_path(name))
+    except BaseException:
+        try:
+            os.remove(partial)
+        except FileNotFoundError:
+            pass
+        raise
+    return {
+        'file': name,
+        'filename': export_filename('completed-tasks', export_format, compress),
+        'content_type': export_content_type(export_format, compress),
+        'rows': rows,
+    }
+
+
+@job('bulk_create_tasks')
+def bulk_create(job):
+    if job.created_by is None:
+        raise PermanentJobError('The user who requested these tasks no longer exists.')
+    data, status_code = bulk_create_tasks(job.created_by, job.payload['tasks'])
+    return {'status': status_code, **data}
+
+
+@job('delete_user')
+def delete_user(job):
+    # Cascades through every task the user created or was assigned.
+    user = User.objects.filter(pk=job.payload['user_id']).first()
+    if user is None:
+        return {'deleted': False}
+    user.delete()
+    return {'deleted': True, 'username': user.username}
+
+
+@job('rebuild_task_stats', max_attempts=1)
+def rebuild_stats(job):
+    return {'rows': rebuild_task_stats()}
+
+
+@job('purge_job_files', max_attempts=1)
+def purge_files(job):
+    return {'removed': purge_job_files(job.payload.get('max_age'))}
+
+
+@job('purge_task_tombstones', max_attempts=1)
+def purge_tombstones(job):
+    return {'removed': purge_task_tombstones(job.payload.get('max_age'))}
+
+
+@job('rollup_tasks', max_attempts=1)
+def rollup(job):
+    assignees, rows = rollup_tasks(full=job.payload.get('full', False))
+    return {'assignees': assignees, 'rows': rows}
+
+
+def schedule_rollup():
+    """Queue an incremental rollup_tasks run unless one is already waiting
+    or running; returns the new Job or None."""
+    if Job.objects.filter(name='rollup_tasks', status__in=('queued', 'running')).exists():
+        return None
+    return enqueue('rollup_tasks')
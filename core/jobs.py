@@ -0,0 +1,168 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+JOBS = {}
+
+CLAIM_CANDIDATES = 10
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler to fail its job at once; retrying cannot help."""
+
+
+def job(name, max_attempts=3):
+    """Register a function as the handler for jobs called ``name``.
+
+    The handler gets the Job and returns a JSON-serialisable result. Raising
+    fails the attempt; it is retried until ``max_attempts`` is used up.
+    """
+    def register(func):
+        func.max_attempts = max_attempts
+        JOBS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, user=None):
+    """Queue a registered job; ``user`` (a User or token user) owns it."""
+    if name not in JOBS:
+        raise ValueError(f"Unknown job '{name}'.")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by_id=user.pk if user else None,
+        max_attempts=JOBS[name].max_attempts,
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _claimable(now):
+    expired = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    return Q(status='queued', run_after__lte=now) | Q(status='running', locked_at__lt=expired)
+
+
+def claim_job(worker):
+    """Take the oldest runnable job, or None.
+
+    Claiming is a conditional UPDATE, so two workers racing for the same row
+    cannot both get it; this works the same on SQLite and PostgreSQL.
+    """
+    now = timezone.now()
+    claimable = _claimable(now)
+    candidates = Job.objects.filter(claimable).order_by('run_after', 'id').values_list('id', flat=True)
+    for job_id in candidates[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(claimable, pk=job_id).update(
+            status='running', locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _finish(job, **fields):
+    # A worker whose lease expired must not overwrite the new owner's run.
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**fields)
+    for field, value in fields.items():
+        setattr(job, field, value)
+
+
+def renew_lease(job):
+    """Push a running job's lease forward; False once another worker owns it."""
+    return bool(Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(locked_at=timezone.now()))
+
+
+@contextmanager
+def _lease_heartbeat(job):
+    """Renew the job's lease while its handler runs, so a job longer than
+    JOB_LEASE_SECONDS is not reclaimed by another worker halfway through.
+    A worker that dies stops renewing and its job is reclaimed as before."""
+    done = threading.Event()
+
+    def renew():
+        try:
+            while not done.wait(settings.JOB_LEASE_SECONDS / 3):
+                if not renew_lease(job):
+                    break
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=renew, name=f'job-{job.pk}-lease', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome; returns True on success."""
+    handler = JOBS.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{job.name}'.")
+        if job.attempts > job.max_attempts:
+            raise RuntimeError('Job was abandoned by its worker too many times.')
+        with _lease_heartbeat(job):
+            result = handler(job)
+    except PermanentJobError as exc:
+        logger.warning('Job %s (%s) failed: %s', job.pk, job.name, exc)
+        _finish(job, status='failed', error=str(exc), finished_at=timezone.now())
+        return False
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.name, job.attempts)
+        now = timezone.now()
+        if handler is not None and job.attempts < job.max_attempts:
+            delay = timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+            _finish(job, status='queued', run_after=now + delay, error=traceback.format_exc(), locked_by='', locked_at=None)
+        else:
+            _finish(job, status='failed', error=traceback.format_exc(), finished_at=now)
+        return False
+    _finish(job, status='succeeded', result=result, error='', finished_at=timezone.now())
+    return True
+
+
+def work(worker=None, burst=False, poll=None, stop=None):
+    """Claim and run jobs until ``stop`` is set, or the queue is empty when ``burst``.
+
+    Returns the number of jobs run.
+    """
+    worker = worker or worker_name()
+    poll = settings.JOB_POLL_SECONDS if poll is None else poll
+    processed = 0
+    while stop is None or not stop.is_set():
+        if not burst:
+            # Long-lived workers honour CONN_MAX_AGE and drop broken
+            # connections between jobs, as Django does between requests.
+            close_old_connections()
+        job = claim_job(worker)
+        if job is None:
+            if burst:
+                break
+            if stop is None:
+                time.sleep(poll)
+            else:
+                stop.wait(poll)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,117 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import user_login_failed
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+
+from .models import User
+
+
+_hash_executor = None
+
+
+def _username_key(username, ip):
+    # Per client as well as per username: counting a username on its own
+    # would let anyone lock its owner out by failing on purpose.
+    return f'login:fail:user:{ip or ""}:{username.lower()}'
+
+
+def _throttle_keys(username, ip):
+    keys = []
+    if username:
+        keys.append((_username_key(username, ip), settings.LOGIN_THROTTLE_USERNAME_LIMIT))
+    if ip:
+        keys.append((f'login:fail:ip:{ip}', settings.LOGIN_THROTTLE_IP_LIMIT))
+    return keys
+
+
+def login_throttled(username, ip):
+    """True when the username from this client IP, or the client IP across
+    all usernames, has used up its failed attempts.
+
+    Checked before authenticate() so a brute-force burst is refused without
+    spending a password hash per attempt.
+    """
+    counts = cache.get_many([key for key, _ in _throttle_keys(username, ip)])
+    return any(counts.get(key, 0) >= limit for key, limit in _throttle_keys(username, ip))
+
+
+async def alogin_throttled(username, ip):
+    counts = await cache.aget_many([key for key, _ in _throttle_keys(username, ip)])
+    return any(counts.get(key, 0) >= limit for key, limit in _throttle_keys(username, ip))
+
+
+def record_login_failure(username, ip):
+    for key, _ in _throttle_keys(username, ip):
+        # add() starts the window; incr() leaves its expiry alone.
+        if not cache.add(key, 1, settings.LOGIN_THROTTLE_WINDOW):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, settings.LOGIN_THROTTLE_WINDOW)
+
+
+async def arecord_login_failure(username, ip):
+    for key, _ in _throttle_keys(username, ip):
+        if not await cache.aadd(key, 1, settings.LOGIN_THROTTLE_WINDOW):
+            try:
+                await cache.aincr(key)
+            except ValueError:
+                await cache.aset(key, 1, settings.LOGIN_THROTTLE_WINDOW)
+
+
+def clear_login_failures(username, ip):
+    if username:
+        cache.delete(_username_key(username, ip))
+
+
+async def aclear_login_failures(username, ip):
+    if username:
+        await cache.adelete(_username_key(username, ip))
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR')
+
+
+def hash_executor():
+    """Bounded pool the async login path verifies passwords on."""
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+    return _hash_executor
+
+
+async def aauthenticate(username, password):
+    """Async counterpart of authenticate() for the ModelBackend.
+
+    Database work stays on the async ORM; only the password hashing, which is
+    pure CPU, runs on hash_executor(), so concurrent logins use several cores
+    instead of queueing behind Django's single sync thread. Like the
+    ModelBackend, a hash is still computed for unknown usernames and a
+    superseded hash is upgraded after a successful check.
+    """
+    loop = asyncio.get_running_loop()
+    executor = hash_executor()
+    try:
+        user = await User._default_manager.aget_by_natural_key(username)
+    except User.DoesNotExist:
+        await loop.run_in_executor(executor, make_password, password)
+        user = None
+    else:
+        updated = []
+        valid = await loop.run_in_executor(
+            executor, check_password, password, user.password,
+            lambda raw_password: updated.append(make_password(raw_password)),
+        )
+        if valid and updated:
+            user.password = updated[0]
+            await user.asave(update_fields=['password'])
+        if not (valid and user.is_active):
+            user = None
+
+    if user is None:
+        await user_login_failed.asend(sender=__name__, credentials={'username': username}, request=None)
+    return user
@@ -0,0 +1,172 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import User, Task
+
+
+SYNC_PATH = '/api/v1/task/list'
+ASYNC_PATH = '/api/v1/async/task/list'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the task list API at high concurrency through the WSGI handler, '
+        'the ASGI handler with the sync DRF view, and the ASGI handler with the async view. '
+        'Requests are driven in-process (thread pool for WSGI, event loop for ASGI) so the '
+        'numbers measure the Django stack rather than a socket layer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # The handlers query from other threads, so the seed data has to be
+        # committed; it is deleted again afterwards.
+        user = self.seed(options['tasks'])
+        try:
+            token = str(RefreshToken.for_user(user).access_token)
+            query = urlencode({'page_size': options['page_size']})
+            scenarios = [
+                ('wsgi, sync view', self.run_wsgi, SYNC_PATH),
+                ('asgi, sync view', self.run_asgi, SYNC_PATH),
+                ('asgi, async view', self.run_asgi, ASYNC_PATH),
+            ]
+            for label, run, path in scenarios:
+                run(path, query, token, 20, min(options['concurrency'], 20))
+                started = time.perf_counter()
+                timings, statuses = run(path, query, token, options['requests'], options['concurrency'])
+                elapsed = time.perf_counter() - started
+                self.report(label, timings, statuses, elapsed, options['concurrency'])
+        finally:
+            connections.close_all()
+            Task.objects.filter(assigned_to=user).delete()
+            user.delete()
+
+    def seed(self, count):
+        user = User.objects.create(username=f'bench-asgi-{int(time.time())}', role='user')
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Bench task {i}',
+                description='Benchmark description ' * 10,
+                assigned_to=user,
+                created_by=user,
+                status=('pending', 'in_progress', 'completed')[i % 3],
+                due_date=now + timedelta(hours=i),
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        return user
+
+    def run_wsgi(self, path, query, token, total, concurrency):
+        application = get_wsgi_application()
+
+        def request():
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {token}',
+                'wsgi.version': (1, 0),
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(b''),
+                'wsgi.errors': sys.stderr,
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            start = time.perf_counter()
+            result = application(environ, lambda code, headers, exc_info=None: status.append(code))
+            try:
+                b''.join(result)
+            finally:
+                result.close()
+            return time.perf_counter() - start, int(status[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: request(), range(total)))
+        return [timing for timing, _ in results], [code for _, code in results]
+
+    def run_asgi(self, path, query, token, total, concurrency):
+        application = get_asgi_application()
+
+        async def request(limit):
+            async with limit:
+                scope = {
+                    'type': 'http',
+                    'asgi': {'version': '3.0'},
+                    'http_version': '1.1',
+                    'method': 'GET',
+                    'scheme': 'http',
+                    'path': path,
+                    'raw_path': path.encode(),
+                    'query_string': query.encode(),
+                    'root_path': '',
+                    'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+                    'server': ('localhost', 80),
+                    'client': ('127.0.0.1', 0),
+                }
+                finished = asyncio.Event()
+                sent_body = False
+                status = []
+
+                async def receive():
+                    nonlocal sent_body
+                    if not sent_body:
+                        sent_body = True
+                        return {'type': 'http.request', 'body': b'', 'more_body': False}
+                    # Django listens for a disconnect while the view runs; only
+                    # report one once the response is out.
+                    await finished.wait()
+                    return {'type': 'http.disconnect'}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        status.append(message['status'])
+                    elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                        finished.set()
+
+                start = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - start, status[0]
+
+        async def main():
+            limit = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(request(limit) for _ in range(total)))
+
+        results = asyncio.run(main())
+        return [timing for timing, _ in results], [code for _, code in results]
+
+    def report(self, label, timings, statuses, elapsed, concurrency):
+        timings = sorted(timings)
+        self.stdout.write(json.dumps({
+            'scenario': label,
+            'requests': len(timings),
+            'concurrency': concurrency,
+            'errors': sum(1 for code in statuses if code != 200),
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 2),
+            'requests_per_sec': round(len(timings) / elapsed, 1),
+        }))
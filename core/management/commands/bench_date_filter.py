@@ -0,0 +1,76 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.filters import TaskFilterSet
+from core.models import User, Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare due_date__date lookups with the half-open range filters used by task_list and reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=365, help='Spread due dates over this many days.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['tasks'], options['days'])
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count, days):
+        user = User.objects.create(username='bench-date-user', role='user')
+        start = timezone.now() - timedelta(days=days // 2)
+        step = timedelta(days=days) / count
+        batch = []
+        for i in range(count):
+            batch.append(Task(
+                title=f'Bench task {i}', description='d', assigned_to=user, created_by=user,
+                status=('pending', 'in_progress', 'completed')[i % 3], due_date=start + step * i,
+            ))
+            if len(batch) == 10000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+        self.stdout.write(f'seeded {count} tasks')
+
+    def run(self, options):
+        day = timezone.localdate()
+        week_ago = day - timedelta(days=6)
+        scenarios = [
+            ('task_list day', {'due_date': day.isoformat()},
+             lambda tasks: tasks.filter(due_date__date=day)),
+            ('reports week', {'date_from': week_ago.isoformat(), 'date_to': day.isoformat()},
+             lambda tasks: tasks.filter(status='completed', due_date__date__gte=week_ago, due_date__date__lte=day)),
+        ]
+        for label, params, old_filter in scenarios:
+            base = Task.objects.filter(status='completed') if label.startswith('reports') else Task.objects.all()
+            new = TaskFilterSet(params).filter(base)
+            old = old_filter(Task.objects.all())
+            for variant, queryset in (('__date', old), ('range', new)):
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    count = queryset.count()
+                    list(queryset.order_by('-due_date', '-id')[:10])
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(json.dumps({
+                    'scenario': label,
+                    'filter': variant,
+                    'rows': count,
+                    'median_ms': round(statistics.median(timings) * 1000, 2),
+                }))
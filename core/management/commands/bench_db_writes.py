@@ -0,0 +1,129 @@
+import copy
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.api_views import TaskBulkStatusView
+from core.models import User, Task
+
+
+STATUSES = ('pending', 'in_progress', 'completed')
+
+BASELINE_OPTIONS = {
+    # What the settings used before the profile: rollback journal, full
+    # fsync, deferred transactions, Django's 5s default timeout.
+    'sqlite': {'init_command': 'PRAGMA journal_mode=DELETE; PRAGMA synchronous=FULL;'},
+    'postgresql': {},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrent task status-update throughput against the default database, '
+        'with the configured profile and with a baseline (new connection per request, '
+        'untuned SQLite). Seeds its own tasks, commits them and deletes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=100, help='Requests per thread.')
+        parser.add_argument('--tasks', type=int, default=200)
+        parser.add_argument('--bulk-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        vendor = connections['default'].vendor
+        configured = copy.deepcopy(settings.DATABASES['default'])
+        baseline = dict(configured, CONN_MAX_AGE=0, OPTIONS=BASELINE_OPTIONS.get(vendor, {}))
+        profiles = [('baseline', baseline), ('configured', configured)]
+
+        user, admin = self.seed(options['tasks'])
+        task_ids = list(Task.objects.filter(assigned_to=user).values_list('id', flat=True))
+        try:
+            for profile, settings_dict in profiles:
+                self.use_profile(settings_dict)
+                for path, run in (('update_task_status', self.single_update), ('bulk-status', self.bulk_update)):
+                    self.report(vendor, profile, path, options, lambda: run(user, admin, task_ids, options))
+        finally:
+            self.use_profile(configured)
+            Task.objects.filter(assigned_to=user).delete()
+            user.delete()
+            admin.delete()
+
+    def seed(self, count):
+        stamp = int(time.time())
+        admin = User.objects.create(username=f'bench-db-admin-{stamp}', role='admin')
+        user = User.objects.create(username=f'bench-db-user-{stamp}', role='user', assigned_admin=admin)
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(title=f'Bench task {i}', description='Benchmark', assigned_to=user, created_by=admin,
+                 due_date=now + timedelta(days=1))
+            for i in range(count)
+        ])
+        return user, admin
+
+    def use_profile(self, settings_dict):
+        connections.close_all()
+        connections.settings['default'].update(copy.deepcopy(settings_dict))
+
+    def single_update(self, user, admin, task_ids, options):
+        """Same ORM work as views.update_task_status: load, change, save()."""
+        task = Task.objects.get(id=random.choice(task_ids))
+        task.status = random.choice(STATUSES)
+        if task.status == 'completed':
+            task.worked_hours = 1
+            task.completion_report = 'Done'
+        task.save()
+
+    def bulk_update(self, user, admin, task_ids, options):
+        updates = [
+            {'id': task_id, 'status': 'completed', 'worked_hours': '1.00', 'completion_report': 'Done'}
+            if status == 'completed' else {'id': task_id, 'status': status}
+            for task_id, status in zip(random.sample(task_ids, options['bulk_size']), random.choices(STATUSES, k=options['bulk_size']))
+        ]
+        request = APIRequestFactory().patch('/api/v1/task/bulk-status', {'updates': updates}, format='json')
+        force_authenticate(request, user=admin)
+        response = TaskBulkStatusView.as_view()(request)
+        if response.status_code != 200:
+            raise AssertionError(response.data)
+
+    def report(self, vendor, profile, path, options, request):
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            done = 0
+            for _ in range(options['requests']):
+                try:
+                    request()
+                    done += 1
+                except OperationalError as exc:
+                    with lock:
+                        errors.append(str(exc))
+                # End of "request": closes the connection unless it is persistent.
+                close_old_connections()
+            connections.close_all()
+            return done
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            done = sum(pool.map(lambda _: worker(), range(options['threads'])))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(json.dumps({
+            'database': vendor,
+            'profile': profile,
+            'path': path,
+            'threads': options['threads'],
+            'requests': done,
+            'errors': len(errors),
+            'first_error': errors[0] if errors else None,
+            'requests_per_sec': round(done / elapsed, 1),
+        }))
@@ -0,0 +1,99 @@
+import os
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.exports import csv_lines, export_rows, gzip_stream, jsonl_lines
+from core.models import User, Task
+
+
+# Chunks between RSS samples; reading /proc on every line would dominate.
+RSS_SAMPLE_EVERY = 1000
+
+
+class Rollback(Exception):
+    pass
+
+
+def rss_kib():
+    """Current resident set size of this process, or None off Linux."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the streaming report export and show that peak memory stays flat as rows grow.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>10} {'seconds':>9} {'rows/s':>10} {'bytes':>12} {'py peak KiB':>12} {'RSS grow KiB':>12}")
+        for rows in options['rows']:
+            try:
+                with transaction.atomic():
+                    self.seed(rows)
+                    result = self.run_export(options['format'], options['gzip'])
+                    raise Rollback
+            except Rollback:
+                pass
+            elapsed, size, peak, rss_growth = result
+            rss_growth = '-' if rss_growth is None else rss_growth
+            self.stdout.write(
+                f"{rows:>10} {elapsed:>9.3f} {rows / elapsed:>10.0f} {size:>12} {peak // 1024:>12} {rss_growth:>12}"
+            )
+
+    def seed(self, rows):
+        user = User.objects.create(username='bench-export-user', role='user')
+        now = timezone.now()
+        batch = []
+        for i in range(rows):
+            batch.append(Task(
+                title=f'Bench task {i}',
+                description='Benchmark task',
+                assigned_to=user,
+                created_by=user,
+                status='completed',
+                due_date=now - timedelta(minutes=i),
+                completed_at=now,
+                worked_hours=1,
+                completion_report='Done ' * 20,
+            ))
+            if len(batch) == 5000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+
+    def run_export(self, export_format, compress):
+        tasks = Task.objects.filter(status='completed', assigned_to__username='bench-export-user')
+        rows = export_rows(tasks.order_by('-due_date', '-id'))
+        lines = jsonl_lines(rows) if export_format == 'jsonl' else csv_lines(rows)
+        if compress:
+            lines = gzip_stream(lines)
+
+        # ru_maxrss is the process-wide high-water mark and never comes down,
+        # so it cannot tell one export size from the next; sample the current
+        # RSS during this export and report how far it rose above the start.
+        rss_start = rss_max = rss_kib()
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = 0
+        for count, chunk in enumerate(lines, 1):
+            size += len(chunk)
+            if rss_start is not None and count % RSS_SAMPLE_EVERY == 0:
+                rss_max = max(rss_max, rss_kib())
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rss_growth = None if rss_start is None else max(rss_max, rss_kib()) - rss_start
+        return elapsed, size, peak, rss_growth
@@ -0,0 +1,54 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = 'Measure password verifications (logins) per second per core for each configured hasher.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0, help='Time spent on each hasher.')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Verify on this many threads to see how the hasher scales across cores.')
+
+    def handle(self, *args, **options):
+        for name, path in settings.PASSWORD_HASHER_CHOICES.items():
+            try:
+                hasher = import_string(path)()
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as exc:
+                # e.g. argon2-cffi not installed
+                self.stdout.write(json.dumps({'hasher': name, 'skipped': str(exc)}))
+                continue
+            verified, elapsed = self.run(encoded, options['seconds'], options['threads'])
+            self.stdout.write(json.dumps({
+                'hasher': name,
+                'preferred': get_hasher().algorithm == hasher.algorithm,
+                'threads': options['threads'],
+                'ms_per_login': round(elapsed * options['threads'] / verified * 1000, 2),
+                'logins_per_sec': round(verified / elapsed, 1),
+                'logins_per_sec_per_core': round(verified / elapsed / options['threads'], 1),
+            }))
+
+    def run(self, encoded, seconds, threads):
+        def worker():
+            count = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                if not check_password(PASSWORD, encoded):
+                    raise AssertionError('password did not verify')
+                count += 1
+            return count
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            verified = sum(pool.map(lambda _: worker(), range(threads)))
+        return verified, time.perf_counter() - start
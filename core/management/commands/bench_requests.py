@@ -0,0 +1,73 @@
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.bench import identities, load_mix, report, run_in_process, run_over_server, schedule
+
+
+RUNNERS = {
+    'inprocess': run_in_process,
+    'server': run_over_server,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a weighted mix of HTML and /api/v1 requests (core.bench.DEFAULT_MIX or --mix) '
+        'against the data set from seed_bench, in-process through the WSGI handler and/or over '
+        'a local HTTP server, and print throughput, p50/p95/p99, queries per request and peak '
+        'memory as JSON lines. Same --seed, same request sequence.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--mode', choices=[*RUNNERS, 'both'], default='both')
+        parser.add_argument('--mix', help='JSONL file of requests; see core/bench.py for the format.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='bench-password')
+        parser.add_argument('--output', help='Also write the results, with the git commit, to this JSON file.')
+
+    def handle(self, *args, **options):
+        found = identities(options['prefix'], options['password'])
+        if not found:
+            raise CommandError('No active users to benchmark with; run seed_bench first.')
+        mix = load_mix(options['mix'])
+        requests = schedule(mix, found, options['requests'], options['seed'])
+        if not requests:
+            raise CommandError('No request in the mix has a matching user role.')
+        warmup = schedule(mix, found, options['warmup'], options['seed'] + 1)
+        # The requests run on other threads with their own connections.
+        connections.close_all()
+
+        modes = list(RUNNERS) if options['mode'] == 'both' else [options['mode']]
+        rows = []
+        for mode in modes:
+            run = RUNNERS[mode]
+            if warmup:
+                run(warmup, options['concurrency'])
+            results, elapsed = run(requests, options['concurrency'])
+            for row in report(mode, results, elapsed):
+                row['concurrency'] = options['concurrency']
+                self.stdout.write(json.dumps(row))
+                rows.append(row)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'commit': _git_commit(),
+                    'seed': options['seed'],
+                    'mix': options['mix'] or 'default',
+                    'results': rows,
+                }, output, indent=2)
@@ -0,0 +1,60 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import User, Task
+from core.search import search_tasks
+
+
+# Common, uncommon and rare words, a prefix and an AND of two words from the
+# seed_bench vocabulary.
+DEFAULT_QUERIES = ('review', 'ergonomics', 'gangansa', 'calib', 'server budget')
+
+
+class Command(BaseCommand):
+    help = (
+        'Time task search on the seed_bench data set (e.g. seed_bench --tasks 1000000): '
+        'the full-text index against a scanning icontains over title, description and '
+        'completion report, for a superadmin and an admin, as the count plus the first '
+        'ranked page the search API returns.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--prefix', default='bench')
+
+    def handle(self, *args, **options):
+        viewers = [
+            User.objects.filter(role=role, username__startswith=f"{options['prefix']}-").first()
+            for role in ('superadmin', 'admin')
+        ]
+        if None in viewers:
+            raise CommandError('No bench users found; run seed_bench first.')
+        total = Task.objects.count()
+
+        for query in options['queries']:
+            for viewer in viewers:
+                tasks = Task.objects.visible_to(viewer)
+                for label, vendor in (('index', connection.vendor), ('icontains scan', None)):
+                    timings, count = [], 0
+                    for _ in range(options['iterations']):
+                        start = time.perf_counter()
+                        matches = search_tasks(tasks, query, vendor)
+                        count = matches.count()
+                        list(matches.order_by('search_rank', '-created_at', '-id')
+                             .values('id', 'title')[:options['page_size']])
+                        timings.append(time.perf_counter() - start)
+                    self.stdout.write(json.dumps({
+                        'query': query,
+                        'viewer': viewer.role,
+                        'search': label,
+                        'tasks': total,
+                        'matches': count,
+                        'p50_ms': round(statistics.median(timings) * 1000, 2),
+                        'max_ms': round(max(timings) * 1000, 2),
+                    }))
@@ -0,0 +1,69 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import User, Task
+from core.serializers import TaskSerializer, TaskReadPlan
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of TaskSerializer against the TaskReadPlan fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.seed(options['tasks'])
+                tasks = Task.objects.filter(assigned_to=user)
+                plan = TaskReadPlan.for_fields()
+                scenarios = [
+                    ('TaskSerializer', lambda: TaskSerializer(tasks.with_assignee(), many=True).data),
+                    ('TaskReadPlan', lambda: plan.serialize(plan.values(tasks))),
+                ]
+                for label, run in scenarios:
+                    best = min(self.time(run) for _ in range(options['repeat']))
+                    self.stdout.write(json.dumps({
+                        'serializer': label,
+                        'rows': options['tasks'],
+                        'seconds': round(best, 4),
+                        'rows_per_sec': round(options['tasks'] / best),
+                    }))
+                raise Rollback
+        except Rollback:
+            pass
+
+    def time(self, run):
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+
+    def seed(self, count):
+        user = User.objects.create(username='bench-serializer-user', role='user')
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Bench task {i}',
+                description='Benchmark description',
+                assigned_to=user,
+                created_by=user,
+                status='completed',
+                due_date=now + timedelta(hours=i),
+                started_at=now,
+                completed_at=now,
+                completion_report='Done',
+                worked_hours=1,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        return user
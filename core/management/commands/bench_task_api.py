@@ -0,0 +1,79 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.api_views import TaskListView
+from core.models import User, Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size and latency of the task list API with and without pagination/sparse fields.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--fields', default='id,title,status,due_date,updated_at')
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        scenarios = [
+            ('full list (legacy)', {}),
+            ('first page, all fields', {'page_size': options['page_size']}),
+            ('first page, sparse fields', {'page_size': options['page_size'], 'fields': options['fields']}),
+        ]
+        try:
+            with transaction.atomic():
+                user = self.seed(options['tasks'])
+                for label, params in scenarios:
+                    self.report(label, user, params, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count):
+        user = User.objects.create(username='bench-api-user', role='user')
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Bench task {i}',
+                description='Benchmark description ' * 20,
+                assigned_to=user,
+                created_by=user,
+                status='completed',
+                due_date=now + timedelta(hours=i),
+                completion_report='Done ' * 40,
+                worked_hours=1,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        return user
+
+    def report(self, label, user, params, repeat):
+        factory = APIRequestFactory()
+        view = TaskListView.as_view()
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            request = factory.get('/api/v1/task/list', params)
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append(time.perf_counter() - start)
+            size = len(response.content)
+        self.stdout.write(json.dumps({
+            'scenario': label,
+            'bytes': size,
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'max_ms': round(max(timings) * 1000, 2),
+        }))
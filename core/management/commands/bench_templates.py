@@ -0,0 +1,128 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.models import User, Task
+
+
+# task_list.html's pagination before the pagination_nav tag: the query
+# string is rebuilt inside every link and every page gets a link.
+LEGACY_PAGINATION = """
+<nav aria-label="Task pagination">
+    <ul class="pagination justify-content-center mb-0">
+        {% if tasks.has_previous %}
+        <li class="page-item">
+            <a class="page-link" href="?page={{ tasks.previous_page_number }}{% for key, value in request.GET.items %}{% if key != 'page' %}&{{ key }}={{ value }}{% endif %}{% endfor %}">Previous</a>
+        </li>
+        {% endif %}
+        {% for num in tasks.paginator.page_range %}
+        <li class="page-item {% if tasks.number == num %}active{% endif %}">
+            <a class="page-link" href="?page={{ num }}{% for key, value in request.GET.items %}{% if key != 'page' %}&{{ key }}={{ value }}{% endif %}{% endfor %}">{{ num }}</a>
+        </li>
+        {% endfor %}
+        {% if tasks.has_next %}
+        <li class="page-item">
+            <a class="page-link" href="?page={{ tasks.next_page_number }}{% for key, value in request.GET.items %}{% if key != 'page' %}&{{ key }}={{ value }}{% endif %}{% endfor %}">Next</a>
+        </li>
+        {% endif %}
+    </ul>
+</nav>
+"""
+
+PAGINATION = "{% load listing %}{% pagination_nav tasks 'Task pagination' %}"
+
+
+class _Rows:
+    """An unsaved-Task sequence of any length, so no database is needed."""
+
+    def __init__(self, count, assignee):
+        self.count = count
+        self.assignee = assignee
+        self.now = timezone.now()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        statuses = ('pending', 'in_progress', 'completed')
+        return [
+            Task(id=i + 1, title=f'Task {i}', status=statuses[i % 3], assigned_to=self.assignee,
+                 due_date=self.now + timedelta(hours=i), created_at=self.now, updated_at=self.now)
+            for i in range(*index.indices(self.count))
+        ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time template rendering for a task listing with --pages pages (10k by default): '
+        'the old per-link request.GET loop over the full page range against the '
+        'pagination_nav tag, and task_list.html with and without the cached template '
+        'loader and with cold and warm row fragments. No database access.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=10_000)
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=100)
+
+    def handle(self, *args, **options):
+        admin = User(id=1, username='bench-admin', role='admin')
+        paginator = Paginator(_Rows(options['pages'] * options['per_page'], admin), options['per_page'])
+        page = paginator.page(options['pages'] // 2)
+        request = RequestFactory().get('/tasks/', {'page': page.number, 'status': 'pending', 'q': 'weekly report'})
+        request.user = admin
+        context = {'tasks': page}
+
+        cached = self.backend(cached=True)
+        uncached = self.backend(cached=False)
+        fragments = caches['fragments']
+        scenarios = [
+            ('pagination, request.GET loop per link', cached.from_string(LEGACY_PAGINATION), None),
+            ('pagination, pagination_nav tag', cached.from_string(PAGINATION), None),
+            ('task_list.html, uncached loader, cold rows', None, (uncached, True)),
+            ('task_list.html, cached loader, cold rows', None, (cached, True)),
+            ('task_list.html, cached loader, warm rows', None, (cached, False)),
+        ]
+        for label, template, full_page in scenarios:
+            timings, size = [], 0
+            for _ in range(options['iterations']):
+                if full_page:
+                    backend, cold = full_page
+                    if cold:
+                        fragments.clear()
+                    start = time.perf_counter()
+                    html = backend.get_template('task_list.html').render(context, request)
+                else:
+                    start = time.perf_counter()
+                    html = template.render(context, request)
+                timings.append(time.perf_counter() - start)
+                size = len(html)
+            self.report(label, timings, size, options['pages'])
+
+    def backend(self, cached):
+        options = dict(settings.TEMPLATES[0]['OPTIONS'])
+        loaders = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+        options['loaders'] = [('django.template.loaders.cached.Loader', loaders)] if cached else loaders
+        return DjangoTemplates({
+            'NAME': f'bench-{cached}', 'DIRS': settings.TEMPLATES[0]['DIRS'], 'APP_DIRS': False, 'OPTIONS': options,
+        })
+
+    def report(self, label, timings, size, pages):
+        timings = sorted(timings)
+        self.stdout.write(json.dumps({
+            'scenario': label,
+            'pages': pages,
+            'renders': len(timings),
+            'p50_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+            'html_kb': round(size / 1024, 1),
+        }))
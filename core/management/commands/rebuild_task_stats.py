@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_task_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized TaskStats counters from the task table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = rebuild_task_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} task stats rows.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import rollup_tasks
+
+
+class Command(BaseCommand):
+    help = 'Update the TaskDailyRollup table with tasks changed since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every assignee, not just changed ones.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        assignees, rows = rollup_tasks(full=options['full'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {rows} rows for {assignees} assignees.'))
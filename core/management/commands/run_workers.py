@@ -0,0 +1,90 @@
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing.connection import wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.job_handlers import purge_job_files, purge_task_tombstones, schedule_rollup
+from core.jobs import work, worker_name
+
+
+def _stop_on_signals(stop):
+    # Event.set() takes the event's lock, which the interrupted code may hold
+    # (a worker is usually inside stop.wait()); setting it from the handler
+    # itself deadlocks, so hand it to a thread.
+    def handler(*args):
+        threading.Thread(target=stop.set, daemon=True).start()
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+
+
+def _run_worker(stop, burst, poll):
+    # Ctrl-C reaches the whole process group; finish the current job and
+    # let the parent decide when everyone is done.
+    _stop_on_signals(stop)
+    work(worker_name(), burst=burst, poll=poll, stop=stop)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background job workers (core.jobs) until interrupted. Meanwhile, job '
+        'output files older than JOB_FILES_RETENTION and task tombstones older than '
+        'TASK_TOMBSTONE_RETENTION are deleted every JOB_FILES_PURGE_INTERVAL seconds, '
+        'and a rollup_tasks job is queued every ROLLUP_INTERVAL seconds (not with --burst).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKERS)
+        parser.add_argument('--poll', type=float, default=settings.JOB_POLL_SECONDS,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        # Each worker opens its own connections; sharing the parent's across
+        # fork would interleave their traffic on one socket.
+        connections.close_all()
+        workers = [
+            context.Process(target=_run_worker, args=(stop, options['burst'], options['poll']), name=f'job-worker-{index}')
+            for index in range(max(options['processes'], 1))
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f'Started {len(workers)} job workers.')
+
+        _stop_on_signals(stop)
+        running = list(workers)
+        next_purge = next_rollup = time.monotonic()
+        while running:
+            if not stop.is_set():
+                now = time.monotonic()
+                if now >= next_purge:
+                    self.purge()
+                    next_purge = now + settings.JOB_FILES_PURGE_INTERVAL
+                if now >= next_rollup and not options['burst']:
+                    if schedule_rollup():
+                        self.stdout.write('Queued rollup_tasks.')
+                    next_rollup = now + settings.ROLLUP_INTERVAL
+                # Idle until the next check.
+                connections.close_all()
+            # Wakes when a worker exits, or when the next check is due.
+            due = next_purge if options['burst'] else min(next_purge, next_rollup)
+            timeout = None if stop.is_set() else max(due - time.monotonic(), 0)
+            wait([process.sentinel for process in running], timeout=timeout)
+            running = [process for process in running if process.is_alive()]
+        for process in workers:
+            process.join()
+        self.stdout.write(self.style.SUCCESS('Job workers stopped.'))
+
+    def purge(self):
+        removed = purge_job_files()
+        if removed:
+            self.stdout.write(f'Removed {removed} expired job files.')
+        removed = purge_task_tombstones()
+        if removed:
+            self.stdout.write(f'Removed {removed} expired task tombstones.')
@@ -0,0 +1,137 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.cache import TASKS, USERS, bump_version
+from core.models import User, Task
+from core.rollups import rollup_tasks
+from core.stats import rebuild_task_stats
+
+
+# Share of tasks per status; completed tasks dominate a long-lived tree.
+STATUS_WEIGHTS = (('pending', 3), ('in_progress', 2), ('completed', 5))
+
+# Text for titles, descriptions and reports: a few real words followed by
+# made-up ones, drawn with Zipf-like weights so search terms range from
+# matching most tasks to matching a handful.
+SYLLABLES = ('ba', 'ko', 'ri', 'tu', 'me', 'sa', 'lin', 'dor', 'vek', 'pa', 'zu', 'ne', 'tho', 'gan')
+WORDS = (
+    'update', 'review', 'client', 'report', 'deploy', 'invoice', 'meeting', 'design', 'server', 'budget',
+    'contract', 'release', 'migration', 'onboarding', 'audit', 'training', 'backup', 'payroll', 'vendor',
+    'roadmap', 'security', 'database', 'newsletter', 'warehouse', 'shipment', 'inventory', 'forecast',
+    'compliance', 'firmware', 'translation', 'podcast', 'workshop', 'sponsorship', 'calibration', 'ergonomics',
+) + tuple(first + second + third for first in SYLLABLES for second in SYLLABLES for third in ('', *SYLLABLES[:6]))
+WORD_CUM_WEIGHTS = list(accumulate(1 / (rank + 1) for rank in range(len(WORDS))))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible benchmark data set: superadmins, admins, users assigned '
+        'to admins and tasks across statuses, inserted with bulk_create in batches. '
+        'Every account gets the same password so bench_requests can log in. Point '
+        'DB_NAME at a scratch database first; 5M tasks take a while and a few GB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--superadmins', type=int, default=10)
+        parser.add_argument('--admins', type=int, default=500)
+        parser.add_argument('--users', type=int, default=50_000)
+        parser.add_argument('--tasks', type=int, default=5_000_000)
+        parser.add_argument('--days', type=int, default=365, help='Spread due dates over this many days around today.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='bench-password')
+        parser.add_argument('--reset', action='store_true', help='Delete a previous data set with the same prefix first.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=f'{prefix}-')
+        if existing.exists():
+            if not options['reset']:
+                raise CommandError(f"Users named '{prefix}-*' already exist; use --reset or another --prefix.")
+            self.stdout.write('Deleting the previous data set...')
+            existing.delete()
+
+        rng = random.Random(options['seed'])
+        password = make_password(options['password'])
+        started = time.perf_counter()
+
+        superadmins = self.create_users(prefix, 'superadmin', options['superadmins'], password, options)
+        admins = self.create_users(prefix, 'admin', options['admins'], password, options)
+        users = self.create_users(prefix, 'user', options['users'], password, options,
+                                  admin_ids=[admin.pk for admin in admins], rng=rng)
+        if not users:
+            raise CommandError('--users must be at least 1 to create tasks.')
+        self.stdout.write(f'{len(superadmins)} superadmins, {len(admins)} admins, {len(users)} users')
+
+        self.create_tasks(users, options, rng)
+        self.stdout.write('Rebuilding task stats and daily rollups...')
+        rebuild_task_stats()
+        rollup_tasks(full=True)
+        bump_version(USERS)
+        bump_version(TASKS)
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.1f}s.'))
+
+    def create_users(self, prefix, role, count, password, options, admin_ids=None, rng=None):
+        created = []
+        for start in range(0, count, options['batch_size']):
+            batch = [
+                User(
+                    username=f'{prefix}-{role}-{index}',
+                    email=f'{prefix}-{role}-{index}@example.com',
+                    password=password,
+                    role=role,
+                    assigned_admin_id=rng.choice(admin_ids) if admin_ids else None,
+                )
+                for index in range(start, min(start + options['batch_size'], count))
+            ]
+            created.extend(User.objects.bulk_create(batch))
+        return created
+
+    def create_tasks(self, users, options, rng):
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        assignees = [(user.pk, user.assigned_admin_id or user.pk) for user in users]
+        now = timezone.now()
+        earliest = now - timedelta(days=options['days'] // 2)
+        span = options['days'] * 86400
+        total = options['tasks']
+
+        for start in range(0, total, options['batch_size']):
+            batch = []
+            for index in range(start, min(start + options['batch_size'], total)):
+                assigned_to_id, created_by_id = rng.choice(assignees)
+                status = rng.choices(statuses, weights)[0]
+                due_date = earliest + timedelta(seconds=rng.randrange(span))
+                task = Task(
+                    title=f'{self.words(rng, 2).capitalize()} {index}',
+                    description=self.words(rng, rng.randint(8, 60)),
+                    assigned_to_id=assigned_to_id,
+                    created_by_id=created_by_id,
+                    status=status,
+                    due_date=due_date,
+                )
+                if status != 'pending':
+                    task.started_at = due_date - timedelta(hours=rng.randint(1, 72))
+                if status == 'completed':
+                    # About a fifth of the work is finished after the due date.
+                    task.completed_at = due_date + timedelta(hours=rng.randint(-48, 12))
+                    task.worked_hours = Decimal(rng.randint(25, 1600)) / 100
+                    task.completion_report = self.words(rng, rng.randint(5, 30))
+                batch.append(task)
+            with transaction.atomic():
+                Task.objects.bulk_create(batch)
+            self.stdout.write(f'{min(start + options["batch_size"], total)}/{total} tasks', ending='\r')
+            self.stdout.flush()
+        self.stdout.write('')
+
+    def words(self, rng, count):
+        return ' '.join(rng.choices(WORDS, cum_weights=WORD_CUM_WEIGHTS, k=count))
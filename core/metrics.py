@@ -0,0 +1,306 @@
+import hmac
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+from rest_framework.renderers import JSONRenderer
+
+from .login import client_ip
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    """What one request spent its time on; see MetricsMiddleware."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.serialize_time = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called through record_query for every query run during the request.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[_IN_LIST.sub('IN (...)', sql)] += 1
+
+    @property
+    def duplicate_queries(self):
+        """Queries that repeat an earlier statement with other parameters, the N+1 signature."""
+        return sum(count - 1 for count in self.fingerprints.values())
+
+    def repeated(self, threshold):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection as it connects.
+
+    It hands the query to the current request's RequestMetrics, found
+    through a context variable, because under ASGI the queries run on a
+    sync_to_async thread with its own connection objects.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_hook(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(kind):
+    """Add the time spent in the block to the current request's ``<kind>_time``."""
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            setattr(metrics, f'{kind}_time', getattr(metrics, f'{kind}_time') + time.perf_counter() - start)
+
+
+class Histogram:
+    """A per-view Prometheus histogram, kept in process memory."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, view, value):
+        counts, total = self.series.get(view, ([0] * (len(self.buckets) + 1), 0))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        self.series[view] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for view, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, '+Inf'], counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{view}"}} {total:.6f}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {cumulative}')
+        return lines
+
+
+class CounterMetric:
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = Counter()
+
+    def inc(self, view, amount=1):
+        self.series[view] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for view, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{view="{view}"}} {value}')
+        return lines
+
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (1, 2, 5, 10, 20, 50, 100, 200)
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Request latency by view.', SECONDS)
+SQL_SECONDS = Histogram('http_request_sql_seconds', 'Time spent in SQL per request.', SECONDS)
+QUERY_COUNT = Histogram('http_request_queries', 'SQL queries per request.', QUERIES)
+TEMPLATE_SECONDS = Histogram('http_request_template_seconds', 'Template rendering time per request.', SECONDS)
+SERIALIZE_SECONDS = Histogram('http_request_serialize_seconds', 'API response serialization time per request.', SECONDS)
+DUPLICATE_QUERIES = CounterMetric('http_request_duplicate_queries_total', 'Queries repeating an earlier statement in the same request.')
+BUDGET_EXCEEDED = CounterMetric('http_request_query_budget_exceeded_total', 'Requests over their QUERY_BUDGETS entry.')
+
+METRICS = (REQUEST_SECONDS, SQL_SECONDS, QUERY_COUNT, TEMPLATE_SECONDS, SERIALIZE_SECONDS, DUPLICATE_QUERIES, BUDGET_EXCEEDED)
+
+_lock = threading.Lock()
+
+
+def record(view, metrics, duration):
+    with _lock:
+        REQUEST_SECONDS.observe(view, duration)
+        SQL_SECONDS.observe(view, metrics.sql_time)
+        QUERY_COUNT.observe(view, metrics.queries)
+        TEMPLATE_SECONDS.observe(view, metrics.template_time)
+        SERIALIZE_SECONDS.observe(view, metrics.serialize_time)
+        if metrics.duplicate_queries:
+            DUPLICATE_QUERIES.inc(view, metrics.duplicate_queries)
+
+
+def render_metrics():
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    with _lock:
+        for metric in METRICS:
+            metric.series.clear()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+def _server_timing(metrics, duration):
+    return ', '.join([
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'ser;dur={metrics.serialize_time * 1000:.1f}',
+        f'total;dur={duration * 1000:.1f}',
+    ])
+
+
+class MetricsMiddleware:
+    """Per-view query counts, SQL/template/serialization time and N+1 hints.
+
+    Counts queries through ``record_query`` on every database connection, adds a Server-Timing header and feeds the histograms served by
+    ``metrics_view``. A view that runs more queries than its QUERY_BUDGETS
+    entry is logged, or raises QueryBudgetExceeded when
+    QUERY_BUDGET_STRICT is on (as it is under the test runner).
+
+    Works in both sync and async stacks. Under ASGI the request's metrics
+    live in the coroutine's context, and sync_to_async carries that context
+    over to the thread running the queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, duration):
+        view = _view_name(request)
+        record(view, metrics, duration)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = _server_timing(metrics, duration)
+        self.check(view, metrics)
+        return response
+
+    def check(self, view, metrics):
+        for sql, count in metrics.repeated(settings.METRICS_DUPLICATE_QUERY_THRESHOLD):
+            logger.warning('%s ran the same query %s times (possible N+1): %s', view, count, sql)
+
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is None or metrics.queries <= budget:
+            return
+        with _lock:
+            BUDGET_EXCEEDED.inc(view)
+        message = f'{view} ran {metrics.queries} queries, over its budget of {budget}.'
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the request histograms of this process.
+
+    Needs ``Authorization: Bearer $METRICS_TOKEN``, and a client IP in
+    METRICS_ALLOWED_IPS when that is set; without a token it is disabled.
+    """
+    token = settings.METRICS_TOKEN
+    supplied = request.headers.get('Authorization', '')
+    if not token or not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+        return HttpResponse(status=404)
+    if settings.METRICS_ALLOWED_IPS and client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponse(status=404)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its time as the request's serialization time."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with rendering time reported to MetricsMiddleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
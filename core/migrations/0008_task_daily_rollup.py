@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_task_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('processed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('completed', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('worked_hours_count', models.IntegerField(default=0)),
+                ('worked_hours_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('worked_hours_min', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('worked_hours_max', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('admin', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='admin_task_rollups', to=settings.AUTH_USER_MODEL)),
+                ('assigned_to', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assigned_to', 'day'], name='task_rollup_assignee_day_idx'), models.Index(fields=['admin', 'day'], name='task_rollup_admin_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'assigned_to'), name='unique_task_rollup_day_assignee')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import core.fields
+
+
+# The DDL is spelled out here rather than imported from core.search, so
+# later changes there cannot alter what this migration did.
+SQLITE_CREATE = [
+    """CREATE VIRTUAL TABLE core_task_fts USING fts5(
+        title, description, completion_report, content='core_task', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # The rank column: title hits weigh ten times more than the others.
+    "INSERT INTO core_task_fts(core_task_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 1.0)')",
+    """CREATE TRIGGER IF NOT EXISTS core_task_fts_insert AFTER INSERT ON core_task BEGIN
+        INSERT INTO core_task_fts(rowid, title, description, completion_report)
+        VALUES (new.id, new.title, new.description, new.completion_report);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_task_fts_delete AFTER DELETE ON core_task BEGIN
+        INSERT INTO core_task_fts(core_task_fts, rowid, title, description, completion_report)
+        VALUES ('delete', old.id, old.title, old.description, old.completion_report);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_task_fts_update AFTER UPDATE OF title, description, completion_report ON core_task BEGIN
+        INSERT INTO core_task_fts(core_task_fts, rowid, title, description, completion_report)
+        VALUES ('delete', old.id, old.title, old.description, old.completion_report);
+        INSERT INTO core_task_fts(rowid, title, description, completion_report)
+        VALUES (new.id, new.title, new.description, new.completion_report);
+    END""",
+    "INSERT INTO core_task_fts(core_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS core_task_fts_insert',
+    'DROP TRIGGER IF EXISTS core_task_fts_delete',
+    'DROP TRIGGER IF EXISTS core_task_fts_update',
+    'DROP TABLE IF EXISTS core_task_fts',
+]
+
+# Must stay identical to core.search.TsDocument for the planner to use it.
+POSTGRES_CREATE = [
+    """CREATE INDEX IF NOT EXISTS task_search_idx ON core_task USING GIN ((
+        to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '')
+                    || ' ' || coalesce(completion_report, ''))
+    ))""",
+]
+
+POSTGRES_DROP = ['DROP INDEX IF EXISTS task_search_idx']
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='TaskSearchIndex',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='core.task')),
+                ('document', core.fields.SearchDocumentField(db_column='core_task_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'core_task_fts',
+                'managed': False,
+            },
+        ),
+    ]
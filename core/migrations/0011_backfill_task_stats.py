@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+STATUS_FIELDS = ('pending', 'in_progress', 'completed')
+
+
+def rebuild_task_stats(apps, schema_editor):
+    """Fill core_taskstats from the tasks already in the database.
+
+    0002 created the table empty, and the signals only count changes from
+    then on. This mirrors core.stats.rebuild_task_stats with the historical
+    models, so later edits to that module do not change this migration.
+    """
+    Task = apps.get_model('core', 'Task')
+    TaskStats = apps.get_model('core', 'TaskStats')
+    db = schema_editor.connection.alias
+    counts = {status: Count('id', filter=Q(status=status)) for status in STATUS_FIELDS}
+    tasks = Task.objects.using(db).order_by()
+
+    rows = []
+    for values in tasks.values('assigned_to_id').annotate(**counts):
+        rows.append(TaskStats(scope='user', owner_id=values.pop('assigned_to_id'), **values))
+    admin_tasks = tasks.filter(assigned_to__assigned_admin__isnull=False, assigned_to__role='user')
+    for values in admin_tasks.values('assigned_to__assigned_admin_id').annotate(**counts):
+        rows.append(TaskStats(scope='admin', owner_id=values.pop('assigned_to__assigned_admin_id'), **values))
+    rows.append(TaskStats(scope='global', **tasks.aggregate(**counts)))
+
+    TaskStats.objects.using(db).all().delete()
+    TaskStats.objects.using(db).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_task_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_task_stats, migrations.RunPython.noop),
+    ]
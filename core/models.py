@@ -1,10 +1,86 @@
-from django.db import models
-from.constants import ROLE_CHOICES,STATUS_CHOICES
-from django.contrib.auth.models import AbstractUser
+from django.db import connections, models
+from.constants import ROLE_CHOICES,STATUS_CHOICES,STATS_SCOPE_CHOICES,JOB_STATUS_CHOICES
+from django.utils import timezone
+from django.contrib.auth.models import AbstractUser, UserManager as AuthUserManager
+from .fields import SearchDocumentField
+from .search import search_tasks
 
 # Create your models here.
 
 
+USER_LISTING_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'email', 'role', 'is_active', 'date_joined',
+    'assigned_admin__id', 'assigned_admin__username',
+)
+
+TASK_LISTING_FIELDS = (
+    'id', 'title', 'status', 'due_date', 'created_at', 'updated_at',
+    'assigned_to__id', 'assigned_to__username',
+)
+
+TASK_REPORT_FIELDS = TASK_LISTING_FIELDS + ('worked_hours', 'completion_report', 'completed_at')
+
+
+class UserQuerySet(models.QuerySet):
+
+    def managed_by(self, admin):
+        """Plain users assigned to the given admin."""
+        return self.filter(assigned_admin_id=admin.pk, role='user')
+
+    def assignable_by(self, user):
+        """Users the given user may assign tasks to."""
+        if user.is_superadmin:
+            return self.filter(role='user', is_superuser=False)
+        if user.is_admin:
+            return self.managed_by(user)
+        return self.none()
+
+    def for_listing(self):
+        """Pre-join the assigned admin and load only the columns list pages render."""
+        return self.select_related('assigned_admin').only(*USER_LISTING_FIELDS)
+
+
+class UserManager(AuthUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+class TaskQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """Tasks the user may see: all for superadmins, their users' tasks for
+        admins and their own tasks otherwise."""
+        if user.is_superadmin:
+            return self.all()
+        if user.is_admin:
+            return self.filter(assigned_to__assigned_admin_id=user.pk, assigned_to__role='user')
+        return self.filter(assigned_to_id=user.pk)
+
+    def with_assignee(self):
+        return self.select_related('assigned_to')
+
+    def search(self, query):
+        """Tasks matching a full-text query, annotated with ``search_rank``
+        (lower is better); see core.search."""
+        return search_tasks(self, query, connections[self.db].vendor)
+
+    def for_listing(self):
+        """Pre-join the assignee and skip the large text columns.
+
+        ``has_completion_report`` stands in for ``completion_report`` so list
+        templates can branch on it without loading the text.
+        """
+        return self.with_assignee().only(*TASK_LISTING_FIELDS).annotate(
+            has_completion_report=models.ExpressionWrapper(
+                models.Q(completion_report__isnull=False),
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def for_report(self):
+        """Pre-join the assignee and load the columns the reports table renders."""
+        return self.with_assignee().only(*TASK_REPORT_FIELDS)
+
+
 class User(AbstractUser):
     
     role = models.CharField(
@@ -31,6 +107,16 @@ class User(AbstractUser):
         related_name='managed_users',
     )
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_idx'),
+            models.Index(fields=['role', '-date_joined', '-id'], condition=models.Q(is_active=True),
+                         name='user_active_role_joined_idx'),
+            models.Index(fields=['assigned_admin', 'role', '-date_joined', '-id'], name='user_admin_role_joined_idx'),
+        ]
+
 
     def __str__(self):
         return f"{self.username}"
@@ -49,11 +135,8 @@ class User(AbstractUser):
 
     def can_manage_user(self, user):
         """Check if this user can manage another user"""
-        if self.is_superadmin:
-            return True
-        if self.is_admin and user.assigned_admin == self:
-            return True
-        return False
+        from .permissions import can_manage_user
+        return can_manage_user(self, user.pk)
     
 
 
@@ -85,11 +168,177 @@ class Task(models.Model):
     )
     worked_hours = models.DecimalField(max_digits=6,decimal_places=2,null=True,blank=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['assigned_to', 'status','due_date','created_by']),
+            models.Index(fields=['-created_at', '-id'], name='task_created_keyset_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='task_assignee_created_idx'),
+            models.Index(fields=['assigned_to', 'status', '-created_at', '-id'], name='task_assignee_status_idx'),
+            # COUNT/MAX(updated_at) behind the API ETag and the sync endpoint.
+            models.Index(fields=['assigned_to', 'updated_at'], name='task_assignee_updated_idx'),
+            # Day/range filters on due_date (see filters.day_range).
+            models.Index(fields=['due_date'], name='task_due_idx'),
+            # Reports only ever list completed tasks.
+            models.Index(fields=['-due_date', '-id'], condition=models.Q(status='completed'),
+                         name='task_completed_due_idx'),
+            models.Index(fields=['assigned_to', '-due_date', '-id'], condition=models.Q(status='completed'),
+                         name='task_completed_assignee_idx'),
         ]
 
     def __str__(self):
         return f"{self.title} - ({self.status})"
+
+
+
+class TaskSearchIndex(models.Model):
+    """The SQLite FTS5 index over tasks (see core.search).
+
+    Created by migration 0010 rather than by Django; only ever joined from
+    Task.objects.search() on SQLite.
+    """
+
+    task = models.OneToOneField(Task, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+                                related_name='search_index')
+    document = SearchDocumentField(db_column='core_task_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'core_task_fts'
+
+
+
+class TaskStats(models.Model):
+    """Denormalized task counters per user, per admin and globally.
+
+    Kept up to date incrementally by the signals in core.signals and rebuilt
+    in bulk by ``manage.py rebuild_task_stats``.
+    """
+
+    scope = models.CharField(max_length=10, choices=STATS_SCOPE_CHOICES)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='task_stats')
+    pending = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'owner'], name='unique_task_stats_scope_owner'),
+            models.UniqueConstraint(fields=['scope'], condition=models.Q(owner__isnull=True), name='unique_task_stats_global'),
+        ]
+
+    @property
+    def total(self):
+        return self.pending + self.in_progress + self.completed
+
+    def __str__(self):
+        return f"{self.scope} {self.owner_id or ''} - ({self.total})"
+
+
+
+class TaskTombstone(models.Model):
+    """Record of a task leaving a user's list (deleted or reassigned), so
+    delta sync clients can drop it locally."""
+
+    task_id = models.BigIntegerField()
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_tombstones')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['assigned_to', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} - ({self.deleted_at})"
+
+
+
+class TaskDailyRollupQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """Same scoping as TaskQuerySet.visible_to, by the assignee's admin."""
+        if user.is_superadmin:
+            return self.all()
+        if user.is_admin:
+            return self.filter(admin_id=user.pk, assigned_to__role='user')
+        return self.filter(assigned_to_id=user.pk)
+
+
+class TaskDailyRollup(models.Model):
+    """Completed tasks per due day and assignee.
+
+    Filled incrementally by ``manage.py rollup_tasks`` (see core.rollups);
+    ``admin`` is the assignee's admin and follows reassignments.
+    """
+
+    day = models.DateField()
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_rollups')
+    admin = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='admin_task_rollups')
+    completed = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    worked_hours_count = models.IntegerField(default=0)
+    worked_hours_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    worked_hours_min = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    worked_hours_max = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+
+    objects = TaskDailyRollupQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'assigned_to'], name='unique_task_rollup_day_assignee'),
+        ]
+        indexes = [
+            models.Index(fields=['assigned_to', 'day'], name='task_rollup_assignee_day_idx'),
+            models.Index(fields=['admin', 'day'], name='task_rollup_admin_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.assigned_to_id} - ({self.completed})"
+
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup job has processed, by job name."""
+
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} - ({self.processed_until})"
+
+
+
+
+class Job(models.Model):
+    """A piece of background work, run by ``manage.py run_workers`` (see core.jobs)."""
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} - ({self.status})"
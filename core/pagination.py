@@ -0,0 +1,187 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
+
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """COUNT(*) of the queryset, cached for a short while.
+
+    Good enough for "about N results" displays on deep listings where an exact
+    count per page is not worth a full scan.
+    """
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # A filter that can match nothing, e.g. an __in of an empty list.
+        return 0
+    key = 'count:' + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('n', 'p') or not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+class KeysetPage:
+    """One page of a keyset listing.
+
+    Mirrors the parts of django.core.paginator.Page the templates use, with
+    cursors instead of page numbers.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor, paginator):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def count(self):
+        return self.paginator.count
+
+
+class KeysetPaginator:
+    """Cursor pagination over a fixed ordering such as ('-created_at', '-id').
+
+    The last ordering key must be unique (normally the primary key) so every
+    row has a distinct position.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [key.lstrip('-') for key in self.ordering]
+
+    @property
+    def count(self):
+        return cached_count(self.queryset)
+
+    def _parse(self, values):
+        if len(values) != len(self.fields):
+            raise InvalidCursor(values)
+        model = self.queryset.model
+        try:
+            return [model._meta.get_field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except Exception:
+            raise InvalidCursor(values)
+
+    def _seek(self, values, forward):
+        """Rows strictly after (forward) or before the given key values."""
+        condition = Q()
+        for i, key in enumerate(self.ordering):
+            descending = key.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{self.fields[i]}__{lookup}': values[i]})
+            for field, value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{field: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [key[1:] if key.startswith('-') else f'-{key}' for key in self.ordering]
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def _query(self, cursor):
+        """The queryset slice for a cursor, plus (direction, has_cursor)."""
+        direction, values = decode_cursor(cursor) if cursor else ('n', None)
+        if values is None:
+            return self.queryset.order_by(*self.ordering)[:self.per_page + 1], direction, False
+        values = self._parse(values)
+        if direction == 'n':
+            queryset = self.queryset.filter(self._seek(values, forward=True)).order_by(*self.ordering)
+        else:
+            queryset = self.queryset.filter(self._seek(values, forward=False)).order_by(*self._reversed_ordering())
+        return queryset[:self.per_page + 1], direction, True
+
+    def _build(self, rows, direction, has_cursor):
+        if direction == 'n':
+            more, has_previous = len(rows) > self.per_page, has_cursor
+            rows = rows[:self.per_page]
+        else:
+            has_previous, more = len(rows) > self.per_page, True
+            rows = rows[:self.per_page][::-1]
+
+        next_cursor = encode_cursor('n', self._key(rows[-1])) if rows and more else None
+        previous_cursor = encode_cursor('p', self._key(rows[0])) if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor, self)
+
+    def page(self, cursor=None):
+        queryset, direction, has_cursor = self._query(cursor)
+        return self._build(list(queryset), direction, has_cursor)
+
+    async def apage(self, cursor=None):
+        queryset, direction, has_cursor = self._query(cursor)
+        return self._build([row async for row in queryset], direction, has_cursor)
+
+
+def paginate(request, queryset, ordering, per_page=10, keyset=True):
+    """Paginate a listing by page number, or by cursor when ``?cursor=`` is given.
+
+    Pass ``keyset=False`` when ``ordering`` is not made of model fields (a
+    search rank, say); cursors are then ignored.
+    """
+    if keyset and 'cursor' in request.GET:
+        paginator = KeysetPaginator(queryset, ordering, per_page)
+        try:
+            return paginator.page(request.GET.get('cursor'))
+        except InvalidCursor:
+            return paginator.page()
+
+    paginator = Paginator(queryset.order_by(*ordering), per_page)
+    page = request.GET.get('page', 1)
+    try:
+        return paginator.page(page)
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
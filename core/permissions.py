@@ -0,0 +1,61 @@
+"""Who may see and manage which users and tasks.
+
+An admin manages the plain users assigned to them. Their ids are resolved
+once per request and memoized on the requesting user. They are also cached
+across requests in the USERS namespace, but only for a few seconds: a User
+save bumps that namespace in the saving process's cache, and without a
+shared cache (REDIS_URL) other processes only notice when the entry
+expires. Checks are then set lookups, and task scoping is an
+``assigned_to_id IN (...)`` filter rather than a join through core_user or
+a lazy FK load per object.
+"""
+from asgiref.sync import sync_to_async
+
+from .cache import USERS, cached
+from .models import User, Task
+
+
+# How stale another process's view of an admin's users may get.
+MANAGEABLE_IDS_TIMEOUT = 5
+
+def manageable_user_ids(user):
+    """Ids of the users ``user`` manages; None for a superadmin, who manages everyone."""
+    if user.is_superadmin:
+        return None
+    ids = getattr(user, '_manageable_user_ids', None)
+    if ids is None:
+        if user.is_admin:
+            ids = cached(USERS, f'manageable:{user.pk}',
+                         lambda: frozenset(User.objects.managed_by(user).values_list('id', flat=True)),
+                         MANAGEABLE_IDS_TIMEOUT)
+        else:
+            ids = frozenset()
+        user._manageable_user_ids = ids
+    return ids
+
+
+async def amanageable_user_ids(user):
+    return await sync_to_async(manageable_user_ids)(user)
+
+
+def can_manage_user(requester, user_id):
+    ids = manageable_user_ids(requester)
+    return ids is None or user_id in ids
+
+
+def can_manage_task(requester, task):
+    """Whether ``requester`` administers the task's assignee; needs only ``assigned_to_id``."""
+    return can_manage_user(requester, task.assigned_to_id)
+
+
+def scoped_tasks(user, tasks=None):
+    """``tasks`` (all tasks by default) narrowed to those ``user`` may see:
+    all for superadmins, their users' tasks for admins and their own tasks
+    otherwise."""
+    if tasks is None:
+        tasks = Task.objects.all()
+    if user.is_superadmin:
+        return tasks
+    if user.is_admin:
+        return tasks.filter(assigned_to_id__in=sorted(manageable_user_ids(user)))
+    return tasks.filter(assigned_to_id=user.pk)
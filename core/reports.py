@@ -0,0 +1,167 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .filters import TaskFilterSet, RollupFilterSet, start_of_day
+from .models import TaskDailyRollup
+from .permissions import scoped_tasks
+from .rollups import ON_TIME, rollups_ready
+
+
+HOURS_PLACES = Decimal('0.01')
+
+
+def _average(hours, count):
+    return (hours / count).quantize(HOURS_PLACES) if count else Decimal('0')
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def _summary(bucket):
+    return {
+        'tasks': bucket['tasks'],
+        'hours': bucket['hours'],
+        'avg_hours': _average(bucket['hours'], bucket['timed']),
+        'min_hours': bucket['min_hours'],
+        'max_hours': bucket['max_hours'],
+        'on_time_rate': _rate(bucket['on_time'], bucket['tasks']),
+    }
+
+
+def _extreme(pick, current, value):
+    return value if current is None else pick(current, value)
+
+
+def _empty_bucket():
+    return {'tasks': 0, 'hours': Decimal('0'), 'timed': 0, 'on_time': 0, 'min_hours': None, 'max_hours': None}
+
+
+def _add(bucket, row):
+    bucket['tasks'] += row['tasks']
+    bucket['hours'] += row['hours'] or 0
+    bucket['timed'] += row['timed']
+    bucket['on_time'] += row['on_time']
+    if row['min_hours'] is not None:
+        bucket['min_hours'] = _extreme(min, bucket['min_hours'], row['min_hours'])
+        bucket['max_hours'] = _extreme(max, bucket['max_hours'], row['max_hours'])
+
+
+def _task_rows(tasks):
+    return (
+        tasks.order_by()
+        .annotate(day=TruncDate('due_date'))
+        .values('assigned_to_id', 'assigned_to__username', 'day')
+        .annotate(
+            tasks=Count('id'),
+            hours=Sum('worked_hours'),
+            timed=Count('worked_hours'),
+            on_time=Count('id', filter=ON_TIME),
+            min_hours=Min('worked_hours'),
+            max_hours=Max('worked_hours'),
+        )
+    )
+
+
+def _rollup_rows(rollups):
+    return rollups.values(
+        'assigned_to_id', 'assigned_to__username', 'day',
+        tasks=F('completed'),
+        hours=F('worked_hours_sum'),
+        timed=F('worked_hours_count'),
+        on_time=F('completed') - F('late'),
+        min_hours=F('worked_hours_min'),
+        max_hours=F('worked_hours_max'),
+    )
+
+
+def _fold(rows):
+    totals = _empty_bucket()
+    users = {}
+    days = {}
+    for row in rows:
+        _add(totals, row)
+        user = users.setdefault(row['assigned_to_id'], dict(_empty_bucket(), username=row['assigned_to__username']))
+        _add(user, row)
+        _add(days.setdefault(row['day'], _empty_bucket()), row)
+
+    return {
+        'totals': _summary(totals),
+        'by_user': [
+            {'user_id': user_id, 'username': bucket['username'], **_summary(bucket)}
+            for user_id, bucket in sorted(users.items(), key=lambda item: item[1]['username'])
+        ],
+        'by_day': [
+            {'day': day, 'tasks': bucket['tasks'], 'hours': bucket['hours']}
+            for day, bucket in sorted(days.items())
+        ],
+    }
+
+
+def task_report(tasks):
+    """Totals, per-user breakdown and per-day series for a set of tasks.
+
+    One query grouped by (assignee, due day); everything else is folded from
+    those group rows in Python, so the cost is one pass over the filtered
+    tasks however many figures the report shows. ``avg_hours`` averages the
+    tasks that have hours logged, like Avg('worked_hours'); a task is on time
+    when it was completed no later than its due date.
+    """
+    return _fold(_task_rows(tasks))
+
+
+def completed_tasks(user, params):
+    """Completed tasks ``user`` may see, narrowed by the report filters."""
+    return TaskFilterSet(params).filter(scoped_tasks(user).filter(status='completed'))
+
+
+def _completed_rows(user, params):
+    """(assignee, day) rows of the completed tasks ``user`` may see.
+
+    Days before today come from TaskDailyRollup; today and later are still
+    changing and are grouped from core_task. Until rollup_tasks has run once,
+    or when a filter cannot be applied to rollups, everything comes from
+    core_task.
+    """
+    filters = TaskFilterSet(params)
+    tasks = scoped_tasks(user).filter(status='completed')
+    if not rollups_ready() or not RollupFilterSet.covers(params):
+        return list(_task_rows(filters.filter(tasks))), filters.errors
+
+    today = timezone.localdate()
+    history = TaskDailyRollup.objects.visible_to(user).filter(day__lt=today)
+    history = RollupFilterSet(params).filter(history)
+    live = filters.filter(tasks.filter(due_date__gte=start_of_day(today)))
+    return [*_rollup_rows(history), *_task_rows(live)], filters.errors
+
+
+def completed_task_report(user, params):
+    """task_report for the reports page and API, backed by the daily rollups.
+
+    Returns ``(report, errors)`` where errors are the TaskFilterSet messages.
+    """
+    rows, errors = _completed_rows(user, params)
+    return _fold(rows), errors
+
+
+def completed_task_analytics(user, params):
+    """Per day and assignee figures, oldest day first, for BI exports."""
+    rows, errors = _completed_rows(user, params)
+    series = [
+        {
+            'day': row['day'],
+            'user_id': row['assigned_to_id'],
+            'username': row['assigned_to__username'],
+            'tasks': row['tasks'],
+            'late': row['tasks'] - row['on_time'],
+            'hours': row['hours'] or Decimal('0'),
+            'min_hours': row['min_hours'],
+            'max_hours': row['max_hours'],
+        }
+        for row in rows
+    ]
+    series.sort(key=lambda row: (row['day'], row['username']))
+    return series, errors
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Task, TaskDailyRollup, TaskTombstone, RollupWatermark
+
+
+TASK_DAILY = 'task_daily'
+
+# Rows committed shortly after the previous run started can carry an
+# updated_at older than its watermark; re-reading a few minutes is harmless
+# because each run recomputes whole assignees.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+ON_TIME = Q(completed_at__lte=F('due_date'))
+
+
+def rollups_ready():
+    """Whether rollup_tasks has run at least once."""
+    return RollupWatermark.objects.filter(name=TASK_DAILY).exists()
+
+
+def _changed_assignees(since):
+    changed = Task.objects.filter(updated_at__gte=since).order_by().values_list('assigned_to_id', flat=True).distinct()
+    # Reassigned and deleted tasks leave a tombstone for the old assignee.
+    removed = TaskTombstone.objects.filter(deleted_at__gte=since).values_list('assigned_to_id', flat=True).distinct()
+    return set(changed) | set(removed)
+
+
+def _all_assignees():
+    completed = Task.objects.filter(status='completed').order_by().values_list('assigned_to_id', flat=True).distinct()
+    rolled_up = TaskDailyRollup.objects.order_by().values_list('assigned_to_id', flat=True).distinct()
+    return set(completed) | set(rolled_up)
+
+
+def _rollups_for(assignee_ids):
+    rows = (
+        Task.objects.filter(status='completed', assigned_to_id__in=assignee_ids)
+        .order_by()
+        .annotate(day=TruncDate('due_date'))
+        .values('assigned_to_id', 'assigned_to__assigned_admin_id', 'day')
+        .annotate(
+            completed=Count('id'),
+            late=Count('id', filter=~ON_TIME),
+            worked_hours_count=Count('worked_hours'),
+            worked_hours_sum=Sum('worked_hours'),
+            worked_hours_min=Min('worked_hours'),
+            worked_hours_max=Max('worked_hours'),
+        )
+    )
+    return [
+        TaskDailyRollup(
+            day=row['day'],
+            assigned_to_id=row['assigned_to_id'],
+            admin_id=row['assigned_to__assigned_admin_id'],
+            completed=row['completed'],
+            late=row['late'],
+            worked_hours_count=row['worked_hours_count'],
+            worked_hours_sum=row['worked_hours_sum'] or 0,
+            worked_hours_min=row['worked_hours_min'],
+            worked_hours_max=row['worked_hours_max'],
+        )
+        for row in rows
+    ]
+
+
+def rollup_tasks(full=False, chunk_size=500):
+    """Bring TaskDailyRollup up to date with core_task.
+
+    Only assignees with a task changed (or removed) since the last watermark
+    are processed; their rows are recomputed from scratch, so running the
+    job twice, or over an overlapping window, gives the same table. The
+    first run, or ``full=True``, processes everyone. Returns the number of
+    assignees processed and rollup rows written.
+    """
+    started = timezone.now()
+    watermark = RollupWatermark.objects.filter(name=TASK_DAILY).first()
+    if full or watermark is None:
+        assignees = _all_assignees()
+    else:
+        assignees = _changed_assignees(watermark.processed_until - WATERMARK_OVERLAP)
+
+    assignees = sorted(assignees)
+    written = 0
+    for start in range(0, len(assignees), chunk_size):
+        chunk = assignees[start:start + chunk_size]
+        rows = _rollups_for(chunk)
+        with transaction.atomic():
+            TaskDailyRollup.objects.filter(assigned_to_id__in=chunk).delete()
+            TaskDailyRollup.objects.bulk_create(rows)
+        written += len(rows)
+
+    RollupWatermark.objects.update_or_create(name=TASK_DAILY, defaults={'processed_until': started})
+    return len(assignees), written
+
+
+def move_rollup_admin(user_id, new_admin_id):
+    """Follow a user's reassignment to another admin."""
+    TaskDailyRollup.objects.filter(assigned_to_id=user_id).update(admin_id=new_admin_id)
@@ -0,0 +1,110 @@
+"""Full-text search over task titles, descriptions and completion reports.
+
+SQLite keeps an FTS5 index in ``core_task_fts`` (migration 0010), an
+external-content table over ``core_task`` kept in sync by triggers, so
+bulk_create and queryset.update() are indexed too; the ORM reaches it
+through the unmanaged TaskSearchIndex model. PostgreSQL searches a GIN
+expression index on the task's tsvector. Other databases fall back to a
+scanning icontains search.
+"""
+import re
+
+from django.db import models
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+
+
+FTS_TABLE = 'core_task_fts'
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description, completion_report)
+            VALUES (new.id, new.title, new.description, new.completion_report);
+        END""",
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, completion_report)
+            VALUES ('delete', old.id, old.title, old.description, old.completion_report);
+        END""",
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF title, description, completion_report ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, completion_report)
+            VALUES ('delete', old.id, old.title, old.description, old.completion_report);
+            INSERT INTO {FTS_TABLE}(rowid, title, description, completion_report)
+            VALUES (new.id, new.title, new.description, new.completion_report);
+        END""",
+}
+
+MAX_TERMS = 8
+
+_TERM = re.compile(r'\w+')
+
+
+class TsDocument(Func):
+    """The English tsvector of a task, spelled exactly like the task_search_idx
+    expression so PostgreSQL can use the index."""
+    template = "to_tsvector('english', coalesce(%(expressions)s, ''))"
+    arg_joiner = ", '') || ' ' || coalesce("
+    output_field = models.TextField()
+
+    def __init__(self):
+        super().__init__(F('title'), F('description'), F('completion_report'))
+
+
+class TsQuery(Func):
+    template = "to_tsquery('english', %(expressions)s)"
+    output_field = models.TextField()
+
+
+def search_terms(query):
+    """The words of a search box query; everything else is dropped so
+    user input never reaches the FTS query parser as syntax."""
+    return _TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def repair(connection):
+    """Re-create the SQLite triggers after a migration rebuilt core_task.
+
+    Rebuilding a table drops its triggers; when any were missing the index
+    is rebuilt too, as writes in between were not indexed.
+    """
+    if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'core_task'")
+        existing = {name for name, in cursor.fetchall()}
+        if set(FTS_TRIGGERS) <= existing:
+            return
+        for sql in FTS_TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_tasks(tasks, query, vendor):
+    """Filter ``tasks`` to matches for ``query`` and annotate ``search_rank``.
+
+    Lower ranks are better matches on every backend, so callers order by
+    ``search_rank`` ascending. Every term must match; the last one also
+    matches as a prefix, so results narrow while typing.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return tasks.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    if vendor == 'sqlite':
+        # FTS5's rank column is bm25() with the weights set in migration
+        # 0010; it is only defined in the query that runs the MATCH, so the
+        # index is joined rather than probed per row.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        return tasks.filter(search_index__document__match=match).annotate(search_rank=F('search_index__rank'))
+
+    if vendor == 'postgresql':
+        tsquery = TsQuery(Value(' & '.join(terms) + ':*'))
+        matches = Func(TsDocument(), tsquery, template='%(expressions)s', arg_joiner=' @@ ', output_field=BooleanField())
+        rank = Func(TsDocument(), tsquery, function='ts_rank', output_field=FloatField())
+        return tasks.filter(matches).annotate(search_rank=Value(0.0) - rank)
+
+    condition = Q()
+    for term in terms:
+        condition &= (Q(title__icontains=term) | Q(description__icontains=term)
+                      | Q(completion_report__icontains=term))
+    return tasks.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
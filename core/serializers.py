@@ -1,6 +1,11 @@
-from rest_framework import serializers
+from rest_framework import serializers, ISO_8601
+from rest_framework.settings import api_settings
+from django.utils import timezone
 from django.contrib.auth import authenticate
-from .models import User, Task
+from decimal import Decimal
+from functools import lru_cache
+from .models import User, Task, Job
+from .constants import STATUS_CHOICES
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -18,6 +23,112 @@ class TaskSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('created_by', 'created_at', 'updated_at', 'started_at', 'completed_at')
 
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. TaskSerializer(tasks, many=True, fields=['id', 'title'])
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def field_names(cls):
+        return list(cls().fields)
+
+
+class TaskReadPlan:
+    """Read-only fast path producing exactly what TaskSerializer would, but
+    from ``values()`` rows instead of model instances.
+
+    The field list and the values() column behind each output key are worked
+    out once from TaskSerializer; per row the work is a dict lookup plus a
+    conversion for datetimes and decimals.
+    """
+
+    def __init__(self, fields=None):
+        self.steps = []
+        for name, field in TaskSerializer(fields=fields).fields.items():
+            self.steps.append((name, field.source.replace('.', '__'), field))
+        self.columns = [column for _, column, _ in self.steps]
+
+    @classmethod
+    def for_fields(cls, fields=None):
+        """The shared plan for a sparse fieldset.
+
+        Output order follows TaskSerializer and unknown names are ignored,
+        so plans are keyed by the set of known fields asked for. The cache is
+        bounded because the fieldset comes from the client.
+        """
+        if fields is not None:
+            fields = frozenset(fields) & cls._field_names()
+        return cls._plan(fields)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _field_names():
+        return frozenset(TaskSerializer.field_names())
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _plan(fields):
+        return TaskReadPlan(fields)
+
+    def _converters(self):
+        # Resolved per call rather than per plan so an activated timezone is honoured.
+        converters = []
+        for name, column, field in self.steps:
+            convert = None
+            if isinstance(field, serializers.DateTimeField):
+                convert = self._datetime_converter(field)
+            elif isinstance(field, serializers.DecimalField):
+                convert = field.to_representation
+            converters.append((name, column, convert))
+        return converters
+
+    @staticmethod
+    def _datetime_converter(field):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+    @staticmethod
+    def _row(row, converters):
+        data = {}
+        for name, column, convert in converters:
+            value = row[column]
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    def row(self, row):
+        return self._row(row, self._converters())
+
+    def serialize(self, rows):
+        converters = self._converters()
+        return [self._row(row, converters) for row in rows]
+
+    def values(self, queryset, *extra):
+        """The queryset as values() rows carrying every column the plan needs."""
+        return queryset.values(*dict.fromkeys(self.columns + list(extra)))
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'status', 'attempts', 'max_attempts', 'result', 'error', 'created_at', 'finished_at')
+
+
 class TaskCompletionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
@@ -31,6 +142,36 @@ class TaskCompletionSerializer(serializers.ModelSerializer):
         return data
 
 
+class TaskBulkCreateItemSerializer(serializers.Serializer):
+    """One task in a bulk create request.
+
+    ``assigned_to`` is checked against the ``assignable_user_ids`` set in the
+    context (the same users TaskForm offers) instead of a query per item.
+    """
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    assigned_to = serializers.IntegerField()
+    due_date = serializers.DateTimeField()
+    status = serializers.ChoiceField(choices=STATUS_CHOICES, default='pending')
+
+    def validate_assigned_to(self, value):
+        if value not in self.context['assignable_user_ids']:
+            raise serializers.ValidationError("You cannot assign tasks to this user.")
+        return value
+
+
+class TaskBulkStatusItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=STATUS_CHOICES)
+    worked_hours = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=Decimal('0.01'), required=False)
+    completion_report = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if data['status'] == 'completed' and not (data.get('worked_hours') and data.get('completion_report')):
+            raise serializers.ValidationError("Worked hours and completion report are required when marking a task as completed.")
+        return data
+
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField()
@@ -0,0 +1,120 @@
+from django.db.models import DEFERRED, QuerySet
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import User, Task, TaskTombstone
+from .stats import admin_owner_id, bump_task_stats, move_admin_stats
+from .rollups import move_rollup_admin
+from .cache import USERS, TASKS, bump_version
+from .authentication import invalidate_auth_state
+from .search import repair as repair_search_index
+from .metrics import install_query_hook
+
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    # Deferred fields are missing from __dict__; pre_save reloads them.
+    instance._stats_state = (instance.__dict__.get('assigned_to_id'), instance.__dict__.get('status'))
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+def load_task_state(sender, instance, **kwargs):
+    if instance._state.adding or None not in instance._stats_state:
+        return
+    instance._stats_state = Task.objects.filter(pk=instance.pk).values_list('assigned_to_id', 'status').first() or (None, None)
+
+
+@receiver(post_save, sender=Task)
+def record_tombstone_on_reassign(sender, instance, created, **kwargs):
+    old_assigned_to_id = instance._stats_state[0]
+    if not created and old_assigned_to_id is not None and old_assigned_to_id != instance.assigned_to_id:
+        TaskTombstone.objects.create(task_id=instance.pk, assigned_to_id=old_assigned_to_id)
+
+
+@receiver(post_delete, sender=Task)
+def record_tombstone_on_delete(sender, instance, origin=None, **kwargs):
+    assigned_to_id = instance._stats_state[0]
+    if assigned_to_id is None or _assignee_is_being_deleted(origin, assigned_to_id):
+        return
+    TaskTombstone.objects.create(task_id=instance.pk, assigned_to_id=assigned_to_id)
+
+
+def _assignee_is_being_deleted(origin, assigned_to_id):
+    if isinstance(origin, User):
+        return origin.pk == assigned_to_id
+    if isinstance(origin, QuerySet) and origin.model is User:
+        return origin.filter(pk=assigned_to_id).exists()
+    return False
+
+
+@receiver(post_save, sender=Task)
+def update_task_stats_on_save(sender, instance, created, **kwargs):
+    new_state = (instance.assigned_to_id, instance.status)
+    old_state = None if created else instance._stats_state
+    if old_state != new_state:
+        if old_state and old_state[0] is not None:
+            bump_task_stats(*old_state, delta=-1)
+        bump_task_stats(*new_state, delta=1)
+    instance._stats_state = new_state
+
+
+@receiver(post_delete, sender=Task)
+def update_task_stats_on_delete(sender, instance, **kwargs):
+    assigned_to_id, status = instance._stats_state
+    if assigned_to_id is not None:
+        bump_task_stats(assigned_to_id, status, delta=-1)
+
+
+def _admin_state(user):
+    return user.__dict__.get('assigned_admin_id', DEFERRED), user.__dict__.get('role', DEFERRED)
+
+
+@receiver(post_init, sender=User)
+def remember_assigned_admin(sender, instance, **kwargs):
+    instance._stats_admin_state = _admin_state(instance)
+
+
+@receiver(post_save, sender=User)
+def move_task_stats_on_reassign(sender, instance, created, **kwargs):
+    old_state = instance._stats_admin_state
+    new_state = instance._stats_admin_state = _admin_state(instance)
+    if created or DEFERRED in old_state + new_state or old_state == new_state:
+        return
+    # A role change moves the counters in or out of the admin's scope.
+    old_owner, new_owner = admin_owner_id(*old_state), admin_owner_id(*new_state)
+    if old_owner != new_owner:
+        move_admin_stats(instance.pk, old_owner, new_owner)
+    if old_state[0] != new_state[0]:
+        move_rollup_admin(instance.pk, new_state[0])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login (and password on a hash upgrade), which no
+    # cached listing or token check looks at.
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    bump_version(USERS)
+    # Deactivation, role and admin changes must reach token auth promptly.
+    invalidate_auth_state(instance.pk)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    bump_version(TASKS)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.label == 'core':
+        repair_search_index(connections[using])
+
+
+@receiver(connection_created)
+def install_request_metrics(sender, connection, **kwargs):
+    install_query_hook(connection)
@@ -0,0 +1,165 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import User, Task, TaskStats
+from .permissions import manageable_user_ids
+
+
+STATUS_FIELDS = ('pending', 'in_progress', 'completed')
+
+
+def _status_counts(prefix=''):
+    """Conditional COUNT aggregates for each status."""
+    return {
+        status: Count('id', filter=Q(**{f'{prefix}status': status}))
+        for status in STATUS_FIELDS
+    }
+
+
+def _read_stats(scope, owner=None):
+    stats = TaskStats.objects.filter(scope=scope, owner=owner).values(*STATUS_FIELDS).first()
+    stats = stats or dict.fromkeys(STATUS_FIELDS, 0)
+    stats['total'] = sum(stats.values())
+    return stats
+
+
+def superadmin_stats():
+    """Role counters from core_user plus the global task counters row."""
+    users = User.objects.aggregate(
+        user_count=Count('id', filter=Q(role='user')),
+        admin_count=Count('id', filter=Q(role='admin')),
+    )
+    tasks = _read_stats('global')
+    return {
+        'user_count': users['user_count'],
+        'admin_count': users['admin_count'],
+        'task_count': tasks['total'],
+        'pending_tasks': tasks['pending'],
+        'in_progress_tasks': tasks['in_progress'],
+        'completed_tasks': tasks['completed'],
+    }
+
+
+def admin_stats(admin):
+    """Counters for the users assigned to an admin and their tasks."""
+    tasks = _read_stats('admin', admin)
+    return {
+        'assigned_users_count': len(manageable_user_ids(admin)),
+        'user_task_count': tasks['total'],
+        'pending_user_tasks': tasks['pending'],
+        'in_progress_user_tasks': tasks['in_progress'],
+        'completed_user_tasks': tasks['completed'],
+    }
+
+
+def user_stats(user):
+    """Per-status counters for the tasks assigned to a single user."""
+    tasks = _read_stats('user', user)
+    return {
+        'total_tasks': tasks['total'],
+        'pending_tasks_count': tasks['pending'],
+        'in_progress_tasks_count': tasks['in_progress'],
+        'completed_tasks_count': tasks['completed'],
+    }
+
+
+def admin_owner_id(assigned_admin_id, role):
+    """The admin whose counters include a user's tasks: only plain users are
+    counted for their admin, as in User.objects.managed_by."""
+    return assigned_admin_id if role == 'user' else None
+
+
+def _admin_owner_ids(user_ids):
+    rows = User.objects.filter(pk__in=user_ids).values_list('id', 'assigned_admin_id', 'role')
+    return {user_id: admin_owner_id(admin_id, role) for user_id, admin_id, role in rows}
+
+
+def _add_to_stats(scope, owner_id, counts):
+    changes = {status: F(status) + delta for status, delta in counts.items() if delta}
+    if not changes:
+        return
+    updated = TaskStats.objects.filter(scope=scope, owner_id=owner_id).update(**changes)
+    # A missing row with only decrements pending means the owner is being
+    # deleted (its row is already gone), so there is nothing to record.
+    if not updated and any(delta > 0 for delta in counts.values()):
+        try:
+            # In a savepoint, so losing the race below leaves the caller's
+            # transaction usable.
+            with transaction.atomic():
+                TaskStats.objects.create(
+                    scope=scope,
+                    owner_id=owner_id,
+                    **{status: max(delta, 0) for status, delta in counts.items()}
+                )
+        except IntegrityError:
+            # A concurrent request created the row after our update found
+            # none; add to that row instead.
+            TaskStats.objects.filter(scope=scope, owner_id=owner_id).update(**changes)
+
+
+def bump_task_stats(assigned_to_id, status, delta=1):
+    """Add delta to the counters of one status for the assignee, their admin and the global row."""
+    if status not in STATUS_FIELDS:
+        return
+    counts = {status: delta}
+    admin_id = _admin_owner_ids([assigned_to_id]).get(assigned_to_id)
+    with transaction.atomic():
+        _add_to_stats('user', assigned_to_id, counts)
+        if admin_id:
+            _add_to_stats('admin', admin_id, counts)
+        _add_to_stats('global', None, counts)
+
+
+def bulk_bump_task_stats(deltas):
+    """Apply many counter changes at once, e.g. after bulk_create/bulk_update,
+    which bypass the model signals.
+
+    ``deltas`` maps (assigned_to_id, status) to the change in count.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta and key[1] in STATUS_FIELDS}
+    if not deltas:
+        return
+    user_ids = {user_id for user_id, _ in deltas}
+    admin_ids = _admin_owner_ids(user_ids)
+
+    rows = {}
+    for (user_id, status), delta in deltas.items():
+        owners = [('user', user_id), ('global', None)]
+        if admin_ids.get(user_id):
+            owners.append(('admin', admin_ids[user_id]))
+        for owner in owners:
+            counts = rows.setdefault(owner, {})
+            counts[status] = counts.get(status, 0) + delta
+    with transaction.atomic():
+        for (scope, owner_id), counts in rows.items():
+            _add_to_stats(scope, owner_id, counts)
+
+
+def move_admin_stats(user_id, old_admin_id, new_admin_id):
+    """Move a user's counters from one admin rollup to another after a
+    reassignment or role change; either id may be None."""
+    counts = TaskStats.objects.filter(scope='user', owner_id=user_id).values(*STATUS_FIELDS).first()
+    if not counts:
+        return
+    with transaction.atomic():
+        if old_admin_id:
+            _add_to_stats('admin', old_admin_id, {status: -count for status, count in counts.items()})
+        if new_admin_id:
+            _add_to_stats('admin', new_admin_id, counts)
+
+
+def rebuild_task_stats(batch_size=1000):
+    """Recompute every TaskStats row from core_task with grouped aggregates."""
+    counts = _status_counts()
+    rows = []
+    for values in Task.objects.order_by().values('assigned_to_id').annotate(**counts):
+        rows.append(TaskStats(scope='user', owner_id=values.pop('assigned_to_id'), **values))
+    admin_tasks = Task.objects.filter(assigned_to__assigned_admin__isnull=False, assigned_to__role='user').order_by()
+    for values in admin_tasks.values('assigned_to__assigned_admin_id').annotate(**counts):
+        rows.append(TaskStats(scope='admin', owner_id=values.pop('assigned_to__assigned_admin_id'), **values))
+    rows.append(TaskStats(scope='global', **Task.objects.aggregate(**counts)))
+
+    with transaction.atomic():
+        TaskStats.objects.all().delete()
+        TaskStats.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
@@ -0,0 +1,47 @@
+from django import template
+
+
+register = template.Library()
+
+# Page links shown either side of the current page and at each end; the
+# rest of a long range collapses into an ellipsis.
+PAGE_WINDOW = 2
+PAGE_ENDS = 1
+
+
+def _link(text, url=None, active=False):
+    return {'text': text, 'url': url, 'active': active}
+
+
+@register.inclusion_tag('pagination.html', takes_context=True)
+def pagination_nav(context, page, label='Pagination'):
+    """Previous/next and a windowed page range for a page from core.pagination.paginate.
+
+    The query string is encoded once, not per link, and only a window of the
+    page range is rendered, so deep listings cost the same as short ones.
+    """
+    params = context['request'].GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    extra = f'&{params.urlencode()}' if params else ''
+
+    links = []
+    if getattr(page, 'is_cursor', False):
+        if page.has_previous():
+            links.append(_link('Previous', f'?cursor={page.previous_cursor}{extra}'))
+        links.append(_link(f'About {page.count} total'))
+        if page.has_next():
+            links.append(_link('Next', f'?cursor={page.next_cursor}{extra}'))
+        return {'label': label, 'links': links}
+
+    paginator = page.paginator
+    if page.has_previous():
+        links.append(_link('Previous', f'?page={page.previous_page_number()}{extra}'))
+    for number in paginator.get_elided_page_range(page.number, on_each_side=PAGE_WINDOW, on_ends=PAGE_ENDS):
+        if number == paginator.ELLIPSIS:
+            links.append(_link(number))
+        else:
+            links.append(_link(number, f'?page={number}{extra}', active=number == page.number))
+    if page.has_next():
+        links.append(_link('Next', f'?page={page.next_page_number()}{extra}'))
+    return {'label': label, 'links': links}
@@ -1,3 +1,1572 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User, Task, TaskStats, TaskTombstone, TaskDailyRollup, Job
+from .jobs import JOBS, claim_job, enqueue, job, renew_lease, work
+from .job_handlers import purge_job_files, purge_task_tombstones, schedule_rollup
+from .metrics import MetricsMiddleware, QueryBudgetExceeded, RequestMetrics, reset_metrics, record as record_metrics
+from .rollups import WATERMARK_OVERLAP, rollup_tasks
+from .stats import _add_to_stats, admin_stats, rebuild_task_stats
+from .pagination import KeysetPaginator
+from .filters import TaskFilterSet
+from .db_router import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
+from .utils import read_replica
+from .serializers import TaskSerializer, TaskReadPlan
+from .permissions import MANAGEABLE_IDS_TIMEOUT, manageable_user_ids, scoped_tasks
+from . import search
+
+
+class ReportExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user')
+        now = timezone.now()
+        for i in range(5):
+            Task.objects.create(
+                title=f'Task {i}',
+                description='desc',
+                assigned_to=cls.user,
+                created_by=cls.superadmin,
+                status='completed' if i < 3 else 'pending',
+                due_date=now - timedelta(days=i),
+                worked_hours=2,
+                completion_report='done, "quoted"',
+            )
+
+    def setUp(self):
+        self.client.force_login(self.superadmin)
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        self.enterContext(override_settings(JOB_FILES_DIR=files.name))
+
+    def export(self, **params):
+        response = self.client.get(reverse('reports'), dict(params))
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(work(burst=True), 1)
+        self.assertContains(self.client.get(reverse('job_detail', args=[job.pk])), 'Download')
+        response = self.client.get(reverse('job_download', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_csv_export_runs_in_background(self):
+        response = self.export(export='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('completed-tasks-', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,title,assigned_to,due_date,completed_at,worked_hours,completion_report')
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"done, ""quoted"""', lines[1])
+        self.assertEqual(os.listdir(settings.JOB_FILES_DIR), [Job.objects.get().result['file']])
+
+    def test_jsonl_gzip_export(self):
+        response = self.export(export='jsonl', compress='gzip')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]['assigned_to'], 'worker')
+
+    def test_export_links_keep_filters(self):
+        response = self.client.get(reverse('reports'), {'user': self.user.pk, 'page': 2})
+        self.assertContains(response, f'href="?user={self.user.pk}&amp;export=csv&amp;compress=gzip"')
+
+    def test_download_is_private(self):
+        self.export(export='csv')
+        self.client.force_login(self.user)
+        job = Job.objects.get()
+        self.assertEqual(self.client.get(reverse('job_download', args=[job.pk])).status_code, 404)
+
+    def test_export_of_deleted_requester_fails_without_retries(self):
+        job = enqueue('export_report', {'format': 'csv'})
+        with self.assertLogs('core.jobs', 'WARNING'):
+            work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn('no longer exists', job.error)
+
+    def test_expired_export_files_are_purged(self):
+        self.export(export='csv')
+        job = Job.objects.get()
+        self.assertEqual(purge_job_files(), 0)
+        with mock.patch('core.job_handlers.time.time', return_value=time.time() + settings.JOB_FILES_RETENTION + 1):
+            self.assertEqual(purge_job_files(), 1)
+        self.assertEqual(self.client.get(reverse('job_download', args=[job.pk])).status_code, 404)
+
+
+class JobQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+
+    def register(self, name, handler, max_attempts=2):
+        self.enterContext(mock.patch.dict(JOBS))
+        job(name, max_attempts=max_attempts)(handler)
+
+    def test_claim_is_exclusive(self):
+        enqueue('rebuild_task_stats')
+        claimed = claim_job('a')
+        self.assertEqual((claimed.status, claimed.attempts, claimed.locked_by), ('running', 1, 'a'))
+        self.assertIsNone(claim_job('b'))
+
+        # A worker that died mid-job loses it once the lease runs out.
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(claim_job('b').locked_by, 'b')
+
+    def test_running_job_renews_its_lease(self):
+        enqueue('rebuild_task_stats')
+        claimed = claim_job('a')
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(renew_lease(claimed))
+        self.assertIsNone(claim_job('b'))
+        claimed.locked_by = 'b'
+        self.assertFalse(renew_lease(claimed))
+
+    @override_settings(JOB_LEASE_SECONDS=0.03)
+    def test_lease_is_renewed_while_the_handler_runs(self):
+        self.register('slow', lambda job: time.sleep(0.1))
+        enqueue('slow')
+        with mock.patch('core.jobs.renew_lease', return_value=True) as renew:
+            self.assertEqual(work(burst=True), 1)
+        self.assertGreaterEqual(renew.call_count, 2)
+
+    def test_failed_attempts_are_retried_with_backoff(self):
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            if len(calls) == 1:
+                raise ValueError('boom')
+            return {'ok': True}
+
+        self.register('flaky', flaky)
+        queued = enqueue('flaky', {'n': 1})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(work(burst=True), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'queued')
+        self.assertIn('ValueError: boom', queued.error)
+        self.assertGreater(queued.run_after, timezone.now())
+        self.assertEqual(work(burst=True), 0)
+
+        Job.objects.update(run_after=timezone.now())
+        self.assertEqual(work(burst=True), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.result, calls), ('succeeded', {'ok': True}, [1, 2]))
+
+    def test_job_fails_after_max_attempts(self):
+        def broken(job):
+            raise ValueError('boom')
+
+        self.register('broken', broken, max_attempts=1)
+        failed = enqueue('broken')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            work(burst=True)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, 'failed')
+        self.assertIsNotNone(failed.finished_at)
+
+    def test_user_delete_runs_in_background(self):
+        self.client.force_login(self.superadmin)
+        Task.objects.create(title='t', description='d', assigned_to=self.user, created_by=self.admin, due_date=timezone.now())
+        response = self.client.post(reverse('user_delete', args=[self.user.id]))
+        self.assertRedirects(response, reverse('user_list'))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(Job.objects.get().name, 'delete_user')
+
+        work(burst=True)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(Job.objects.get().result, {'deleted': True, 'username': 'worker'})
+
+    def test_large_bulk_create_is_queued_and_polled(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        items = [{'title': f'Task {i}', 'description': 'd', 'assigned_to': self.user.id,
+                  'due_date': timezone.now().isoformat()} for i in range(3)]
+        with mock.patch('core.api_views.BULK_SYNC_MAX_ITEMS', 2):
+            response = self.client.post(reverse('task-bulk-create'), {'tasks': items},
+                                        content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Task.objects.exists())
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url, HTTP_AUTHORIZATION=f'Bearer {token}').json()['status'], 'queued')
+
+        work(burst=True)
+        body = self.client.get(status_url, HTTP_AUTHORIZATION=f'Bearer {token}').json()
+        self.assertEqual((body['status'], body['result']['status'], body['result']['created']), ('succeeded', 201, 3))
+        self.assertEqual(Task.objects.filter(created_by=self.admin).count(), 3)
+
+        other = RefreshToken.for_user(self.user).access_token
+        self.assertEqual(self.client.get(status_url, HTTP_AUTHORIZATION=f'Bearer {other}').status_code, 404)
+
+    def test_bulk_create_of_deleted_requester_fails_without_retries(self):
+        queued = enqueue('bulk_create_tasks', {'tasks': []})
+        with self.assertLogs('core.jobs', 'WARNING'):
+            work(burst=True)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 1))
+        self.assertIn('no longer exists', queued.error)
+
+
+class ReportSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.ann = User.objects.create_user('ann', password='pw', role='user', assigned_admin=cls.admin)
+        cls.bob = User.objects.create_user('bob', password='pw', role='user', assigned_admin=cls.admin)
+        other = User.objects.create_user('other', password='pw', role='user')
+        day = timezone.make_aware(datetime(2026, 3, 10, 12))
+        for user, due, completed, hours in (
+            (cls.ann, day, day - timedelta(hours=1), 2),
+            (cls.ann, day, day + timedelta(hours=1), 4),
+            (cls.ann, day + timedelta(days=1), day, None),
+            (cls.bob, day + timedelta(days=1), day, 3),
+            (other, day, day, 8),
+        ):
+            Task.objects.create(title='t', description='d', assigned_to=user, created_by=cls.admin, status='completed',
+                                due_date=due, completed_at=completed, worked_hours=hours, completion_report='done')
+        Task.objects.create(title='open', description='d', assigned_to=cls.ann, created_by=cls.admin, due_date=day)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_api_summary(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        # The user lookup for a claim-less token, the admin's user ids (cached
+        # afterwards), the rollup watermark check and one grouped query.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('task-report-summary'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report['totals'], {'tasks': 4, 'hours': 9.0, 'avg_hours': 3.0, 'min_hours': 2.0, 'max_hours': 4.0,
+                                            'on_time_rate': 0.75})
+        self.assertEqual(report['by_user'], [
+            {'user_id': self.ann.id, 'username': 'ann', 'tasks': 3, 'hours': 6.0, 'avg_hours': 3.0,
+             'min_hours': 2.0, 'max_hours': 4.0, 'on_time_rate': 0.6667},
+            {'user_id': self.bob.id, 'username': 'bob', 'tasks': 1, 'hours': 3.0, 'avg_hours': 3.0,
+             'min_hours': 3.0, 'max_hours': 3.0, 'on_time_rate': 1.0},
+        ])
+        self.assertEqual(report['by_day'], [
+            {'day': '2026-03-10', 'tasks': 2, 'hours': 6.0},
+            {'day': '2026-03-11', 'tasks': 2, 'hours': 3.0},
+        ])
+
+    def test_api_filters_and_permissions(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        response = self.client.get(reverse('task-report-summary'), {'user': self.bob.id, 'date_to': '2026-03-10'},
+                                   HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.json()['totals']['tasks'], 0)
+        response = self.client.get(reverse('task-report-summary'), {'date_from': 'March'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 400)
+        token = RefreshToken.for_user(self.ann).access_token
+        response = self.client.get(reverse('task-report-summary'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 403)
+
+    def test_reports_page_breakdown(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('reports'))
+        self.assertEqual(response.context['total_completed_tasks'], 4)
+        self.assertEqual(response.context['avg_hours_per_task'], 3)
+        self.assertEqual([row['username'] for row in response.context['report']['by_user']], ['ann', 'bob'])
+        self.assertEqual(response.context['tasks'].paginator.count, 4)
+        self.assertContains(response, 'Breakdown by User')
+
+
+class TaskRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.other_admin = User.objects.create_user('lead2', password='pw', role='admin')
+        cls.ann = User.objects.create_user('ann', password='pw', role='user', assigned_admin=cls.admin)
+        cls.bob = User.objects.create_user('bob', password='pw', role='user', assigned_admin=cls.admin)
+        now = timezone.now()
+        cls.past = now - timedelta(days=3)
+        for user, due, hours, late in ((cls.ann, cls.past, 2, False), (cls.ann, cls.past, 5, True),
+                                       (cls.bob, cls.past, None, False), (cls.ann, now, 1, False)):
+            Task.objects.create(title='t', description='d', assigned_to=user, created_by=cls.admin, status='completed',
+                                due_date=due, completed_at=due + timedelta(hours=1 if late else -1), worked_hours=hours,
+                                completion_report='done')
+        # Pretend the tasks were last touched well before any rollup run.
+        Task.objects.update(updated_at=now - timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rollup_rows(self):
+        self.assertEqual(rollup_tasks(), (2, 3))
+        ann = TaskDailyRollup.objects.get(assigned_to=self.ann, day=timezone.localdate(self.past))
+        self.assertEqual((ann.admin_id, ann.completed, ann.late, ann.worked_hours_count), (self.admin.id, 2, 1, 2))
+        self.assertEqual((ann.worked_hours_sum, ann.worked_hours_min, ann.worked_hours_max), (7, 2, 5))
+        # Running again over the same window changes nothing.
+        rollup_tasks(full=True)
+        self.assertEqual(TaskDailyRollup.objects.count(), 3)
+        self.assertEqual(TaskDailyRollup.objects.get(assigned_to=self.ann, day=ann.day).completed, 2)
+
+    def test_incremental_run_only_touches_changed_assignees(self):
+        rollup_tasks()
+        TaskDailyRollup.objects.filter(assigned_to=self.bob).update(completed=99)
+        task = Task.objects.filter(assigned_to=self.ann, due_date=self.past).first()
+        task.status = 'in_progress'
+        task.save()
+        self.assertEqual(rollup_tasks(), (1, 2))
+        self.assertEqual(TaskDailyRollup.objects.get(assigned_to=self.ann, day=timezone.localdate(self.past)).completed, 1)
+        self.assertEqual(TaskDailyRollup.objects.get(assigned_to=self.bob).completed, 99)
+
+    def test_reassigned_task_leaves_old_assignee(self):
+        rollup_tasks()
+        task = Task.objects.filter(assigned_to=self.ann, due_date=self.past).first()
+        task.assigned_to = self.bob
+        task.save()
+        self.assertEqual(rollup_tasks(), (2, 3))
+        self.assertEqual(TaskDailyRollup.objects.get(assigned_to=self.ann, day=timezone.localdate(self.past)).completed, 1)
+        self.assertEqual(TaskDailyRollup.objects.get(assigned_to=self.bob).completed, 2)
+
+    def test_admin_reassignment_moves_rollups(self):
+        rollup_tasks()
+        self.bob.assigned_admin = self.other_admin
+        self.bob.save()
+        self.assertEqual(TaskDailyRollup.objects.get(assigned_to=self.bob).admin_id, self.other_admin.id)
+        self.assertEqual(TaskDailyRollup.objects.visible_to(self.admin).count(), 2)
+
+    def test_rollups_are_scheduled_once(self):
+        queued = schedule_rollup()
+        self.assertEqual(queued.name, 'rollup_tasks')
+        self.assertIsNone(schedule_rollup())
+        work(burst=True)
+        self.assertEqual(Job.objects.get().result, {'assignees': 2, 'rows': 3})
+        self.assertIsNotNone(schedule_rollup())
+
+    def test_reports_read_rollups_for_full_days(self):
+        rollup_tasks()
+        # A stale rollup shows the report reads it instead of core_task.
+        TaskDailyRollup.objects.filter(assigned_to=self.bob).update(completed=4)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('reports'))
+        self.assertEqual(response.context['total_completed_tasks'], 7)
+        self.assertEqual(response.context['tasks'].paginator.count, 4)
+
+        token = RefreshToken.for_user(self.admin).access_token
+        response = self.client.get(reverse('task-analytics'), {'date_from': timezone.localdate(self.past).isoformat()},
+                                   HTTP_AUTHORIZATION=f'Bearer {token}')
+        days = response.json()['days']
+        self.assertEqual([(row['username'], row['tasks'], row['late']) for row in days],
+                         [('ann', 2, 1), ('bob', 4, 0), ('ann', 1, 0)])
+        self.assertEqual(days[-1]['day'], timezone.localdate().isoformat())
+
+        response = self.client.get(reverse('task-report-summary'), {'user': self.ann.id, 'status': 'pending'},
+                                   HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.json()['totals']['tasks'], 0)
+
+        # Rollups keep no updated_at, so updated_since is answered from the tasks.
+        since = (timezone.now() - timedelta(days=30)).isoformat()
+        response = self.client.get(reverse('task-analytics'), {'updated_since': since},
+                                   HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(sum(row['tasks'] for row in response.json()['days']), 4)
+
+
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user')
+        Task.objects.create(title='t', description='d', assigned_to=cls.user, created_by=cls.superadmin, due_date=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+    def request_metrics(self, *args, **kwargs):
+        with mock.patch('core.metrics.record', wraps=record_metrics) as record:
+            response = self.client.get(*args, **kwargs)
+        view, metrics, duration = record.call_args.args
+        return response, view, metrics
+
+    def test_html_view_timings(self):
+        self.client.force_login(self.superadmin)
+        response, view, metrics = self.request_metrics(reverse('task_list'))
+        self.assertEqual(view, 'task_list')
+        self.assertGreater(metrics.queries, 0)
+        self.assertGreater(metrics.template_time, 0)
+        self.assertEqual(metrics.serialize_time, 0)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn(f'desc="{metrics.queries} queries"', response['Server-Timing'])
+
+    def test_api_view_timings(self):
+        token = RefreshToken.for_user(self.user).access_token
+        response, view, metrics = self.request_metrics(reverse('task-list'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(view, 'task-list')
+        self.assertGreater(metrics.serialize_time, 0)
+        self.assertIn('ser;dur=', response['Server-Timing'])
+
+    def test_duplicate_queries_are_fingerprinted(self):
+        metrics = RequestMetrics()
+        execute = mock.Mock()
+        for sql in ['SELECT * FROM t WHERE id = %s'] * 3 + ['SELECT * FROM t WHERE id IN (%s, %s)', 'SELECT * FROM t WHERE id IN (%s)']:
+            metrics(execute, sql, (), False, {})
+        self.assertEqual((metrics.queries, metrics.duplicate_queries), (5, 3))
+        self.assertEqual(metrics.repeated(3), [('SELECT * FROM t WHERE id = %s', 3)])
+
+    @override_settings(QUERY_BUDGETS={'task_list': 1})
+    def test_query_budget_fails_tests(self):
+        self.client.force_login(self.superadmin)
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'over its budget of 1'):
+            self.client.get(reverse('task_list'))
+
+    def test_prometheus_endpoint(self):
+        self.client.force_login(self.superadmin)
+        self.client.get(reverse('task_list'))
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_queries_count{view="task_list"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="task_list",le="+Inf"} 1', body)
+
+    def test_prometheus_endpoint_needs_the_token(self):
+        # Loopback alone is not enough, and neither is a wrong token.
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 404)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+            with override_settings(METRICS_ALLOWED_IPS=['10.0.0.1']):
+                response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.2', HTTP_AUTHORIZATION='Bearer secret')
+                self.assertEqual(response.status_code, 404)
+                response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer secret')
+                self.assertEqual(response.status_code, 200)
+
+    async def test_async_middleware_records_queries(self):
+        async def view(request):
+            await Task.objects.acount()
+            return HttpResponse()
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get('/')
+        with mock.patch('core.metrics.record') as record:
+            response = await middleware(request)
+        view, metrics, duration = record.call_args.args
+        self.assertEqual(metrics.queries, 1)
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+
+class DashboardQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.users = [
+            User.objects.create_user(f'worker{i}', password='pw', role='user', assigned_admin=cls.admin)
+            for i in range(3)
+        ]
+
+    def add_tasks(self, count):
+        now = timezone.now()
+        for i in range(count):
+            Task.objects.create(
+                title=f'Task {i}',
+                description='desc',
+                assigned_to=self.users[i % len(self.users)],
+                created_by=self.admin,
+                status=('pending', 'in_progress', 'completed')[i % 3],
+                due_date=now,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertDashboardQueries(self, user, url_name, num):
+        # User lists come from the cache once warm; task changes still show up.
+        self.client.force_login(user)
+        self.client.get(reverse(url_name))
+        for count in (1, 30):
+            self.add_tasks(count)
+            with self.assertNumQueries(num):
+                response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 200)
+
+    def test_superadmin_dashboard(self):
+        self.assertDashboardQueries(self.superadmin, 'superadmin_dashboard', 5)
+
+    def test_admin_dashboard(self):
+        self.assertDashboardQueries(self.admin, 'admin_dashboard', 4)
+
+    def test_user_dashboard(self):
+        self.assertDashboardQueries(self.users[0], 'user_dashboard', 4)
+
+    def test_cached_dashboard_lists_follow_user_changes(self):
+        self.add_tasks(1)
+        self.client.force_login(self.superadmin)
+        response = self.client.get(reverse('superadmin_dashboard'))
+        self.assertNotIn('password', response.context['recent_users'][0])
+        self.assertContains(response, 'worker0')
+
+        self.users[0].username = 'renamed'
+        self.users[0].save()
+        response = self.client.get(reverse('superadmin_dashboard'))
+        self.assertEqual(response.context['recent_tasks'][0].assigned_to.username, 'renamed')
+
+    def test_admin_dashboard_counters(self):
+        self.add_tasks(7)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.context['assigned_users_count'], 3)
+        self.assertEqual(response.context['user_task_count'], 7)
+        self.assertEqual(response.context['pending_user_tasks'], 3)
+        self.assertEqual(response.context['completed_user_tasks'], 2)
+
+    def test_cached_users_invalidated_on_save(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(len(response.context['assigned_users']), 3)
+        User.objects.create_user('worker9', password='pw', role='user', assigned_admin=self.admin)
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(len(response.context['assigned_users']), 4)
+        response = self.client.get(reverse('task_create'))
+        self.assertContains(response, 'worker9')
+
+
+class TaskStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.other_admin = User.objects.create_user('lead2', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+
+    def counters(self, scope, owner=None):
+        return TaskStats.objects.filter(scope=scope, owner=owner).values_list('pending', 'in_progress', 'completed').first()
+
+    def snapshot(self):
+        return {
+            'user': self.counters('user', self.user),
+            'admin': self.counters('admin', self.admin),
+            'other_admin': self.counters('admin', self.other_admin),
+            'global': self.counters('global'),
+        }
+
+    def make_task(self, status='pending'):
+        return Task.objects.create(
+            title='Task', description='desc', assigned_to=self.user,
+            created_by=self.admin, status=status, due_date=timezone.now(),
+        )
+
+    def test_counters_follow_status_transitions(self):
+        task = self.make_task()
+        self.make_task(status='completed')
+        self.assertEqual(self.counters('user', self.user), (1, 0, 1))
+
+        self.client.force_login(self.user)
+        self.client.post(reverse('task_update_status'), {'task_id': task.id, 'status': 'in_progress'})
+        self.assertEqual(self.counters('user', self.user), (0, 1, 1))
+        self.assertEqual(self.counters('admin', self.admin), (0, 1, 1))
+        self.assertEqual(self.counters('global'), (0, 1, 1))
+
+        Task.objects.get(pk=task.pk).delete()
+        self.assertEqual(self.counters('global'), (0, 0, 1))
+
+    def test_reassigning_admin_moves_rollup(self):
+        self.make_task()
+        self.user.assigned_admin = self.other_admin
+        self.user.save()
+        self.assertEqual(self.counters('admin', self.admin), (0, 0, 0))
+        self.assertEqual(self.counters('admin', self.other_admin), (1, 0, 0))
+
+    def test_admin_counts_plain_users_only(self):
+        self.make_task()
+        self.user.role = 'admin'
+        self.user.save()
+        self.assertEqual(self.counters('admin', self.admin), (0, 0, 0))
+        self.make_task(status='completed')
+        self.assertEqual(self.counters('admin', self.admin), (0, 0, 0))
+        self.assertEqual(self.counters('user', self.user), (1, 0, 1))
+
+        rebuild_task_stats()
+        self.assertEqual(admin_stats(self.admin)['user_task_count'], 0)
+        self.assertEqual(self.counters('user', self.user), (1, 0, 1))
+
+        self.user.role = 'user'
+        self.user.save()
+        self.assertEqual(self.counters('admin', self.admin), (1, 0, 1))
+
+    def test_rebuild_matches_incremental_counters(self):
+        for status in ('pending', 'pending', 'in_progress', 'completed'):
+            self.make_task(status=status)
+        incremental = self.snapshot()
+        rebuild_task_stats()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_backfill_migration_rebuilds_counters(self):
+        for status in ('pending', 'in_progress', 'completed'):
+            self.make_task(status=status)
+        incremental = self.snapshot()
+        TaskStats.objects.all().delete()
+        backfill = import_module('core.migrations.0011_backfill_task_stats')
+        backfill.rebuild_task_stats(django_apps, mock.Mock(connection=connection))
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_lost_create_race_adds_to_the_existing_row(self):
+        TaskStats.objects.create(scope='user', owner=self.user, pending=2)
+        real_update = QuerySet.update
+        calls = []
+
+        def update(queryset, **kwargs):
+            # The first update runs before the other request's row exists.
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update):
+            _add_to_stats('user', self.user.pk, {'pending': 1})
+        self.assertEqual(self.counters('user', self.user), (3, 0, 0))
+
+
+class ListingQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.admins = [User.objects.create_user(f'lead{i}', password='pw', role='admin') for i in range(3)]
+        cls.users = [
+            User.objects.create_user(f'worker{i}', password='pw', role='user', assigned_admin=cls.admins[i % 3])
+            for i in range(12)
+        ]
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                description='desc',
+                assigned_to=cls.users[i % len(cls.users)],
+                created_by=cls.superadmin,
+                status='completed' if i % 2 else 'pending',
+                due_date=now,
+                worked_hours=1,
+                completion_report='done' if i % 2 else None,
+            )
+            for i in range(40)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def assertPageQueries(self, user, url_name, num):
+        self.client.force_login(user)
+        with self.assertNumQueries(num):
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_task_list(self):
+        response = self.assertPageQueries(self.superadmin, 'task_list', 4)
+        self.assertContains(response, 'worker')
+        # The admin's user ids are resolved once, then come from the cache.
+        self.assertPageQueries(self.admins[0], 'task_list', 5)
+        self.assertPageQueries(self.admins[0], 'task_list', 4)
+
+    def test_reports(self):
+        self.assertPageQueries(self.superadmin, 'reports', 7)
+
+    def test_user_list(self):
+        self.assertPageQueries(self.superadmin, 'user_list', 4)
+
+    def test_admin_list(self):
+        self.assertPageQueries(self.superadmin, 'admin_list', 5)
+
+    def test_api_task_list(self):
+        token = RefreshToken.for_user(self.users[0]).access_token
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('task-list'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['assigned_to_username'], 'worker0')
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user')
+        # bulk_create stamps every row with the same created_at, so the id
+        # tiebreaker decides the order.
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='desc', assigned_to=cls.user, created_by=cls.superadmin,
+                 due_date=timezone.now())
+            for i in range(25)
+        ])
+
+    def test_walks_all_rows_forward_and_back(self):
+        paginator = KeysetPaginator(Task.objects.all(), ('-created_at', '-id'), 10)
+        expected = list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([task.id for page in pages for task in page], expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual([task.id for task in previous], expected[10:20])
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual([task.id for task in first], expected[:10])
+        self.assertFalse(first.has_previous())
+
+    def test_task_list_cursor_mode(self):
+        self.client.force_login(self.superadmin)
+        response = self.client.get(reverse('task_list'), {'cursor': ''})
+        self.assertTrue(response.context['tasks'].is_cursor)
+        self.assertContains(response, 'About 25 total')
+        response = self.client.get(reverse('task_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.context['tasks']), 10)
+
+
+class ListingTemplateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user')
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='desc', assigned_to=cls.user, created_by=cls.superadmin,
+                 status='pending', due_date=timezone.now())
+            for i in range(300)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.superadmin)
+
+    def test_page_range_is_windowed(self):
+        response = self.client.get(reverse('task_list'), {'page': 15, 'status': 'pending', 'tag': 'a&b'})
+        links = response.context['links']
+        self.assertEqual([link['text'] for link in links],
+                         ['Previous', 1, '…', 13, 14, 15, 16, 17, '…', 30, 'Next'])
+        self.assertEqual([link['text'] for link in links if link['active']], [15])
+        # The other parameters are kept, encoded, and page is not repeated.
+        self.assertContains(response, 'href="?page=16&amp;status=pending&amp;tag=a%26b"')
+
+    def test_cursor_links(self):
+        response = self.client.get(reverse('task_list'), {'cursor': '', 'status': 'pending'})
+        texts = [link['text'] for link in response.context['links']]
+        self.assertEqual(texts, ['About 300 total', 'Next'])
+        self.assertContains(response, '&amp;status=pending">Next</a>')
+
+    def test_cursor_listing_for_admin_without_users(self):
+        admin = User.objects.create_user('lonely', password='pw', role='admin')
+        self.client.force_login(admin)
+        for name in ('task_list', 'reports'):
+            response = self.client.get(reverse(name), {'cursor': ''})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['tasks'].count, 0)
+
+    def test_admin_list_cursor_links_are_encoded(self):
+        User.objects.bulk_create([User(username=f'lead{i}', role='admin') for i in range(12)])
+        response = self.client.get(reverse('admin_list'), {'cursor': '', 'status': 'x&role=user'})
+        self.assertContains(response, '&amp;status=x%26role%3Duser">Next</a>')
+        self.assertNotContains(response, '&role=user')
+
+    def test_cached_rows_follow_changes(self):
+        task = Task.objects.order_by('-created_at', '-id').first()
+        self.assertContains(self.client.get(reverse('task_list')), f'{task.title}</td>')
+        task.title = 'Renamed task'
+        task.save()
+        self.user.username = 'renamed-worker'
+        self.user.save()
+        response = self.client.get(reverse('task_list'))
+        self.assertContains(response, 'Renamed task</td>')
+        self.assertContains(response, 'renamed-worker</td>')
+
+    def test_rows_depend_on_role(self):
+        self.client.get(reverse('task_list'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_list'))
+        self.assertContains(response, 'Update Status')
+        self.assertNotContains(response, 'bi-trash')
+
+
+class TaskListApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='long text ' * 50, assigned_to=cls.user, created_by=cls.admin,
+                 status='completed' if i % 2 else 'pending', due_date=now + timedelta(days=i % 3))
+            for i in range(12)
+        ])
+
+    def get(self, **params):
+        token = RefreshToken.for_user(self.user).access_token
+        return self.client.get(reverse('task-list'), params, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_unpaginated_response_is_unchanged(self):
+        response = self.get()
+        self.assertEqual(len(response.json()), 12)
+        self.assertIn('description', response.json()[0])
+
+    def test_cursor_pages_with_filters_and_sparse_fields(self):
+        response = self.get(status='pending', page_size=4, fields='id,title,assigned_to_username')
+        body = response.json()
+        self.assertEqual(len(body['results']), 4)
+        self.assertEqual(set(body['results'][0]), {'id', 'title', 'assigned_to_username'})
+        self.assertEqual(body['results'][0]['assigned_to_username'], 'worker')
+
+        body = self.get(status='pending', page_size=4, fields='id,title', cursor=body['next']).json()
+        self.assertEqual(len(body['results']), 2)
+        self.assertIsNone(body['next'])
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.get(fields='id,password').status_code, 400)
+        self.assertEqual(self.get(status='done').status_code, 400)
+        self.assertEqual(self.get(updated_since='yesterday').status_code, 400)
+        self.assertEqual(self.get(cursor='garbage').status_code, 400)
+
+    def test_updated_since(self):
+        future = (timezone.now() + timedelta(hours=1)).isoformat()
+        self.assertEqual(self.get(updated_since=future).json(), [])
+
+
+class AsyncTaskApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        now = timezone.now()
+        cls.tasks = [
+            Task.objects.create(title=f'Task {i}', description='desc', assigned_to=cls.user, created_by=cls.admin,
+                                status='completed' if i % 2 else 'pending', due_date=now,
+                                worked_hours=2 if i % 2 else None, completion_report='done' if i % 2 else None)
+            for i in range(6)
+        ]
+
+    def auth(self, user):
+        return {'headers': {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}}
+
+    async def test_list_matches_sync_view(self):
+        params = {'status': 'pending', 'page_size': 2, 'fields': 'id,title,due_date'}
+        response = await self.async_client.get(reverse('async-task-list'), params, **self.auth(self.user))
+        sync_response = await sync_to_async(self.client.get)(reverse('task-list'), params, **self.auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertIn('ETag', response)
+
+        full = await self.async_client.get(reverse('async-task-list'), **self.auth(self.user))
+        self.assertEqual(len(full.json()), 6)
+
+    async def test_requires_token(self):
+        response = await self.async_client.get(reverse('async-task-list'))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(reverse('async-task-list'), headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_detail_and_update(self):
+        url = reverse('async-task-detail', args=[self.tasks[0].id])
+        response = await self.async_client.get(url, **self.auth(self.user))
+        self.assertEqual(response.json()['assigned_to_username'], 'worker')
+        response = await self.async_client.put(url, {'status': 'in_progress'}, content_type='application/json',
+                                                **self.auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        task = await Task.objects.aget(id=self.tasks[0].id)
+        self.assertEqual(task.status, 'in_progress')
+        self.assertIsNotNone(task.started_at)
+
+        other = await self.async_client.get(url, **self.auth(self.admin))
+        self.assertEqual(other.status_code, 404)
+
+    async def test_report_matches_sync_view(self):
+        url_args = [self.tasks[1].id]
+        response = await self.async_client.get(reverse('async-task-report', args=url_args), **self.auth(self.admin))
+        sync_response = await sync_to_async(self.client.get)(reverse('task-report', args=url_args), **self.auth(self.admin))
+        self.assertEqual(response.json(), sync_response.json())
+        response = await self.async_client.get(reverse('async-task-report', args=url_args), **self.auth(self.user))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_login(self):
+        response = await self.async_client.post(reverse('async-login'), {'username': 'worker', 'password': 'pw'},
+                                                 content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'worker')
+        response = await self.async_client.post(reverse('async-login'), {'username': 'worker', 'password': 'x'},
+                                                 content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class StatelessJwtAuthTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        Task.objects.create(title='Task', description='desc', assigned_to=cls.user, created_by=cls.admin,
+                            due_date=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        response = self.client.post('/api/v1/login/', {'username': 'worker', 'password': 'pw'})
+        return {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}"}
+
+    def test_claims_skip_user_lookup(self):
+        auth = self.login()
+        self.client.get(reverse('task-list'), **auth)
+        # Warm state cache: only the ETag aggregates and the row query remain.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('task-list'), **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+    def test_deactivation_takes_effect(self):
+        auth = self.login()
+        self.assertEqual(self.client.get(reverse('task-list'), **auth).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('task-list'), **auth).status_code, 401)
+        self.assertEqual(self.client.get(reverse('async-task-list'), **auth).status_code, 401)
+
+    def test_role_change_invalidates_token(self):
+        auth = self.login()
+        self.user.role = 'admin'
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('task-list'), **auth).status_code, 401)
+
+
+class LoginHardeningTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('worker', password='pw', role='user')
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, password, url='/api/v1/login/', ip='127.0.0.1'):
+        return self.client.post(url, {'username': 'worker', 'password': password}, content_type='application/json',
+                                REMOTE_ADDR=ip)
+
+    @override_settings(LOGIN_THROTTLE_USERNAME_LIMIT=2)
+    def test_throttle_refuses_without_hashing(self):
+        self.assertEqual(self.post('wrong').status_code, 400)
+        self.assertEqual(self.post('wrong').status_code, 400)
+        with mock.patch('django.contrib.auth.hashers.Argon2PasswordHasher.verify') as verify:
+            self.assertEqual(self.post('pw').status_code, 429)
+            self.assertEqual(self.post('pw', '/api/v1/async/login/').status_code, 429)
+        verify.assert_not_called()
+
+    @override_settings(LOGIN_THROTTLE_USERNAME_LIMIT=2, LOGIN_THROTTLE_IP_LIMIT=3)
+    def test_failures_from_another_client_do_not_lock_the_user_out(self):
+        self.post('wrong', ip='10.0.0.9')
+        self.post('wrong', ip='10.0.0.9')
+        self.assertEqual(self.post('pw', ip='10.0.0.9').status_code, 429)
+        self.assertEqual(self.post('pw').status_code, 200)
+        # The per-IP limit still covers guessing across usernames.
+        self.client.post('/api/v1/login/', {'username': 'other', 'password': 'x'}, content_type='application/json',
+                         REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(self.client.post('/api/v1/login/', {'username': 'third', 'password': 'x'},
+                                          content_type='application/json', REMOTE_ADDR='10.0.0.9').status_code, 429)
+
+    def test_success_clears_failures(self):
+        with override_settings(LOGIN_THROTTLE_USERNAME_LIMIT=2):
+            self.post('wrong')
+            self.assertEqual(self.post('pw').status_code, 200)
+            self.post('wrong')
+            self.assertEqual(self.post('pw').status_code, 200)
+
+    @override_settings(LOGIN_THROTTLE_USERNAME_LIMIT=2)
+    def test_async_login_shares_the_throttle(self):
+        with mock.patch('core.login.cache.incr') as incr, mock.patch('core.login.cache.get_many') as get_many:
+            self.assertEqual(self.post('wrong', '/api/v1/async/login/').status_code, 400)
+            self.assertEqual(self.post('pw', '/api/v1/async/login/').status_code, 200)
+            self.assertEqual(self.post('wrong', '/api/v1/async/login/').status_code, 400)
+            self.assertEqual(self.post('wrong', '/api/v1/async/login/').status_code, 400)
+        # The async view only used the async cache API.
+        incr.assert_not_called()
+        get_many.assert_not_called()
+        self.assertEqual(self.post('pw').status_code, 429)
+
+    def test_legacy_hash_upgraded_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('pw', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.post('pw').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$argon2id$'))
+
+    def test_async_login_upgrades_hash(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('pw', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.post('wrong', '/api/v1/async/login/').status_code, 400)
+        response = self.post('pw', '/api/v1/async/login/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'worker')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$argon2id$'))
+
+
+class DatabaseProfileTests(TestCase):
+
+    def test_sqlite_pragmas_applied(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite profile only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL with DB_SQLITE_WAL=1, SQLite's FULL default otherwise.
+            self.assertEqual(cursor.fetchone()[0], 1 if settings.DB_SQLITE_WAL else 2)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class ReplicaRoutingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('worker', password='pw', role='user')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.seen = []
+        self.middleware = ReplicaRoutingMiddleware(self.get_response)
+        self.middleware.replicas = ['replica1']
+        # TestCase wraps every test in atomic(); pretend we are outside it.
+        patcher = mock.patch.object(connection, 'in_atomic_block', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_response(self, request):
+        # What the handler does inside the middleware: process_view, then the view.
+        self.middleware.process_view(request, self.view, (), {})
+        self.seen.append(self.router.db_for_read(Task))
+        return HttpResponse(status=200)
+
+    def request(self, method='get', flagged=True, **cookies):
+        request = getattr(self.factory, method)('/')
+        request.user = self.user
+        request.COOKIES.update(cookies)
+        self.view = read_replica(lambda request: None) if flagged else (lambda request: None)
+        return self.middleware(request)
+
+    def test_reads_of_marked_views_go_to_replica(self):
+        self.request()
+        self.request(flagged=False)
+        self.assertEqual(self.seen, ['replica1', None])
+        self.assertIsNone(self.router.db_for_read(Task))
+        self.assertEqual(self.router.db_for_write(Task), 'default')
+
+    def test_write_pins_client_to_primary(self):
+        response = self.request('post', flagged=False)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.request()
+        self.request(**{PIN_COOKIE: '1'})
+        self.assertEqual(self.seen[1:], ['default', 'default'])
+
+    def test_reads_inside_transaction_use_primary(self):
+        with mock.patch.object(connection, 'in_atomic_block', True):
+            self.request()
+        self.assertEqual(self.seen, ['default'])
+
+    async def test_async_stack_routes_and_pins(self):
+        async def get_response(request):
+            # Django runs a sync process_view on a worker thread under ASGI.
+            await sync_to_async(middleware.process_view)(request, read_replica(lambda request: None), (), {})
+            self.seen.append(self.router.db_for_read(Task))
+            return HttpResponse(status=200)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware.replicas = ['replica1']
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = self.factory.get('/')
+        request.user = self.user
+        await middleware(request)
+        self.assertEqual(self.seen, ['replica1'])
+        self.assertIsNone(self.router.db_for_read(Task))
+
+        request = self.factory.post('/')
+        request.user = self.user
+        response = await middleware(request)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(await cache.aget(f'db:pin:{self.user.pk}'))
+
+
+class TaskFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        day = timezone.make_aware(datetime(2026, 3, 10))
+        for title, due in (('before', day - timedelta(seconds=1)), ('start', day), ('end', day + timedelta(hours=23, minutes=59)),
+                           ('after', day + timedelta(days=1))):
+            Task.objects.create(title=title, description='d', assigned_to=cls.user, created_by=cls.admin,
+                                status='completed', due_date=due, worked_hours=1, completion_report='done')
+
+    def titles(self, **params):
+        return set(TaskFilterSet(params).filter(Task.objects.all()).values_list('title', flat=True))
+
+    def test_day_is_half_open(self):
+        self.assertEqual(self.titles(due_date='2026-03-10'), {'start', 'end'})
+        self.assertEqual(self.titles(date_from='2026-03-10', date_to='2026-03-10'), {'start', 'end'})
+        self.assertEqual(self.titles(date_from='2026-03-10'), {'start', 'end', 'after'})
+        self.assertEqual(self.titles(date_to='2026-03-09'), {'before'})
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_days_follow_current_timezone(self):
+        # The local 10th is 18:30 on the 9th to 18:30 on the 10th in UTC.
+        self.assertEqual(self.titles(due_date='2026-03-10'), {'before', 'start'})
+
+    def test_last_representable_day_is_open_ended(self):
+        self.assertEqual(self.titles(due_date='9999-12-31'), set())
+        self.assertEqual(self.titles(date_to='9999-12-31'), {'before', 'start', 'end', 'after'})
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('reports'), {'date_to': '9999-12-31'}).status_code, 200)
+        token = RefreshToken.for_user(self.user).access_token
+        response = self.client.get(reverse('task-list'), {'due_date': '9999-12-31'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.json(), [])
+
+    def test_invalid_values_are_reported(self):
+        task_filter = TaskFilterSet({'due_date': '10/03/2026', 'assigned_to': 'me'})
+        self.assertEqual(task_filter.filter(Task.objects.all()).count(), 4)
+        self.assertEqual(task_filter.errors, ["assigned_to must be a user id.", "due_date must be YYYY-MM-DD."])
+
+    def test_views_use_the_same_filters(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('task_list'), {'due_date': '2026-03-10'})
+        self.assertEqual({task.title for task in response.context['tasks']}, {'start', 'end'})
+        response = self.client.get(reverse('reports'), {'date_from': '2026-03-10', 'date_to': '2026-03-10'})
+        self.assertEqual({task.title for task in response.context['tasks']}, {'start', 'end'})
+        token = RefreshToken.for_user(self.user).access_token
+        response = self.client.get(reverse('task-list'), {'due_date': '2026-03-10'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual({task['title'] for task in response.json()}, {'start', 'end'})
+
+
+class QueryPlanTests(TestCase):
+    """Hot list queries must be served by an index in their final order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.users = [
+            User.objects.create_user(f'worker{i}', password='pw', role='user', assigned_admin=cls.admin)
+            for i in range(5)
+        ]
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='desc', assigned_to=cls.users[i % 5], created_by=cls.admin,
+                 status=('pending', 'in_progress', 'completed')[i % 3], due_date=now)
+            for i in range(60)
+        ])
+
+    def assertIndexed(self, queryset, allow_sort=False):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite syntax')
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            if ' SCAN ' in f' {line} ':
+                self.assertIn('USING', line, plan)
+        if not allow_sort:
+            self.assertNotIn('TEMP B-TREE', plan)
+        return plan
+
+    def test_task_lists(self):
+        user = self.users[0]
+        ordering = ('-created_at', '-id')
+        self.assertIndexed(Task.objects.visible_to(self.superadmin).for_listing().order_by(*ordering)[:10])
+        plan = self.assertIndexed(Task.objects.visible_to(user).for_listing().order_by(*ordering)[:10])
+        self.assertIn('task_assignee_created_idx', plan)
+        plan = self.assertIndexed(Task.objects.filter(assigned_to_id=user.id, status='pending').order_by(*ordering)[:10])
+        self.assertIn('task_assignee_status_idx', plan)
+        # An admin's tasks span several assignees, so only the sort remains.
+        self.assertIndexed(Task.objects.visible_to(self.admin).for_listing().order_by(*ordering)[:10], allow_sort=True)
+
+    def test_reports(self):
+        completed = Task.objects.filter(status='completed').for_report()
+        plan = self.assertIndexed(completed.order_by('-due_date', '-id')[:10])
+        self.assertIn('task_completed_due_idx', plan)
+        plan = self.assertIndexed(completed.filter(assigned_to_id=self.users[0].id).order_by('-due_date', '-id')[:10])
+        self.assertIn('task_completed_assignee_idx', plan)
+
+    def test_due_date_filters_use_index(self):
+        day = timezone.localdate()
+        sargable = TaskFilterSet({'due_date': day.isoformat()}).filter(Task.objects.all())
+        plan = self.assertIndexed(sargable, allow_sort=True)
+        self.assertIn('task_due_idx (due_date>? AND due_date<?)', plan)
+        self.assertIn('SCAN core_task', Task.objects.filter(due_date__date=day).explain())
+
+        reports = TaskFilterSet({'date_from': day.isoformat(), 'date_to': day.isoformat()}).filter(
+            Task.objects.filter(status='completed'))
+        plan = self.assertIndexed(reports.order_by('-due_date', '-id')[:10])
+        self.assertIn('task_completed_due_idx (due_date>? AND due_date<?)', plan)
+
+    def test_etag_summary_is_index_only(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite syntax')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN SELECT COUNT(id), MAX(updated_at) FROM core_task WHERE assigned_to_id = %s',
+                           [self.users[0].id])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('COVERING INDEX task_assignee_updated_idx', plan)
+
+    def test_user_lists(self):
+        ordering = ('-date_joined', '-id')
+        users = User.objects.filter(role='user', is_superuser=False)
+        self.assertIndexed(users.for_listing().order_by(*ordering)[:10])
+        plan = self.assertIndexed(users.filter(is_active=True).order_by(*ordering)[:10])
+        self.assertIn('user_active_role_joined_idx', plan)
+        self.assertIndexed(User.objects.filter(role='admin').order_by(*ordering)[:10])
+        plan = self.assertIndexed(User.objects.managed_by(self.admin).order_by(*ordering))
+        self.assertIn('user_admin_role_joined_idx', plan)
+
+
+class TaskSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        cls.other = User.objects.create_user('other', password='pw', role='user', assigned_admin=cls.admin)
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='desc', assigned_to=self.user,
+                                created_by=self.admin, due_date=timezone.now())
+            for i in range(3)
+        ]
+
+    def test_list_and_detail_return_304_when_unchanged(self):
+        response = self.client.get(reverse('task-list'), **self.auth)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+
+        self.tasks[0].title = 'Renamed'
+        self.tasks[0].save()
+        response = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        url = reverse('task-detail', args=[self.tasks[1].id])
+        etag = self.client.get(url, **self.auth)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth).status_code, 304)
+
+    def test_sync_reports_changes_and_removals_since_watermark(self):
+        body = self.client.get(reverse('task-sync'), **self.auth).json()
+        self.assertEqual(len(body['changed']), 3)
+        watermark = body['watermark']
+
+        removed_id = self.tasks[1].id
+        self.tasks[0].status = 'in_progress'
+        self.tasks[0].save()
+        self.tasks[1].delete()
+        self.tasks[2].assigned_to = self.other
+        self.tasks[2].save()
+
+        body = self.client.get(reverse('task-sync'), {'since': watermark}, **self.auth).json()
+        self.assertEqual([task['id'] for task in body['changed']], [self.tasks[0].id])
+        self.assertEqual(body['deleted'], sorted([removed_id, self.tasks[2].id]))
+
+    def test_watermark_overlaps_late_commits(self):
+        before = timezone.now()
+        watermark = parse_datetime(self.client.get(reverse('task-sync'), **self.auth).json()['watermark'])
+        self.assertLessEqual(watermark, before - WATERMARK_OVERLAP + timedelta(seconds=1))
+        # Committed after the poll, but stamped before it.
+        Task.objects.filter(pk=self.tasks[0].pk).update(title='Late', updated_at=before - timedelta(seconds=1))
+        body = self.client.get(reverse('task-sync'), {'since': watermark.isoformat()}, **self.auth).json()
+        self.assertIn('Late', [task['title'] for task in body['changed']])
+
+    def test_old_tombstones_are_purged_and_old_watermarks_refused(self):
+        self.tasks[0].delete()
+        TaskTombstone.objects.update(deleted_at=timezone.now() - timedelta(seconds=settings.TASK_TOMBSTONE_RETENTION + 60))
+        recent_id = self.tasks[1].id
+        self.tasks[1].delete()
+        self.assertEqual(purge_task_tombstones(), 1)
+        self.assertEqual(list(TaskTombstone.objects.values_list('task_id', flat=True)), [recent_id])
+
+        since = timezone.now() - timedelta(seconds=settings.TASK_TOMBSTONE_RETENTION + 3600)
+        response = self.client.get(reverse('task-sync'), {'since': since.isoformat()}, **self.auth)
+        self.assertEqual(response.status_code, 410)
+
+    def test_deleting_a_user_cascades_cleanly(self):
+        self.user.delete()
+        self.assertFalse(TaskTombstone.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskReadPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        now = timezone.now()
+        Task.objects.create(title='Open', description='desc', assigned_to=cls.user, created_by=cls.admin,
+                            due_date=now)
+        cls.done = Task.objects.create(title='Done', description='desc', assigned_to=cls.user, created_by=cls.admin,
+                                       status='completed', due_date=now, started_at=now, completed_at=now,
+                                       worked_hours='2.5', completion_report='report')
+
+    def test_matches_task_serializer(self):
+        tasks = Task.objects.all()
+        plan = TaskReadPlan.for_fields()
+        self.assertEqual(
+            json.dumps(plan.serialize(plan.values(tasks))),
+            json.dumps(TaskSerializer(tasks, many=True).data),
+        )
+        fields = ['id', 'worked_hours', 'assigned_to_username']
+        plan = TaskReadPlan.for_fields(fields)
+        self.assertEqual(
+            json.dumps(plan.serialize(plan.values(tasks))),
+            json.dumps(TaskSerializer(tasks, many=True, fields=fields).data),
+        )
+
+    def test_plans_are_shared_by_fieldset(self):
+        plan = TaskReadPlan.for_fields(['title', 'id'])
+        self.assertIs(TaskReadPlan.for_fields(['id', 'title', 'title', 'nonsense']), plan)
+        self.assertEqual(plan.columns, ['id', 'title'])
+
+    def test_report_view_payload(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        response = self.client.get(reverse('task-report', args=[self.done.id]), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.json()['task_details'], json.loads(json.dumps(TaskSerializer(self.done).data)))
+        self.assertEqual(response.json()['worked_hours'], 2.5)
+
+
+class TaskBulkApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        cls.stranger = User.objects.create_user('stranger', password='pw', role='user')
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def item(self, **overrides):
+        item = {'title': 'Task', 'description': 'desc', 'assigned_to': self.user.id,
+                'due_date': timezone.now().isoformat()}
+        item.update(overrides)
+        return item
+
+    def test_bulk_create_in_constant_queries(self):
+        items = [self.item(title=f'Task {i}') for i in range(50)] + [self.item(status='in_progress')]
+        # Includes the savepoint around each TaskStats row created on the way.
+        with self.assertNumQueries(17):
+            response = self.client.post(reverse('task-bulk-create'), {'tasks': items},
+                                        content_type='application/json', **self.auth(self.admin))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 51)
+        self.assertIsNotNone(Task.objects.get(status='in_progress').started_at)
+        self.assertEqual(
+            TaskStats.objects.filter(scope='admin', owner=self.admin).values_list('pending', 'in_progress').get(),
+            (50, 1),
+        )
+
+    def test_bulk_create_reports_item_errors_and_writes_nothing(self):
+        items = [self.item(), self.item(assigned_to=self.stranger.id), self.item(status='done')]
+        response = self.client.post(reverse('task-bulk-create'), {'tasks': items},
+                                    content_type='application/json', **self.auth(self.admin))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2])
+        self.assertFalse(Task.objects.exists())
+
+        response = self.client.post(reverse('task-bulk-create'), {'tasks': [self.item()]},
+                                    content_type='application/json', **self.auth(self.user))
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_status_update(self):
+        tasks = [
+            Task.objects.create(title=f'Task {i}', description='desc', assigned_to=self.user,
+                                created_by=self.admin, due_date=timezone.now())
+            for i in range(3)
+        ]
+        updates = [
+            {'id': tasks[0].id, 'status': 'in_progress'},
+            {'id': tasks[1].id, 'status': 'completed', 'worked_hours': '1.5', 'completion_report': 'done'},
+        ]
+        response = self.client.patch(reverse('task-bulk-status'), {'updates': updates},
+                                     content_type='application/json', **self.auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        tasks[0].refresh_from_db()
+        tasks[1].refresh_from_db()
+        self.assertIsNotNone(tasks[0].started_at)
+        self.assertIsNotNone(tasks[1].completed_at)
+        self.assertEqual(TaskStats.objects.filter(scope='user', owner=self.user)
+                         .values_list('pending', 'in_progress', 'completed').get(), (1, 1, 1))
+
+        updates = [{'id': tasks[2].id, 'status': 'completed'}, {'id': tasks[2].id, 'status': 'in_progress'}]
+        response = self.client.patch(reverse('task-bulk-status'), {'updates': updates},
+                                     content_type='application/json', **self.auth(self.stranger))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [0])
+
+        updates = [{'id': tasks[2].id, 'status': 'in_progress'}, {'id': tasks[2].id, 'status': 'pending'}]
+        response = self.client.patch(reverse('task-bulk-status'), {'updates': updates},
+                                     content_type='application/json', **self.auth(self.stranger))
+        self.assertEqual([error['index'] for error in response.json()['errors']], [0, 1])
+
+
+class TaskSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.user = User.objects.create_user('worker', password='pw', role='user', assigned_admin=cls.admin)
+        cls.stranger = User.objects.create_user('stranger', password='pw', role='user')
+        now = timezone.now()
+
+        def task(title, description='desc', assigned_to=cls.user, **fields):
+            return Task(title=title, description=description, assigned_to=assigned_to, created_by=cls.admin,
+                        due_date=now, **fields)
+
+        Task.objects.bulk_create([
+            task('Quarterly invoices', 'Send the invoices to finance.'),
+            task('Server upgrade', 'Patch the database servers; mention invoices in the changelog.'),
+            task('Team lunch', 'Book a table.', status='completed', completion_report='Reported the booking to finance.'),
+            task('Invoices for the stranger', assigned_to=cls.stranger),
+        ])
+
+    def titles(self, query, tasks=None):
+        return list((tasks or Task.objects.all()).search(query).order_by('search_rank', 'id').values_list('title', flat=True))
+
+    def search_api(self, user, **params):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get(reverse('task-search'), params, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_matches_every_text_field_with_stemming_and_prefixes(self):
+        # The title match ranks above the description match.
+        self.assertEqual(self.titles('invoice', Task.objects.filter(assigned_to=self.user)),
+                         ['Quarterly invoices', 'Server upgrade'])
+        self.assertEqual(self.titles('reporting finance'), ['Team lunch'])
+        self.assertEqual(self.titles('serv'), ['Server upgrade'])
+        self.assertEqual(self.titles('invoices "OR (table*'), [])
+        self.assertEqual(self.titles('  ?! '), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        Task.objects.filter(title='Team lunch').update(title='Team dinner')
+        self.assertEqual(self.titles('dinner'), ['Team dinner'])
+        self.assertEqual(self.titles('lunch'), [])
+        Task.objects.filter(title='Team dinner').delete()
+        self.assertEqual(self.titles('dinner'), [])
+
+    def test_repair_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            for name in search.FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        Task.objects.filter(title='Team lunch').update(title='Team dinner')
+        search.repair(connection)
+        self.assertEqual(self.titles('dinner'), ['Team dinner'])
+        Task.objects.filter(title='Team dinner').update(title='Team breakfast')
+        self.assertEqual(self.titles('breakfast'), ['Team breakfast'])
+
+    def test_api_is_scoped_ranked_and_paged(self):
+        response = self.search_api(self.admin, q='invoices', page_size=1, fields='id,title')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['count'], body['next'], body['previous']), (2, 2, None))
+        self.assertEqual(list(body['results'][0]), ['id', 'title', 'score'])
+        self.assertEqual(body['results'][0]['title'], 'Quarterly invoices')
+        body = self.search_api(self.admin, q='invoices', page_size=1, page=2).json()
+        self.assertEqual([task['title'] for task in body['results']], ['Server upgrade'])
+        self.assertLess(body['results'][0]['score'], 1)
+
+        body = self.search_api(self.stranger, q='invoices').json()
+        self.assertEqual([task['title'] for task in body['results']], ['Invoices for the stranger'])
+        self.assertEqual(self.search_api(self.user, q='invoices', status='completed').json()['count'], 0)
+
+    def test_api_errors(self):
+        self.assertEqual(self.search_api(self.user).status_code, 400)
+        self.assertEqual(self.search_api(self.user, q='invoices', page=9).json(), {'error': 'Invalid page.'})
+        self.assertEqual(self.search_api(self.user, q='invoices', status='nope').status_code, 400)
+
+    def test_task_list_search(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('task_list'), {'q': 'invoices', 'cursor': ''})
+        self.assertEqual([task.title for task in response.context['tasks']], ['Quarterly invoices', 'Server upgrade'])
+        self.assertContains(response, 'value="invoices"')
+
+
+class PermissionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = User.objects.create_user('boss', password='pw', role='superadmin')
+        cls.admin = User.objects.create_user('lead', password='pw', role='admin')
+        cls.other_admin = User.objects.create_user('other', password='pw', role='admin')
+        cls.ann = User.objects.create_user('ann', password='pw', role='user', assigned_admin=cls.admin)
+        cls.bob = User.objects.create_user('bob', password='pw', role='user', assigned_admin=cls.other_admin)
+        now = timezone.now()
+        cls.ann_task = Task.objects.create(title='a', description='d', assigned_to=cls.ann, created_by=cls.admin, due_date=now)
+        cls.bob_task = Task.objects.create(title='b', description='d', assigned_to=cls.bob, created_by=cls.other_admin, due_date=now)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scoped_tasks(self):
+        self.assertEqual(set(scoped_tasks(self.superadmin)), {self.ann_task, self.bob_task})
+        self.assertEqual(list(scoped_tasks(self.admin)), [self.ann_task])
+        self.assertEqual(list(scoped_tasks(self.bob)), [self.bob_task])
+
+    def test_ids_are_memoized_and_follow_reassignment(self):
+        admin = User.objects.get(pk=self.admin.pk)
+        self.assertEqual(manageable_user_ids(admin), {self.ann.pk})
+        with self.assertNumQueries(0):
+            self.assertTrue(admin.can_manage_user(self.ann))
+            self.assertFalse(admin.can_manage_user(self.bob))
+
+        self.bob.assigned_admin = self.admin
+        self.bob.save()
+        # A later request gets a fresh user; the cached ids were invalidated.
+        self.assertEqual(manageable_user_ids(User.objects.get(pk=self.admin.pk)), {self.ann.pk, self.bob.pk})
+
+    def test_cached_ids_expire_quickly(self):
+        self.assertEqual(manageable_user_ids(User.objects.get(pk=self.admin.pk)), {self.ann.pk})
+        # As another process sees it: the row changes without a bump here.
+        User.objects.filter(pk=self.bob.pk).update(assigned_admin=self.admin)
+        self.assertEqual(manageable_user_ids(User.objects.get(pk=self.admin.pk)), {self.ann.pk})
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + MANAGEABLE_IDS_TIMEOUT + 1):
+            self.assertEqual(manageable_user_ids(User.objects.get(pk=self.admin.pk)), {self.ann.pk, self.bob.pk})
+
+    def test_html_views_scope_by_admin(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('task_detail', args=[self.ann_task.id])).status_code, 200)
+        for name in ('task_detail', 'task_edit', 'task_delete'):
+            self.assertEqual(self.client.get(reverse(name, args=[self.bob_task.id])).status_code, 404)
+
+    def test_api_report_checks_managed_users(self):
+        Task.objects.filter(pk__in=[self.ann_task.pk, self.bob_task.pk]).update(status='completed')
+        token = RefreshToken.for_user(self.admin).access_token
+        response = self.client.get(reverse('task-report', args=[self.ann_task.id]), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('task-report', args=[self.bob_task.id]), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 403)
@@ -1,6 +1,7 @@
 
 from django.urls import path,include
 from . import views
+from .metrics import metrics_view
 
 
 urlpatterns = [
@@ -33,4 +34,11 @@ urlpatterns = [
     
     # Reports
     path('reports/', views.reports, name='reports'),
+
+    # Background jobs
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
+
+    # Monitoring
+    path('internal/metrics', metrics_view, name='metrics'),
 ]
\ No newline at end of file
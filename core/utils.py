@@ -35,4 +35,10 @@ def superadmin_or_admin_required(view_func):
         login_url='login',
         redirect_field_name=None
     )(view_func))
-    return decorated_view_func
\ No newline at end of file
+    return decorated_view_func
+
+
+# Serve this view's reads from a read replica (see core.db_router)
+def read_replica(view_func):
+    view_func.read_from_replica = True
+    return view_func
@@ -1,12 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Q, Prefetch
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import JsonResponse
+from django.http import JsonResponse, FileResponse, Http404
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import User, Task
+from .models import User, Task, Job
 from .forms import UserForm, TaskForm
+from .exports import EXPORT_FORMATS
+from .stats import superadmin_stats, admin_stats, user_stats
+from .pagination import paginate
+from .filters import TaskFilterSet
+from .reports import completed_task_report, completed_tasks
+from .jobs import enqueue
+from .job_handlers import job_file_path
+from .permissions import scoped_tasks
+from . import cache
+from .login import login_throttled, record_login_failure, clear_login_failures, client_ip
 from .utils import *
 
 
@@ -14,10 +24,16 @@ def login_view(request):
     if request.method == "POST":
         username = request.POST.get("username")
         password = request.POST.get("password")
+        ip = client_ip(request)
+
+        if login_throttled(username, ip):
+            messages.error(request, "Too many failed login attempts. Try again later.")
+            return render(request, "login.html", status=429)
 
         user = authenticate(request, username=username, password=password)
 
         if user is not None:
+            clear_login_failures(username, ip)
             if user.is_active:
                 login(request, user)
 
@@ -31,6 +47,7 @@ def login_view(request):
             else:
                 messages.error(request, "Your account is inactive.")
         else:
+            record_login_failure(username, ip)
             messages.error(request, "Invalid username or password.")
 
     return render(request, "login.html")
@@ -54,62 +71,43 @@ from django.contrib.auth import authenticate, login,logout
 
 
 
+@read_replica
 @superadmin_required
 def superadmin_dashboard(request):
-    user_count = User.objects.filter(role='user').count()
-    admin_count = User.objects.filter(role='admin').count()
-    task_count = Task.objects.count()
-    pending_tasks = Task.objects.filter(status='pending').count()
-    recent_tasks = Task.objects.all().order_by('-created_at')[:5]
-    recent_users = User.objects.all().order_by('-date_joined')[:5]
+    recent_tasks = cache.recent_tasks(request.user)
+    recent_users = cache.recent_users()
     
     context = {
-        'user_count': user_count,
-        'admin_count': admin_count,
-        'task_count': task_count,
-        'pending_tasks': pending_tasks,
+        **superadmin_stats(),
         'recent_tasks': recent_tasks,
         'recent_users': recent_users,
     }
     
     return render(request, 'superadmin_dashboard.html', context)
 
+@read_replica
 @admin_required
 def admin_dashboard(request):
-    assigned_users = User.objects.filter(assigned_admin=request.user, role='user')
-    assigned_users_count = assigned_users.count()
-    user_tasks = Task.objects.filter(assigned_to__in=assigned_users)
-    user_task_count = user_tasks.count()
-    pending_user_tasks = user_tasks.filter(status='pending').count()
-    completed_user_tasks = user_tasks.filter(status='completed').count()
-    recent_tasks = user_tasks.order_by('-created_at')[:5]
+    assigned_users = cache.managed_users_preview(request.user)
+    recent_tasks = cache.recent_tasks(request.user)
     
     context = {
-        'assigned_users': assigned_users[:5],
-        'assigned_users_count': assigned_users_count,
-        'user_task_count': user_task_count,
-        'pending_user_tasks': pending_user_tasks,
-        'completed_user_tasks': completed_user_tasks,
+        **admin_stats(request.user),
+        'assigned_users': assigned_users,
         'recent_tasks': recent_tasks,
     }
     
     return render(request, 'admin_dashboard.html', context)
 
+@read_replica
 @login_required
 def user_dashboard(request):
     if request.user.is_superadmin or request.user.is_admin:
         return redirect('dashboard')
-    tasks = Task.objects.filter(assigned_to=request.user)
-    pending_tasks = tasks.filter(status='pending')
-    in_progress_tasks = tasks.filter(status='in_progress')
-    completed_tasks = tasks.filter(status='completed') 
-    recent_tasks = tasks.order_by('-created_at')[:5]
+    recent_tasks = cache.recent_tasks(request.user)
     
     context = {
-        'pending_tasks_count': pending_tasks.count(),
-        'in_progress_tasks_count': in_progress_tasks.count(),
-        'completed_tasks_count': completed_tasks.count(),
-        'total_tasks': tasks.count(),
+        **user_stats(request.user),
         'recent_tasks': recent_tasks,
     }
     
@@ -117,9 +115,10 @@ def user_dashboard(request):
 
 
 
+@read_replica
 @superadmin_required
 def user_list(request):
-    users = User.objects.filter(role='user',is_superuser=False).order_by('-date_joined')
+    users = User.objects.filter(role='user',is_superuser=False).for_listing()
     status_filter = request.GET.get('status')
     if status_filter:
         if status_filter == 'active':
@@ -127,15 +126,7 @@ def user_list(request):
         elif status_filter == 'inactive':
             users = users.filter(is_active=False)
     
-    page = request.GET.get('page', 1)
-    paginator = Paginator(users, 10) 
-    
-    try:
-        users = paginator.page(page)
-    except PageNotAnInteger:
-        users = paginator.page(1)
-    except EmptyPage:
-        users = paginator.page(paginator.num_pages)
+    users = paginate(request, users, ('-date_joined', '-id'))
     context = {
         'users': users,
     }
@@ -146,8 +137,8 @@ def user_list(request):
 
 @login_required
 def user_detail(request, user_id):
-    user_obj = get_object_or_404(User, id=user_id)
-    assigned_tasks = Task.objects.filter(assigned_to=user_obj).order_by('-created_at')
+    user_obj = get_object_or_404(User.objects.select_related('assigned_admin'), id=user_id)
+    assigned_tasks = Task.objects.filter(assigned_to=user_obj).defer('completion_report').order_by('-created_at')
     
     context = {
         'user_obj': user_obj,
@@ -157,9 +148,12 @@ def user_detail(request, user_id):
 
 
 
+@read_replica
 @superadmin_required
 def admin_list(request):
-    admins = User.objects.filter(role='admin').order_by('-date_joined')
+    admins = User.objects.filter(role='admin').prefetch_related(
+        Prefetch('managed_users', queryset=User.objects.only('id', 'username', 'assigned_admin_id'))
+    )
 
     status_filter = request.GET.get('status')
     if status_filter:
@@ -168,15 +162,7 @@ def admin_list(request):
         elif status_filter == 'inactive':
             admins = admins.filter(is_active=False)
     
-    page = request.GET.get('page', 1)
-    paginator = Paginator(admins, 10)
-    
-    try:
-        admins = paginator.page(page)
-    except PageNotAnInteger:
-        admins = paginator.page(1)
-    except EmptyPage:
-        admins = paginator.page(paginator.num_pages)
+    admins = paginate(request, admins, ('-date_joined', '-id'))
     
     context = {
         'admins': admins,
@@ -349,9 +335,12 @@ def user_delete(request, user_id):
     user = get_object_or_404(User, id=user_id)
     
     if request.method == 'POST':
-        username = user.username
-        user.delete()
-        messages.success(request, f'User {username} deleted successfully.')
+        # Deleting cascades through all of the user's tasks, so it runs in
+        # the background; deactivating first locks the account meanwhile.
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        enqueue('delete_user', {'user_id': user.pk}, user=request.user)
+        messages.success(request, f'User {user.username} is being deleted.')
         return redirect('user_list')
     
     context = {
@@ -389,43 +378,17 @@ def admin_toggle_active(request, user_id):
 
 
 
+@read_replica
 @login_required
 def task_list(request):
-    if request.user.is_superadmin:
-        tasks = Task.objects.all()
-    elif request.user.is_admin:
-        assigned_users = User.objects.filter(assigned_admin=request.user, role='user')
-        tasks = Task.objects.filter(assigned_to__in=assigned_users)
-    else:  
-        tasks = Task.objects.filter(assigned_to=request.user)
+    tasks = scoped_tasks(request.user).for_listing()
+    tasks = TaskFilterSet(request.GET).filter(tasks)
 
-    status_filter = request.GET.get('status')
-    if status_filter:
-        tasks = tasks.filter(status=status_filter)
-    
-    assigned_to_filter = request.GET.get('assigned_to')
-    if assigned_to_filter:
-        tasks = tasks.filter(assigned_to_id=assigned_to_filter)
-    
-    due_date_filter = request.GET.get('due_date')
-    if due_date_filter:
-        try:
-            due_date = datetime.strptime(due_date_filter, '%Y-%m-%d').date()
-            tasks = tasks.filter(due_date__date=due_date)
-        except ValueError:
-            pass
-    
-    tasks = tasks.order_by('-created_at')
-    
-    page = request.GET.get('page', 1)
-    paginator = Paginator(tasks, 10)
-    
-    try:
-        tasks = paginator.page(page)
-    except PageNotAnInteger:
-        tasks = paginator.page(1)
-    except EmptyPage:
-        tasks = paginator.page(paginator.num_pages)
+    query = request.GET.get('q', '').strip()
+    if query:
+        tasks = paginate(request, tasks.search(query), ('search_rank', '-created_at', '-id'), keyset=False)
+    else:
+        tasks = paginate(request, tasks, ('-created_at', '-id'))
     
     context = {
         'tasks': tasks,
@@ -460,11 +423,7 @@ def task_create(request):
 
 @superadmin_or_admin_required
 def task_edit(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    
-    if not request.user.is_superadmin and task.assigned_to.assigned_admin != request.user:
-        messages.error(request, 'You do not have permission to edit this task.')
-        return redirect('task_list')
+    task = get_object_or_404(scoped_tasks(request.user), id=task_id)
     
     if request.method == 'POST':
         form = TaskForm(request.POST, instance=task, user=request.user)
@@ -488,11 +447,7 @@ def task_edit(request, task_id):
 
 @superadmin_or_admin_required
 def task_delete(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    
-    if not request.user.is_superadmin and task.assigned_to.assigned_admin != request.user:
-        messages.error(request, 'You do not have permission to delete this task.')
-        return redirect('task_list')
+    task = get_object_or_404(scoped_tasks(request.user), id=task_id)
     
     if request.method == 'POST':
         title = task.title
@@ -510,11 +465,7 @@ def task_delete(request, task_id):
 
 @superadmin_or_admin_required
 def task_detail(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    
-    if not request.user.is_superadmin and task.assigned_to.assigned_admin != request.user:
-        messages.error(request, 'You do not have permission to view this task.')
-        return redirect('task_list')
+    task = get_object_or_404(scoped_tasks(request.user), id=task_id)
     
     context = {
         'task': task,
@@ -524,59 +475,41 @@ def task_detail(request, task_id):
 
 
 
+def _report_tasks(request):
+    tasks = completed_tasks(request.user, request.GET)
+    report_users = cache.report_users(request.user)
+
+    return tasks, report_users
+
+
+@read_replica
 @superadmin_or_admin_required
 def reports(request):
-    if request.user.is_superadmin:
-        tasks = Task.objects.filter(status='completed')
-        report_users = User.objects.filter(role='user')
-    else: 
-        assigned_users = User.objects.filter(assigned_admin=request.user, role='user')
-        tasks = Task.objects.filter(assigned_to__in=assigned_users, status='completed')
-        print()
-        report_users = assigned_users
-    
-    user_filter = request.GET.get('user')
-    if user_filter:
-        tasks = tasks.filter(assigned_to_id=user_filter)
-    
-    date_from_filter = request.GET.get('date_from')
-    if date_from_filter:
-        try:
-            date_from = datetime.strptime(date_from_filter, '%Y-%m-%d').date()
-            tasks = tasks.filter(due_date__date__gte=date_from)
-        except ValueError:
-            pass
-    
-    date_to_filter = request.GET.get('date_to')
-    if date_to_filter:
-        try:
-            date_to = datetime.strptime(date_to_filter, '%Y-%m-%d').date()
-            tasks = tasks.filter(due_date__date__lte=date_to)
-        except ValueError:
-            pass
-    
-    total_completed_tasks = tasks.count()
-    total_worked_hours = tasks.aggregate(Sum('worked_hours'))['worked_hours__sum'] or 0
-    avg_hours_per_task = tasks.aggregate(Avg('worked_hours'))['worked_hours__avg'] or 0
+    tasks, report_users = _report_tasks(request)
+
+    export_format = request.GET.get('export')
+    if export_format in EXPORT_FORMATS:
+        job = enqueue('export_report', {
+            'format': export_format,
+            'compress': request.GET.get('compress') == 'gzip',
+            'params': {key: value for key, value in request.GET.items() if key in TaskFilterSet.fields},
+        }, user=request.user)
+        messages.info(request, 'Your export is being prepared.')
+        return redirect('job_detail', job_id=job.pk)
     
-    tasks = tasks.order_by('-due_date')
+    report, _ = completed_task_report(request.user, request.GET)
+    totals = report['totals']
     
-    page = request.GET.get('page', 1)
-    paginator = Paginator(tasks, 10) 
-    
-    try:
-        tasks = paginator.page(page)
-    except PageNotAnInteger:
-        tasks = paginator.page(1)
-    except EmptyPage:
-        tasks = paginator.page(paginator.num_pages)
+    tasks = paginate(request, tasks.for_report(), ('-due_date', '-id'))
     
     context = {
         'tasks': tasks,
         'report_users': report_users,
-        'total_completed_tasks': total_completed_tasks,
-        'total_worked_hours': total_worked_hours,
-        'avg_hours_per_task': avg_hours_per_task,
+        'report': report,
+        'total_completed_tasks': totals['tasks'],
+        'total_worked_hours': totals['hours'],
+        'avg_hours_per_task': totals['avg_hours'],
+        'on_time_rate': totals['on_time_rate'],
     }
     
     return render(request, 'reports.html', context)
@@ -620,4 +553,36 @@ def update_task_status(request):
         messages.success(request, "Task status updated successfully.")
         return redirect('task_list')
     
-    return redirect('task_list')
\ No newline at end of file
+    return redirect('task_list')
+
+
+
+def _own_job(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    if job.created_by_id != request.user.id and not request.user.is_superadmin:
+        raise Http404
+    return job
+
+
+@login_required
+def job_detail(request, job_id):
+    job = _own_job(request, job_id)
+
+    context = {
+        'job': job,
+    }
+
+    return render(request, 'job_detail.html', context)
+
+
+@login_required
+def job_download(request, job_id):
+    job = _own_job(request, job_id)
+    if job.status != 'succeeded' or not (job.result or {}).get('file'):
+        raise Http404
+    try:
+        output = open(job_file_path(job.result['file']), 'rb')
+    except FileNotFoundError:
+        raise Http404
+    return FileResponse(output, as_attachment=True, filename=job.result['filename'], content_type=job.result['content_type'])
+
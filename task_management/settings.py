@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -47,11 +48,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,8 +86,12 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'core.authentication.StatelessJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -101,17 +108,27 @@ LOGOUT_REDIRECT_URL = '/login/'
 
 ROOT_URLCONF = 'task_management.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if os.environ.get('TEMPLATE_CACHE', '1') == '1':
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Each template is compiled once per process. runserver's
+            # autoreloader clears the cache when a template changes;
+            # TEMPLATE_CACHE=0 turns it off entirely while editing templates.
+            'loaders': TEMPLATE_LOADERS,
         },
     },
 ]
@@ -122,11 +139,107 @@ WSGI_APPLICATION = 'task_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=sqlite (default) suits a single node: IMMEDIATE transactions
+# plus a busy timeout make writers queue instead of failing with "database
+# is locked". DB_SQLITE_WAL=1 also switches to WAL, which lets readers run
+# alongside the one writer, with synchronous=NORMAL (durable across app
+# crashes in WAL mode). WAL is opt-in because it is stored in the database
+# file itself: the first connection rewrites the header and leaves -wal/-shm
+# files, which would dirty a checked-in development db.sqlite3.
+# DB_ENGINE=postgres needs psycopg (psycopg[pool] for DB_POOL=1).
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_SQLITE_WAL = os.environ.get('DB_SQLITE_WAL') == '1'
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'task_management'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL'):
+        # psycopg's pool replaces persistent connections; Django requires CONN_MAX_AGE=0 with it.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('DB_BUSY_TIMEOUT', 20)),
+            },
+        }
+    }
+    if DB_SQLITE_WAL:
+        DATABASES['default']['OPTIONS']['init_command'] = 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+
+
+# Read replicas: DB_REPLICAS is a comma-separated list of SQLite files, or
+# for PostgreSQL of "host[:port]/name" entries. They become replica1,
+# replica2, ... and serve the reads of views marked @read_replica.
+# After a write the client reads from default for REPLICA_PIN_SECONDS.
+
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    replica_settings = {**DATABASES['default'], 'OPTIONS': dict(DATABASES['default']['OPTIONS'])}
+    if DB_ENGINE == 'postgres':
+        host, _, name = replica.partition('/')
+        host, _, port = host.partition(':')
+        replica_settings.update(HOST=host, PORT=port or replica_settings['PORT'], NAME=name or replica_settings['NAME'])
+    else:
+        replica_settings['NAME'] = replica
+    replica_settings['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica{index}'] = replica_settings
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point REDIS_URL at a Redis server to share the cache between processes;
+# without it each process keeps its own in-memory cache. core.cache
+# invalidates by bumping a version key, and with the in-memory cache the
+# bump only reaches the process that made it: other web and job workers keep
+# serving their entries until they time out (DEFAULT_TIMEOUT, 5 minutes).
+# Use the in-memory cache for development and single-process deployments.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'task_management',
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Rendered table rows ({% cache ... using='fragments' %}). Their keys
+# include the row's updated_at, so entries never go stale and a per-process
+# cache saves a network round trip per row even when REDIS_URL is set.
+CACHES['fragments'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'fragments',
+    'OPTIONS': {'MAX_ENTRIES': 20000},
 }
 
 
@@ -149,6 +262,89 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+# PASSWORD_HASHER picks the hasher new hashes use (argon2, scrypt or pbkdf2).
+# The others stay listed so existing hashes still verify; they are upgraded
+# to the preferred hasher the next time the user logs in.
+
+PASSWORD_HASHER_CHOICES = {
+    'argon2': 'core.hashers.Argon2idPasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Failed logins allowed per username from one client IP / per client IP
+# within the window before further attempts are refused without checking
+# the password.
+LOGIN_THROTTLE_USERNAME_LIMIT = int(os.environ.get('LOGIN_THROTTLE_USERNAME_LIMIT', 5))
+LOGIN_THROTTLE_IP_LIMIT = int(os.environ.get('LOGIN_THROTTLE_IP_LIMIT', 30))
+LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300))
+
+# Threads the async login path verifies passwords on (defaults to the CPU count).
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or os.cpu_count()
+
+# Background jobs (core.jobs, manage.py run_workers). Workers renew the
+# lease of a running job every third of JOB_LEASE_SECONDS; a job whose lease
+# runs out (its worker died) is picked up again. Failed attempts are
+# retried after JOB_RETRY_DELAY, doubling each time.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 1))
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 600))
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR', BASE_DIR / 'job_files')
+# Export files are deleted this many seconds after they were written; the
+# run_workers parent process checks every JOB_FILES_PURGE_INTERVAL seconds.
+JOB_FILES_RETENTION = int(os.environ.get('JOB_FILES_RETENTION', 24 * 3600))
+JOB_FILES_PURGE_INTERVAL = int(os.environ.get('JOB_FILES_PURGE_INTERVAL', 3600))
+# Task tombstones (deletions for /api/v1/task/sync) are purged by the same
+# check once older than this; clients that last synced before that must
+# start over without ``since``.
+TASK_TOMBSTONE_RETENTION = int(os.environ.get('TASK_TOMBSTONE_RETENTION', 30 * 24 * 3600))
+# run_workers queues an incremental rollup_tasks job this often. Reports read
+# days before today from the rollups, so a change to an older task shows up
+# there only after the next run.
+ROLLUP_INTERVAL = int(os.environ.get('ROLLUP_INTERVAL', 600))
+
+# Request metrics (core.metrics). /internal/metrics answers clients sending
+# "Authorization: Bearer $METRICS_TOKEN", from the IPs below if any are set;
+# it is off while METRICS_TOKEN is empty.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Log a possible N+1 when one statement runs this many times in a request.
+METRICS_DUPLICATE_QUERY_THRESHOLD = 5
+
+# Most queries a view may run, by URL name. Overruns are logged, and fail
+# the test that caused them under core.testing.QueryBudgetTestRunner.
+QUERY_BUDGETS = {
+    'superadmin_dashboard': 8,
+    'admin_dashboard': 8,
+    'user_dashboard': 8,
+    'user_list': 6,
+    'admin_list': 6,
+    'task_list': 6,
+    'reports': 9,
+    'task-list': 5,
+    'task-sync': 5,
+    'task-detail': 5,
+    'task-report': 4,
+    'task-report-summary': 5,
+    'task-analytics': 5,
+    'task-search': 5,
+    'async-task-list': 5,
+}
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT') == '1'
+TEST_RUNNER = 'core.testing.QueryBudgetTestRunner'
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 